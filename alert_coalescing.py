@@ -0,0 +1,249 @@
+"""
+Per-channel coalescing windows for bursty alerts
+
+The first coalescable alert for a channel opens a window; alerts arriving for
+that channel before the window closes are buffered with it, and when it closes
+the whole batch is handed to a flush callback (which turns it into a single
+digest message). Each channel has its own window and timer, so a burst of
+reports costs one provider call per channel per window instead of one per
+report. If the flush callback fails, the batch goes back into the channel's
+buffer (ahead of anything buffered since) and is retried a window later.
+
+With a database path, buffered alerts are also written to SQLite as they
+arrive and deleted once their window has been flushed, so a crash or restart
+during a window loses nothing: restore() reopens the windows on the next start
+(flushing at once any whose time is already up). Without one, buffered alerts
+live only in memory.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+FlushFunction = Callable[[str, List[Any]], None]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS coalesced_alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel_id TEXT NOT NULL,
+    alert TEXT NOT NULL,
+    window_seconds REAL NOT NULL,
+    added_at REAL NOT NULL
+);
+"""
+
+
+class AlertCoalescer:
+    """Buffers alerts per channel and flushes each channel's batch when its window closes"""
+
+    def __init__(self,
+                 flush: FlushFunction,
+                 db_path: Optional[str] = None,
+                 encode: Callable[[Any], Any] = lambda alert: alert,
+                 decode: Callable[[Any], Any] = lambda data: data):
+        """
+        Initialize the coalescer
+
+        Args:
+            flush: Called with (channel_id, buffered alerts) when a window closes
+            db_path: SQLite file persisting buffered alerts (None keeps them in memory only)
+            encode: Turns an alert into JSON-serializable data for the database
+            decode: Turns that data back into an alert on restore
+        """
+        self.flush_function = flush
+        self.db_path = db_path
+        self.encode = encode
+        self.decode = decode
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._buffers: Dict[str, List[Any]] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._windows: Dict[str, float] = {}
+        # Persisted row ids of the alerts in each open window
+        self._row_ids: Dict[str, List[int]] = {}
+        self._stats = {"coalesced": 0, "windows": 0, "flushed_alerts": 0, "flush_failures": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path is not None:
+            if db_path != ":memory:":
+                os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+            self._db.commit()
+
+    def _open_window(self, channel_id: str, window_seconds: float) -> None:
+        """Start a channel's window and its timer (caller holds the lock)"""
+        self._buffers[channel_id] = []
+        self._row_ids[channel_id] = []
+        self._windows[channel_id] = window_seconds
+        self._opened_at[channel_id] = opened_at = time.monotonic()
+        timer = threading.Timer(window_seconds, self._expire, args=(channel_id, opened_at))
+        timer.daemon = True
+        self._timers[channel_id] = timer
+        timer.start()
+
+    def add(self, channel_id: str, alert: Any, window_seconds: float) -> float:
+        """
+        Buffer an alert, opening a window for the channel if none is open
+
+        Args:
+            channel_id: Channel the alert is for
+            alert: Alert to buffer
+            window_seconds: Length of a newly opened window
+
+        Returns:
+            Seconds until the channel's window closes
+        """
+        with self._lock:
+            self._stats["coalesced"] += 1
+            row_id = None
+            if self._db is not None:
+                # Persisted before it is buffered, so an accepted alert survives a crash
+                with self._db:
+                    row_id = self._db.execute(
+                        "INSERT INTO coalesced_alerts (channel_id, alert, window_seconds, added_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (channel_id, json.dumps(self.encode(alert)), window_seconds, time.time())
+                    ).lastrowid
+            if channel_id not in self._buffers:
+                self._open_window(channel_id, window_seconds)
+                remaining = window_seconds
+            else:
+                remaining = self._timers[channel_id].interval - (time.monotonic() - self._opened_at[channel_id])
+            self._buffers[channel_id].append(alert)
+            if row_id is not None:
+                self._row_ids[channel_id].append(row_id)
+        return max(0.0, remaining)
+
+    def restore(self) -> int:
+        """
+        Reopen the windows of alerts buffered before a restart
+
+        Each window closes when it would have closed had there been no
+        restart, or right away if that time has passed.
+
+        Returns:
+            Number of alerts restored
+        """
+        if self._db is None:
+            return 0
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, channel_id, alert, window_seconds, added_at FROM coalesced_alerts ORDER BY id"
+            ).fetchall()
+            restored: Dict[str, List[Tuple[int, Any, float, float]]] = {}
+            buffered = {row_id for row_ids in self._row_ids.values() for row_id in row_ids}
+            for row_id, channel_id, data, window_seconds, added_at in rows:
+                if row_id in buffered:
+                    continue
+                restored.setdefault(channel_id, []).append((row_id, self.decode(json.loads(data)),
+                                                            window_seconds, added_at))
+            for channel_id, entries in restored.items():
+                if channel_id not in self._buffers:
+                    _, _, window_seconds, added_at = entries[0]
+                    self._open_window(channel_id, max(0.0, window_seconds - (time.time() - added_at)))
+                self._buffers[channel_id].extend(alert for _, alert, _, _ in entries)
+                self._row_ids[channel_id].extend(row_id for row_id, _, _, _ in entries)
+        count = sum(len(entries) for entries in restored.values())
+        if count:
+            self.logger.info(f"Restored {count} coalesced alerts buffered before a restart")
+        return count
+
+    def _expire(self, channel_id: str, opened_at: float) -> None:
+        """Timer callback: flush the window unless it was already flushed and a new one opened"""
+        self._flush([channel_id], opened_at)
+
+    def flush(self, channel_id: Optional[str] = None) -> int:
+        """
+        Close windows now and hand their alerts to the flush callback
+
+        Args:
+            channel_id: Channel to flush (None flushes every open window)
+
+        Returns:
+            Number of alerts flushed
+        """
+        with self._lock:
+            channel_ids = [channel_id] if channel_id is not None else list(self._buffers)
+        return self._flush(channel_ids)
+
+    def _flush(self, channel_ids: List[str], opened_at: Optional[float] = None) -> int:
+        """Close the given windows (only the one opened at opened_at, if given) and flush them"""
+        with self._lock:
+            batches = []
+            for cid in channel_ids:
+                if cid not in self._buffers or opened_at not in (None, self._opened_at[cid]):
+                    continue
+                self._timers.pop(cid).cancel()
+                self._opened_at.pop(cid)
+                batches.append((cid, self._buffers.pop(cid), self._row_ids.pop(cid), self._windows.pop(cid)))
+
+        flushed = 0
+        for cid, alerts, row_ids, window_seconds in batches:
+            try:
+                self.flush_function(cid, alerts)
+            except Exception as e:
+                # Put the batch back in front of anything buffered since, and try again a window later
+                self.logger.error(f"Failed to flush {len(alerts)} coalesced alerts for {cid}, "
+                                  f"retrying in {window_seconds:.0f}s: {str(e)}")
+                with self._lock:
+                    self._stats["flush_failures"] += 1
+                    if cid not in self._buffers:
+                        self._open_window(cid, window_seconds)
+                    self._buffers[cid][:0] = alerts
+                    self._row_ids[cid][:0] = row_ids
+                continue
+            with self._lock:
+                self._stats["windows"] += 1
+                self._stats["flushed_alerts"] += len(alerts)
+                if self._db is not None and row_ids:
+                    # Only this batch's rows: alerts buffered meanwhile are still waiting
+                    with self._db:
+                        self._db.executemany("DELETE FROM coalesced_alerts WHERE id = ?",
+                                             [(row_id,) for row_id in row_ids])
+            flushed += len(alerts)
+        return flushed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing counters
+
+        Returns:
+            Alerts coalesced, windows flushed, alerts flushed, failed flushes (retried)
+            and alerts buffered per open window
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["buffered"] = {cid: len(alerts) for cid, alerts in self._buffers.items()}
+        return stats
+
+    def shutdown(self, flush: bool = True) -> None:
+        """
+        Stop the window timers
+
+        Args:
+            flush: Send the buffered alerts now instead of dropping them (persisted
+                   alerts are not dropped but kept for restore() on the next start)
+        """
+        if flush:
+            self.flush()
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+            self._opened_at.clear()
+            self._buffers.clear()
+            self._row_ids.clear()
+            self._windows.clear()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,408 @@
+"""
+Durable outbox for alert delivery
+
+Senders append a message to a SQLite table (WAL mode, one small insert per
+message) and return immediately; background workers claim messages, deliver
+them and record the outcome. A claim is a lease, renewed while the delivery is
+still running: if the process dies mid-send the lease runs out and the message
+is delivered again, so delivery is at-least-once. Failed deliveries are
+retried with exponential backoff, and messages that keep failing are moved to
+a dead-letter state instead of being retried forever. A message that could
+not be tried at all (say, every target behind an open circuit breaker) is
+deferred without using up an attempt, but only until it is
+max_deferral_seconds old; after that it is dead-lettered too. Delivered and
+dead messages stay in the table as a log.
+
+Each message carries a priority (the alert level). With a scheduler, workers
+ask it which priority to serve next instead of taking the oldest message, and
+reserved workers serve only its strict priorities, so urgent messages never
+wait behind in-flight lower-priority deliveries.
+"""
+
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from delivery_scheduler import PriorityScheduler
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    priority TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    leased_until REAL,
+    last_error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (available_at, id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_outbox_pending_priority ON outbox (priority, available_at, id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_outbox_in_flight ON outbox (leased_until) WHERE status = 'in_flight';
+"""
+
+Deliver = Callable[[Dict[str, Any]], Any]
+
+
+class DeliveryFailed(Exception):
+    """Raised by a deliver function to request a retry, optionally of a narrower payload"""
+
+    def __init__(self,
+                 reason: str,
+                 payload: Optional[Dict[str, Any]] = None,
+                 retry_after: Optional[float] = None,
+                 attempted: bool = True):
+        """
+        Args:
+            reason: Why the delivery failed (kept as the message's last error)
+            payload: Payload to retry instead of the original, e.g. only the failed channels
+            retry_after: Retry no sooner than this many seconds from now
+            attempted: False if nothing was actually tried (e.g. a circuit breaker was open),
+                       so the attempt does not count toward dead-lettering (the outbox's
+                       max_deferral_seconds still applies)
+        """
+        super().__init__(reason)
+        self.payload = payload
+        self.retry_after = retry_after
+        self.attempted = attempted
+
+
+class AlertOutbox:
+    """SQLite-backed outbox drained by worker threads with retries and dead-lettering"""
+
+    def __init__(self,
+                 deliver: Deliver,
+                 db_path: str = "data/alert_outbox.sqlite3",
+                 workers: int = 2,
+                 max_attempts: int = 5,
+                 backoff_seconds: float = 1.0,
+                 max_backoff_seconds: float = 300.0,
+                 lease_seconds: float = 120.0,
+                 max_deferral_seconds: float = 3600.0,
+                 poll_seconds: float = 1.0,
+                 scheduler: Optional[PriorityScheduler] = None,
+                 reserved_workers: int = 0):
+        """
+        Open (or create) the outbox; workers start on the first enqueue
+
+        Args:
+            deliver: Delivers one payload; raise to retry it
+            db_path: SQLite file (":memory:" for a throwaway outbox)
+            workers: Delivery threads
+            max_attempts: Attempts before a message is dead-lettered
+            backoff_seconds: Base of the jittered exponential retry delay
+            max_backoff_seconds: Cap on a single retry delay
+            lease_seconds: A claimed message whose lease is not renewed within this is redelivered
+            max_deferral_seconds: Age after which a message is dead-lettered instead of deferred again
+            poll_seconds: How often idle workers look for retries that became due
+            scheduler: Chooses which priority to serve next (None serves oldest first)
+            reserved_workers: Extra threads serving only the scheduler's strict priorities
+        """
+        self.deliver = deliver
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.max_deferral_seconds = max_deferral_seconds
+        self.poll_seconds = poll_seconds
+        self.scheduler = scheduler
+        self.reserved_workers = reserved_workers if scheduler is not None else 0
+        self.logger = logging.getLogger(__name__)
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+        self._lock = threading.Lock()
+
+        self._wakeup = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+        # Pick up messages left undelivered by a previous run
+        if self.get_stats()["queue_depth"]:
+            self._start()
+
+    def _start(self) -> None:
+        """Start the worker threads if they are not running"""
+        with self._wakeup:
+            if self._threads or self._stopping:
+                return
+            for i in range(self.workers + self.reserved_workers):
+                strict_only = i >= self.workers
+                thread = threading.Thread(target=self._work, args=(strict_only,), daemon=True,
+                                          name=f"outbox-{'reserved-' if strict_only else ''}{i}")
+                thread.start()
+                self._threads.append(thread)
+
+    def enqueue(self, payload: Dict[str, Any], priority: str = "") -> int:
+        """
+        Durably append a message for delivery
+
+        Args:
+            payload: JSON-serializable message
+            priority: Scheduling class of the message (e.g. its alert level)
+
+        Returns:
+            Outbox message id
+        """
+        now = time.time()
+        with self._lock:
+            with self._db:
+                message_id = self._db.execute(
+                    "INSERT INTO outbox (payload, priority, created_at, available_at) VALUES (?, ?, ?, ?)",
+                    (json.dumps(payload), priority, now, now)
+                ).lastrowid
+        self._start()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        return message_id
+
+    def _claim(self, strict_only: bool = False) -> Optional[Dict[str, Any]]:
+        """Lease the next due message, including ones whose lease ran out"""
+        now = time.time()
+        with self._lock:
+            with self._db:
+                if self.scheduler is None:
+                    row = self._db.execute(
+                        """UPDATE outbox SET status = 'in_flight', leased_until = ?, attempts = attempts + 1
+                           WHERE id = (
+                               SELECT id FROM (
+                                   SELECT id FROM outbox WHERE status = 'pending' AND available_at <= ?
+                                   UNION ALL
+                                   SELECT id FROM outbox WHERE status = 'in_flight' AND leased_until <= ?
+                               ) ORDER BY id LIMIT 1
+                           )
+                           RETURNING id, payload, attempts, priority, created_at""",
+                        (now + self.lease_seconds, now, now)
+                    ).fetchone()
+                else:
+                    row = self._claim_scheduled(now, strict_only)
+        if row is None:
+            return None
+
+        if row[2] == 1 and self.scheduler is not None:
+            self.scheduler.record(row[3], now - row[4])
+        return {"id": row[0], "payload": json.loads(row[1]), "attempts": row[2], "priority": row[3],
+                "created_at": row[4]}
+
+    def _claim_scheduled(self, now: float, strict_only: bool) -> Optional[tuple]:
+        """Lease an expired message, else the oldest due message of the scheduler's chosen priority"""
+        claim = ("UPDATE outbox SET status = 'in_flight', leased_until = ?, attempts = attempts + 1 "
+                 "WHERE id = ({}) RETURNING id, payload, attempts, priority, created_at")
+
+        # Messages orphaned by a dead worker were already scheduled once: recover them first
+        if not strict_only:
+            row = self._db.execute(claim.format(
+                "SELECT id FROM outbox WHERE status = 'in_flight' AND leased_until <= ? ORDER BY id LIMIT 1"
+            ), (now + self.lease_seconds, now)).fetchone()
+            if row is not None:
+                return row
+
+        due = [priority for (priority,) in self._db.execute(
+            "SELECT DISTINCT priority FROM outbox WHERE status = 'pending' AND available_at <= ?", (now,)
+        )]
+        priority = self.scheduler.choose(due, strict_only)
+        if priority is None:
+            return None
+        return self._db.execute(claim.format(
+            "SELECT id FROM outbox WHERE status = 'pending' AND priority = ? AND available_at <= ? "
+            "ORDER BY id LIMIT 1"
+        ), (now + self.lease_seconds, priority, now)).fetchone()
+
+    def _renew_lease(self, message: Dict[str, Any], done: threading.Event) -> None:
+        """Heartbeat: extend the lease every third of its length until the delivery is done"""
+        while not done.wait(self.lease_seconds / 3):
+            with self._lock:
+                with self._db:
+                    # The attempts check stops a late heartbeat from extending a lease someone else took over
+                    renewed = self._db.execute(
+                        "UPDATE outbox SET leased_until = ? WHERE id = ? AND status = 'in_flight' AND attempts = ?",
+                        (time.time() + self.lease_seconds, message["id"], message["attempts"])
+                    ).rowcount
+            if not renewed:
+                return
+
+    def _complete(self, message_id: int, result: Any) -> None:
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "UPDATE outbox SET status = 'delivered', leased_until = NULL, result = ? WHERE id = ?",
+                    (json.dumps(result, default=str), message_id)
+                )
+
+    def _fail(self,
+              message: Dict[str, Any],
+              error: str,
+              payload: Optional[Dict[str, Any]] = None,
+              retry_after: Optional[float] = None,
+              attempted: bool = True) -> None:
+        """Schedule a retry or deferral, or dead-letter the message once it is out of attempts or too old to defer"""
+        payload_json = json.dumps(payload if payload is not None else message["payload"], default=str)
+        with self._lock:
+            with self._db:
+                if not attempted and time.time() - message["created_at"] < self.max_deferral_seconds:
+                    # Deferred rather than failed: give back the attempt the claim took
+                    self._db.execute(
+                        "UPDATE outbox SET status = 'pending', leased_until = NULL, attempts = attempts - 1, "
+                        "last_error = ?, payload = ?, available_at = ? WHERE id = ?",
+                        (error, payload_json, time.time() + (retry_after or self.backoff_seconds), message["id"])
+                    )
+                    return
+                if not attempted or message["attempts"] >= self.max_attempts:
+                    self._db.execute(
+                        "UPDATE outbox SET status = 'dead', leased_until = NULL, attempts = attempts - ?, "
+                        "last_error = ?, payload = ? WHERE id = ?",
+                        (0 if attempted else 1, error, payload_json, message["id"])
+                    )
+                    reason = (f"{message['attempts']} attempts" if attempted
+                              else f"being deferred for {self.max_deferral_seconds:g}s")
+                    self.logger.error(f"Outbox message {message['id']} dead-lettered after {reason}: {error}")
+                    return
+                delay = random.uniform(0, min(self.max_backoff_seconds,
+                                              self.backoff_seconds * 2 ** (message["attempts"] - 1)))
+                delay = max(delay, retry_after or 0.0)
+                self._db.execute(
+                    "UPDATE outbox SET status = 'pending', leased_until = NULL, last_error = ?, payload = ?, "
+                    "available_at = ? WHERE id = ?",
+                    (error, payload_json, time.time() + delay, message["id"])
+                )
+        self.logger.warning(f"Outbox message {message['id']} attempt {message['attempts']} failed ({error})")
+
+    def process_one(self, strict_only: bool = False) -> bool:
+        """
+        Claim and deliver one due message in the calling thread
+
+        Args:
+            strict_only: Only take messages of the scheduler's strict priorities
+
+        Returns:
+            True if a message was processed
+        """
+        message = self._claim(strict_only)
+        if message is None:
+            return False
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._renew_lease, args=(message, done), daemon=True,
+                                     name=f"outbox-lease-{message['id']}")
+        heartbeat.start()
+        try:
+            result = self.deliver(message["payload"])
+        except DeliveryFailed as e:
+            self._fail(message, str(e), e.payload, e.retry_after, e.attempted)
+        except Exception as e:
+            self._fail(message, f"{type(e).__name__}: {str(e)}")
+        else:
+            self._complete(message["id"], result)
+        finally:
+            done.set()
+        return True
+
+    def _work(self, strict_only: bool) -> None:
+        while not self._stopping:
+            try:
+                if self.process_one(strict_only):
+                    continue
+            except Exception as e:
+                self.logger.error(f"Outbox worker error: {str(e)}")
+            with self._wakeup:
+                if not self._stopping:
+                    self._wakeup.wait(self.poll_seconds)
+
+    def get(self, message_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Look up one message's delivery state
+
+        Args:
+            message_id: Id returned by enqueue
+
+        Returns:
+            Status, attempts, last error and delivery result, or None if unknown
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, attempts, last_error, result FROM outbox WHERE id = ?", (message_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": message_id, "status": row[0], "attempts": row[1], "last_error": row[2],
+                "result": json.loads(row[3]) if row[3] else None}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get outbox metrics
+
+        Returns:
+            Message counts by status, queue depth, pending messages per priority, age
+            of the oldest undelivered message and, with a scheduler, per-priority
+            queueing delays
+        """
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+            pending_by_priority = dict(self._db.execute(
+                "SELECT priority, COUNT(*) FROM outbox WHERE status = 'pending' GROUP BY priority"
+            ).fetchall())
+            oldest = self._db.execute(
+                "SELECT MIN(created_at) FROM outbox WHERE status IN ('pending', 'in_flight')"
+            ).fetchone()[0]
+
+        stats: Dict[str, Any] = {status: counts.get(status, 0)
+                                 for status in ("pending", "in_flight", "delivered", "dead")}
+        stats["queue_depth"] = stats["pending"] + stats["in_flight"]
+        stats["pending_by_priority"] = pending_by_priority
+        stats["oldest_message_age_seconds"] = time.time() - oldest if oldest is not None else 0.0
+        stats["workers"] = len(self._threads)
+        if self.scheduler is not None:
+            stats["queue_delay_ms"] = self.scheduler.get_stats()
+        return stats
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until nothing is pending or in flight
+
+        Args:
+            timeout: Give up after this many seconds (None waits forever)
+
+        Returns:
+            True if the outbox drained
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while self.get_stats()["queue_depth"]:
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the workers; undelivered messages stay in the outbox for the next start
+
+        Args:
+            wait: Join the worker threads
+        """
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def close(self) -> None:
+        """Stop the workers and close the database"""
+        self.shutdown()
+        with self._lock:
+            self._db.close()
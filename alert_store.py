@@ -0,0 +1,398 @@
+"""
+Persistent alert store for citizen reports
+
+Alerts live in a SQLite database in WAL mode, so readers never block the
+writer. IDs come from an AUTOINCREMENT key and are never reused, each alert
+records the spatial grid cell it falls in, and composite indexes ending in the
+id column let filtered listings walk an index in id order and paginate with
+an id cursor instead of OFFSET. Partial indexes cover the small active subset
+so active listings never wade through archived history, and the most recent
+active alerts are kept in an in-process hot cache so the common "everything
+currently active" view skips the database.
+"""
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    hazard_type TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    alert_level TEXT NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    location_name TEXT,
+    population_density TEXT,
+    description TEXT,
+    metadata TEXT,
+    status TEXT NOT NULL DEFAULT 'active',
+    grid_cell INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_hazard ON alerts (hazard_type, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_level ON alerts (alert_level, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_cell ON alerts (grid_cell, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts (timestamp);
+CREATE INDEX IF NOT EXISTS idx_active ON alerts (id) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_active_hazard ON alerts (hazard_type, id) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_active_level ON alerts (alert_level, id) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_active_cell ON alerts (grid_cell, id) WHERE status = 'active';
+"""
+
+STATUSES = ("active", "cleared", "expired")
+
+COLUMNS = ("id", "timestamp", "hazard_type", "confidence", "alert_level", "latitude", "longitude",
+           "location_name", "population_density", "description", "metadata", "status")
+
+# Bounding boxes covering more cells than this fall back to a coordinate range scan
+MAX_QUERY_CELLS = 400
+
+
+def _json_default(value: Any) -> Any:
+    """Make alert metadata JSON-serializable; raw bytes such as image_data are dropped"""
+    if isinstance(value, (bytes, bytearray)):
+        return None
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+class AlertStore:
+    """SQLite-backed alert store with monotonic IDs and an active-alert hot cache"""
+
+    def __init__(self,
+                 db_path: str = "data/alerts.sqlite3",
+                 grid_degrees: float = 0.1,
+                 max_hot_alerts: int = 10000):
+        """
+        Open (or create) the alert store
+
+        Args:
+            db_path: SQLite file (":memory:" for a throwaway store)
+            grid_degrees: Spatial grid cell size in degrees
+            max_hot_alerts: Most recent active alerts kept in memory
+        """
+        self.db_path = db_path
+        self.grid_degrees = grid_degrees
+        self.n_cols = int(math.ceil(360.0 / grid_degrees))
+        self.max_hot_alerts = max_hot_alerts
+        self.logger = logging.getLogger(__name__)
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+        self._lock = threading.Lock()
+
+        self._hot: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._active_count = 0
+        self._load_hot_cache()
+
+    def _load_hot_cache(self) -> None:
+        """Fill the hot cache with the most recent active alerts"""
+        rows = self._db.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM alerts WHERE status = 'active' ORDER BY id DESC LIMIT ?",
+            (self.max_hot_alerts,)
+        ).fetchall()
+        for row in reversed(rows):
+            record = self._from_row(row)
+            self._hot[record["id"]] = record
+        self._active_count = self._db.execute(
+            "SELECT COUNT(*) FROM alerts WHERE status = 'active'"
+        ).fetchone()[0]
+
+    def _hot_is_complete(self) -> bool:
+        """Whether every active alert is in the hot cache (caller holds lock)"""
+        return len(self._hot) == self._active_count
+
+    def grid_cell(self, latitude: float, longitude: float) -> int:
+        """Spatial grid cell id for a coordinate"""
+        row = int((latitude + 90.0) // self.grid_degrees)
+        col = int((longitude + 180.0) // self.grid_degrees) % self.n_cols
+        return row * self.n_cols + col
+
+    def _to_row(self, alert: Any) -> Tuple:
+        """Convert an Alert into an insert row (without the id)"""
+        location = alert.location
+        metadata = {key: value for key, value in alert.metadata.items() if key != "image_data"}
+        return (
+            alert.timestamp, alert.hazard_type, float(alert.confidence), alert.alert_level,
+            float(location.latitude), float(location.longitude), location.location_name,
+            location.population_density, alert.description,
+            json.dumps(metadata, default=_json_default), alert.status,
+            self.grid_cell(location.latitude, location.longitude),
+        )
+
+    @staticmethod
+    def _from_row(row: Tuple) -> Dict[str, Any]:
+        """Convert a selected row into the alert dictionary layout"""
+        values = dict(zip(COLUMNS, row))
+        return {
+            "id": values["id"],
+            "timestamp": values["timestamp"],
+            "hazard_type": values["hazard_type"],
+            "confidence": values["confidence"],
+            "alert_level": values["alert_level"],
+            "location": {
+                "latitude": values["latitude"],
+                "longitude": values["longitude"],
+                "location_name": values["location_name"],
+                "population_density": values["population_density"],
+            },
+            "description": values["description"],
+            "metadata": json.loads(values["metadata"]) if values["metadata"] else {},
+            "status": values["status"],
+        }
+
+    @staticmethod
+    def _copy(record: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a cached record so callers cannot modify the cache"""
+        return {**record, "location": dict(record["location"]), "metadata": dict(record["metadata"])}
+
+    def add(self, alert: Any) -> int:
+        """
+        Persist a new alert
+
+        Args:
+            alert: Alert instance (its id is ignored and assigned by the store)
+
+        Returns:
+            The new alert's id
+        """
+        return self.add_many([alert])[0]
+
+    def add_many(self, alerts: Iterable[Any]) -> List[int]:
+        """
+        Persist several alerts in a single transaction
+
+        Args:
+            alerts: Alert instances (ids are ignored and assigned by the store)
+
+        Returns:
+            The new alert ids, in input order
+        """
+        rows = [self._to_row(alert) for alert in alerts]
+        placeholders = ", ".join("?" * (len(COLUMNS) - 1)) + ", ?"
+        sql = f"INSERT INTO alerts ({', '.join(COLUMNS[1:])}, grid_cell) VALUES ({placeholders})"
+
+        ids = []
+        with self._lock:
+            with self._db:
+                for row in rows:
+                    ids.append(self._db.execute(sql, row).lastrowid)
+
+            for alert_id, row in zip(ids, rows):
+                if row[10] != "active":
+                    continue
+                self._active_count += 1
+                self._hot[alert_id] = self._from_row((alert_id,) + row[:11])
+                # Only the newest active alerts stay hot; older ones are served from SQLite
+                while len(self._hot) > self.max_hot_alerts:
+                    self._hot.popitem(last=False)
+
+        return ids
+
+    def get(self, alert_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Look up one alert by id
+
+        Args:
+            alert_id: Alert id
+
+        Returns:
+            Alert dictionary, or None if it does not exist
+        """
+        with self._lock:
+            record = self._hot.get(alert_id)
+            if record is not None:
+                return self._copy(record)
+            row = self._db.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM alerts WHERE id = ?", (alert_id,)
+            ).fetchone()
+        return self._from_row(row) if row else None
+
+    def update(self, alert: Any) -> bool:
+        """
+        Overwrite the confidence, level, description and metadata of a stored alert
+
+        Args:
+            alert: Alert instance carrying the id to update
+
+        Returns:
+            True if the alert exists, False otherwise
+        """
+        row = self._to_row(alert)
+        with self._lock:
+            with self._db:
+                updated = self._db.execute(
+                    "UPDATE alerts SET confidence = ?, alert_level = ?, description = ?, metadata = ? WHERE id = ?",
+                    (row[2], row[3], row[8], row[9], alert.id)
+                ).rowcount
+            cached = self._hot.get(alert.id)
+            if updated and cached is not None:
+                cached.update(confidence=row[2], alert_level=row[3], description=row[8],
+                              metadata=json.loads(row[9]))
+        return bool(updated)
+
+    def clear(self, alert_id: int, status: str = "cleared") -> bool:
+        """
+        Archive an active alert
+
+        Args:
+            alert_id: Alert id
+            status: Archived status to record ("cleared" or "expired")
+
+        Returns:
+            True if an active alert was cleared, False otherwise
+        """
+        if status not in STATUSES or status == "active":
+            raise ValueError(f"Invalid archive status: {status}")
+
+        with self._lock:
+            with self._db:
+                cleared = self._db.execute(
+                    "UPDATE alerts SET status = ? WHERE id = ? AND status = 'active'", (status, alert_id)
+                ).rowcount
+            if cleared:
+                self._active_count -= 1
+                self._hot.pop(alert_id, None)
+        return bool(cleared)
+
+    def clear_all(self) -> int:
+        """
+        Archive every active alert
+
+        Returns:
+            Number of alerts cleared
+        """
+        with self._lock:
+            with self._db:
+                cleared = self._db.execute(
+                    "UPDATE alerts SET status = 'cleared' WHERE status = 'active'"
+                ).rowcount
+            self._active_count = 0
+            self._hot.clear()
+        return cleared
+
+    def count_active(self) -> int:
+        """Number of active alerts"""
+        with self._lock:
+            return self._active_count
+
+    def _bbox_clause(self, bbox: Tuple[float, float, float, float]) -> Tuple[str, List[Any]]:
+        """SQL predicate for a (min_lat, min_lon, max_lat, max_lon) bounding box"""
+        min_lat, min_lon, max_lat, max_lon = bbox
+        clause = "latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?"
+        params: List[Any] = [min_lat, max_lat, min_lon, max_lon]
+
+        first_row = int((min_lat + 90.0) // self.grid_degrees)
+        last_row = int((max_lat + 90.0) // self.grid_degrees)
+        first_col = int((min_lon + 180.0) // self.grid_degrees)
+        last_col = int((max_lon + 180.0) // self.grid_degrees)
+        n_cells = (last_row - first_row + 1) * (last_col - first_col + 1)
+
+        # Small boxes probe the grid cell index; large ones scan by coordinates
+        if 0 < n_cells <= MAX_QUERY_CELLS:
+            cells = [row * self.n_cols + col % self.n_cols
+                     for row in range(first_row, last_row + 1)
+                     for col in range(first_col, last_col + 1)]
+            clause = f"grid_cell IN ({', '.join('?' * len(cells))}) AND " + clause
+            params = cells + params
+
+        return clause, params
+
+    def query(self,
+              status: Optional[str] = "active",
+              hazard_type: Optional[str] = None,
+              alert_level: Optional[str] = None,
+              bbox: Optional[Tuple[float, float, float, float]] = None,
+              since: Optional[str] = None,
+              until: Optional[str] = None,
+              cursor: Optional[int] = None,
+              limit: Optional[int] = None,
+              newest_first: bool = False) -> List[Dict[str, Any]]:
+        """
+        List alerts matching the given filters in id order
+
+        Args:
+            status: Alert status to match ("active", "cleared" or None for any)
+            hazard_type: Only alerts of this hazard type
+            alert_level: Only alerts at this level
+            bbox: Only alerts inside (min_lat, min_lon, max_lat, max_lon)
+            since: Only alerts with an ISO timestamp at or after this
+            until: Only alerts with an ISO timestamp before this
+            cursor: Id of the last alert of the previous page
+            limit: Maximum number of alerts to return (None for all)
+            newest_first: Return alerts in descending id order
+
+        Returns:
+            List of alert dictionaries
+        """
+        unfiltered = not any([hazard_type, alert_level, bbox, since, until])
+        with self._lock:
+            if status == "active" and unfiltered and self._hot_is_complete():
+                ids = reversed(self._hot) if newest_first else iter(self._hot)
+                page = []
+                for alert_id in ids:
+                    if cursor is not None and (alert_id >= cursor if newest_first else alert_id <= cursor):
+                        continue
+                    page.append(self._copy(self._hot[alert_id]))
+                    if limit is not None and len(page) >= limit:
+                        break
+                return page
+
+        clauses, params = [], []
+        if status is not None:
+            if status not in STATUSES:
+                raise ValueError(f"Unknown alert status: {status}")
+            # Inlined rather than bound so the planner can match the partial indexes
+            clauses.append(f"status = '{status}'")
+        if hazard_type is not None:
+            clauses.append("hazard_type = ?")
+            params.append(hazard_type)
+        if alert_level is not None:
+            clauses.append("alert_level = ?")
+            params.append(alert_level.upper())
+        if bbox is not None:
+            clause, bbox_params = self._bbox_clause(bbox)
+            clauses.append(clause)
+            params.extend(bbox_params)
+        # Filtered on the timestamp itself (idx_alerts_timestamp): caller-supplied
+        # timestamps need not follow id order (clock changes, several writers)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if cursor is not None:
+            clauses.append("id < ?" if newest_first else "id > ?")
+            params.append(cursor)
+
+        sql = f"SELECT {', '.join(COLUMNS)} FROM alerts"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id DESC" if newest_first else " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._db.close()
@@ -2,11 +2,13 @@ import pandas as pd #type: ignore
 import os
 import joblib #type: ignore
 import json
+import sys
 import matplotlib.pyplot as plt #type: ignore
 import seaborn as sns #type: ignore
 from sklearn.ensemble import RandomForestClassifier #type: ignore
 from sklearn.model_selection import train_test_split #type: ignore
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, classification_report, confusion_matrix #type: ignore
+from model_evaluation import CrossValidator, CLASSIFICATION_METRICS, update_metrics_file
 
 class AlgalBloomsModel:
 
@@ -37,12 +39,15 @@ class AlgalBloomsModel:
         self.data["Month"] = self.data["SAMPLE_DATE"].dt.month
         self.data["Year"] = self.data["SAMPLE_DATE"].dt.year
 
+    def build_model(self):
+        return RandomForestClassifier(n_estimators=300, class_weight="balanced", random_state=42)
+
     def train_model(self):
         features = ["LATITUDE", "LONGITUDE", "SALINITY", "WATER_TEMP", "WIND_SPEED", "Month"]
         X = self.data[features]
         y = self.data["Bloom"]
 
-        self.model = RandomForestClassifier(n_estimators=300, class_weight="balanced", random_state=42)
+        self.model = self.build_model()
 
         # Train-test split
         X_train, X_test, y_train, y_test = train_test_split(
@@ -79,6 +84,19 @@ class AlgalBloomsModel:
 
         print("✅ Training done. Artifacts saved in /artifacts/algal_blooms folder.")
 
+    def cross_validate_model(self, n_splits=5, n_jobs=-1):
+        features = ["LATITUDE", "LONGITUDE", "SALINITY", "WATER_TEMP", "WIND_SPEED", "Month"]
+        X = self.data[features]
+        y = self.data["Bloom"]
+
+        # Folds are fitted in parallel and cached under artifacts/algal_blooms/cv_cache
+        validator = CrossValidator(self.build_model(), "artifacts/algal_blooms/cv_cache", n_splits=n_splits, n_jobs=n_jobs)
+        results = validator.evaluate(X, y, CLASSIFICATION_METRICS)
+        update_metrics_file("artifacts/algal_blooms/metrics.json", "cross_validation", results)
+
+        print(f"✅ {n_splits}-fold CV done ({results['folds_refit']} refit, {results['folds_cached']} cached).")
+        return results
+
     def save_model(self, path="models/algal_bloom_rf.pkl"):
         os.makedirs("models", exist_ok=True)
         if self.model is not None:
@@ -88,6 +106,9 @@ class AlgalBloomsModel:
 
 def main():
     algal_bloom_model = AlgalBloomsModel("data/algal_bloom.csv")
+    if "--cv" in sys.argv:
+        algal_bloom_model.cross_validate_model()
+        return
     algal_bloom_model.train_model()
     algal_bloom_model.save_model("models/algal_bloom_rf.pkl")
 
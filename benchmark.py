@@ -0,0 +1,926 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the Coastal Hazard Detection System
+
+Run all benchmarks with: python benchmark.py
+Run a single benchmark with: python benchmark.py <name>
+"""
+
+import sys
+import time
+
+import numpy as np #type: ignore
+
+
+def print_header(title):
+    """Print a formatted header"""
+    print("\n" + "=" * 60)
+    print(f"⏱️ {title}")
+    print("=" * 60)
+
+
+def _legacy_extract_features(img_array):
+    """Reference copy of the original multi-pass feature extraction"""
+    features = {}
+
+    gray = np.mean(img_array, axis=2)
+    sar = [np.mean(gray), np.std(gray), np.var(gray), np.max(gray), np.min(gray)]
+    for i in range(5):
+        for j in range(5):
+            sar.append(np.mean(gray[i*44:(i+1)*44, j*44:(j+1)*44]))
+    while len(sar) < 48:
+        sar.append(np.random.random())
+    features['oil_spill'] = np.array(sar).reshape(1, -1)
+
+    color = []
+    for channel in range(3):
+        color.extend([
+            np.mean(img_array[:, :, channel]),
+            np.std(img_array[:, :, channel]),
+            np.var(img_array[:, :, channel])
+        ])
+    color.extend([np.mean(img_array), np.std(img_array), np.var(img_array)])
+    features['algal_bloom'] = np.array(color).reshape(1, -1)
+
+    gray = np.mean(img_array, axis=2)
+    erosion = [np.mean(gray), np.std(gray), np.var(gray),
+               np.mean(np.abs(np.diff(gray, axis=0))),
+               np.mean(np.abs(np.diff(gray, axis=1)))]
+    while len(erosion) < 6:
+        erosion.append(np.random.random())
+    features['coastal_erosion'] = np.array(erosion).reshape(1, -1)
+
+    return features
+
+
+def benchmark_feature_extraction(iterations=500):
+    """Images per second for the legacy and single-pass feature extractors"""
+    from image_features import ImageFeatureExtractor, IMAGE_SIZE
+
+    print_header("Image feature extraction (224x224)")
+
+    rng = np.random.default_rng(42)
+    pixels = rng.integers(0, 256, size=(IMAGE_SIZE, IMAGE_SIZE, 3), dtype=np.uint8)
+    extractor = ImageFeatureExtractor()
+
+    # Deterministic columns must agree between implementations
+    legacy = _legacy_extract_features(pixels / 255.0)
+    current = extractor.extract(pixels)
+    checks = {'oil_spill': 30, 'algal_bloom': 12, 'coastal_erosion': 5}
+    for hazard_type, n in checks.items():
+        assert np.allclose(legacy[hazard_type][0, :n], current[hazard_type][0, :n], atol=1e-5), hazard_type
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        _legacy_extract_features(pixels / 255.0)
+    legacy_rate = iterations / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        extractor.extract(pixels)
+    current_rate = iterations / (time.perf_counter() - start)
+
+    print(f"Legacy extractor:      {legacy_rate:8.1f} images/s")
+    print(f"Single-pass extractor: {current_rate:8.1f} images/s")
+    print(f"Speedup:               {current_rate / legacy_rate:8.2f}x")
+
+
+def _legacy_decode(image_data):
+    """Reference copy of the original full-resolution decode path"""
+    import io
+    from PIL import Image #type: ignore
+
+    image = Image.open(io.BytesIO(image_data))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return np.asarray(image.resize((224, 224)))
+
+
+def _decode_worker(path, use_legacy, iterations, queue):
+    """Decode one sample in a fresh process and report time and peak RSS growth"""
+    import resource
+    from image_features import decode_image
+
+    with open(path, 'rb') as f:
+        image_data = f.read()
+    decode = _legacy_decode if use_legacy else decode_image
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    for _ in range(iterations):
+        decode(image_data)
+    elapsed = (time.perf_counter() - start) / iterations
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+
+    queue.put((elapsed, peak))
+
+
+def _write_decode_samples(tmp_dir):
+    """Write large sample photos (run in a child so the parent's peak RSS stays small)"""
+    import os
+    from PIL import Image #type: ignore
+
+    rng = np.random.default_rng(7)
+
+    # Smooth gradients plus noise compress like real photos
+    y, x = np.mgrid[0:3000, 0:4000]
+    base = np.stack([x % 256, y % 256, (x + y) % 256], axis=2).astype(np.uint8)
+    photo = Image.fromarray(np.clip(base + rng.integers(0, 24, base.shape), 0, 255).astype(np.uint8))
+    for name, fmt in [("photo_4000x3000.jpg", "JPEG"), ("photo_4000x3000.png", "PNG")]:
+        photo.save(os.path.join(tmp_dir, name), fmt)
+
+
+def benchmark_decode(iterations=5):
+    """Decode time and peak memory per upload for large phone-sized photos"""
+    import multiprocessing
+    import os
+    import tempfile
+
+    print_header("Upload decoding (12 MP samples)")
+
+    # ru_maxrss survives exec, so samples are generated and decoded in children
+    ctx = multiprocessing.get_context("spawn")
+    tmp_dir = tempfile.mkdtemp()
+    writer = ctx.Process(target=_write_decode_samples, args=(tmp_dir,))
+    writer.start()
+    writer.join()
+    samples = {name: os.path.join(tmp_dir, name) for name in sorted(os.listdir(tmp_dir))}
+
+    print(f"{'sample':<22} {'decoder':<8} {'ms/upload':>10} {'peak MB':>9}")
+    for name, path in samples.items():
+        for label, use_legacy in [("legacy", True), ("draft", False)]:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_decode_worker, args=(path, use_legacy, iterations, queue))
+            proc.start()
+            elapsed, peak = queue.get()
+            proc.join()
+            print(f"{name:<22} {label:<8} {elapsed * 1000:10.1f} {peak / 1024:9.1f}")
+
+    for path in samples.values():
+        os.unlink(path)
+    os.rmdir(tmp_dir)
+
+
+def benchmark_alert_store(n_alerts=1_000_000, page_size=50, iterations=200):
+    """Filtered, cursor-paginated alert queries over a large alert history"""
+    import os
+    import random
+    import tempfile
+    from alert_store import AlertStore
+    from citizen_reporting import Alert, LocationData
+
+    print_header(f"Alert store queries ({n_alerts:,} historical alerts)")
+
+    tmp_dir = tempfile.mkdtemp()
+    store = AlertStore(os.path.join(tmp_dir, "alerts.sqlite3"))
+    rng = random.Random(3)
+    hazards = ["oil_spill", "algal_bloom", "coastal_erosion", "none"]
+    levels = ["GREEN", "YELLOW", "ORANGE", "RED"]
+
+    start = time.perf_counter()
+    for offset in range(0, n_alerts, 50_000):
+        batch = []
+        for i in range(offset, min(offset + 50_000, n_alerts)):
+            batch.append(Alert(
+                id=0, timestamp=f"2025-{1 + i * 12 // n_alerts:02d}-01T00:00:{i % 60:02d}",
+                hazard_type=rng.choice(hazards), confidence=rng.random(), alert_level=rng.choice(levels),
+                location=LocationData(latitude=rng.uniform(8, 38), longitude=rng.uniform(-123, 89),
+                                      location_name="bench"),
+                description="", metadata={},
+                status="active" if rng.random() < 0.01 else "cleared"
+            ))
+        store.add_many(batch)
+    print(f"Loaded in {time.perf_counter() - start:.1f} s, {store.count_active():,} active")
+
+    queries = {
+        "active, first page": dict(),
+        "active, hazard + level": dict(hazard_type="oil_spill", alert_level="RED"),
+        "history, hazard, newest first": dict(status=None, hazard_type="algal_bloom", newest_first=True),
+        "history, 1 deg bbox": dict(status=None, bbox=(20.0, 70.0, 21.0, 71.0)),
+        "history, month range": dict(status=None, since="2025-06-01", until="2025-07-01"),
+    }
+    print(f"{'query':<32} {'first page ms':>14} {'next pages ms':>14}")
+    for name, filters in queries.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            page = store.query(limit=page_size, **filters)
+        first_ms = (time.perf_counter() - start) / iterations * 1000
+
+        # Walk forward with the id cursor; no OFFSET scan as pages get deeper
+        pages, start = 0, time.perf_counter()
+        while page and pages < iterations:
+            page = store.query(limit=page_size, cursor=page[-1]["id"], **filters)
+            pages += 1
+        next_ms = (time.perf_counter() - start) / max(pages, 1) * 1000
+        print(f"{name:<32} {first_ms:14.3f} {next_ms:14.3f}  ({pages} pages)")
+
+    store.close()
+    for name in os.listdir(tmp_dir):
+        os.unlink(os.path.join(tmp_dir, name))
+    os.rmdir(tmp_dir)
+
+
+def benchmark_incident_clustering(n_reports=20000):
+    """Alert fan-out for a synthetic burst of reports around a few real incidents"""
+    import random
+    from citizen_reporting import AlertLevels
+    from incident_clustering import IncidentClusterer
+
+    print_header(f"Incident clustering ({n_reports:,}-report burst)")
+
+    rng = random.Random(11)
+    spills = [(37.80, -122.45, "oil_spill"), (37.70, -122.50, "oil_spill"), (36.95, -122.02, "algal_bloom")]
+    reports = []
+    for i in range(n_reports):
+        t = i * 0.1  # One report every 100 ms
+        if rng.random() < 0.99:
+            lat, lon, hazard_type = rng.choice(spills)
+            # Photos taken from anywhere within a few hundred metres of the slick
+            reports.append((hazard_type, rng.gauss(lat, 0.002), rng.gauss(lon, 0.002), rng.uniform(0.3, 0.95), t))
+        else:
+            reports.append((rng.choice(["oil_spill", "algal_bloom", "coastal_erosion"]),
+                            rng.uniform(32, 38), rng.uniform(-123, -117), rng.uniform(0.3, 0.95), t))
+
+    clusterer = IncidentClusterer()
+    levels = {}
+    dispatches = 0
+    start = time.perf_counter()
+    for hazard_type, lat, lon, confidence, t in reports:
+        incident, created = clusterer.observe(hazard_type, lat, lon, confidence, timestamp=t)
+        level = AlertLevels.get_level(AlertLevels.from_confidence(hazard_type, incident.confidence))["level"]
+        if created or level > levels[incident.incident_id]:
+            dispatches += 1
+            levels[incident.incident_id] = level
+    elapsed = time.perf_counter() - start
+
+    stats = clusterer.get_stats()
+    print(f"Reports:               {n_reports:8,}")
+    print(f"Incidents:             {stats['incidents']:8,}")
+    print(f"Alert dispatches:      {dispatches:8,}  (was {n_reports:,}, one per report)")
+    print(f"Fan-out reduction:     {n_reports / dispatches:8.1f}x")
+    print(f"Clustering cost:       {elapsed / n_reports * 1e6:8.2f} us/report")
+
+
+def benchmark_alert_images(n_alerts=10_000, image_bytes=32 * 1024, iterations=5):
+    """Memory held by alerts and get_active_alerts latency with inline bytes vs blob references"""
+    import os
+    import shutil
+    import tempfile
+    import tracemalloc
+    from dataclasses import asdict
+    from alert_store import AlertStore
+    from blob_store import ImageBlobStore
+    from citizen_reporting import Alert, LocationData
+
+    print_header(f"Alert images ({n_alerts:,} alerts, {image_bytes // 1024} KB uploads)")
+
+    rng = np.random.default_rng(5)
+    uploads = [rng.bytes(image_bytes) for _ in range(n_alerts)]
+
+    def make_alert(i, metadata):
+        return Alert(id=i + 1, timestamp="2025-08-30T12:00:00", hazard_type="oil_spill", confidence=0.9,
+                     alert_level="RED", location=LocationData(37.77, -122.42, "Bench Bay"),
+                     description="", metadata=metadata)
+
+    # Legacy: raw bytes inside every alert, asdict-copied on every listing
+    tracemalloc.start()
+    legacy_alerts = [make_alert(i, {"image_data": bytes(bytearray(upload))}) for i, upload in enumerate(uploads)]
+    legacy_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        [asdict(alert) for alert in legacy_alerts]
+    legacy_ms = (time.perf_counter() - start) / iterations * 1000
+    del legacy_alerts
+
+    # Blob store: images on disk, alerts keep a reference
+    tmp_dir = tempfile.mkdtemp()
+    image_store = ImageBlobStore(os.path.join(tmp_dir, "images"))
+    references = [image_store.put(upload) for upload in uploads]
+    del uploads
+
+    tracemalloc.start()
+    store = AlertStore(os.path.join(tmp_dir, "alerts.sqlite3"), max_hot_alerts=n_alerts)
+    store.add_many(make_alert(i, {"image": reference}) for i, reference in enumerate(references))
+    store_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        store.query()
+    store_ms = (time.perf_counter() - start) / iterations * 1000
+
+    image_id = references[0]["image_id"]
+    start = time.perf_counter()
+    streamed = sum(len(chunk) for chunk in image_store.iter_chunks(image_id))
+    stream_ms = (time.perf_counter() - start) * 1000
+    assert streamed == image_bytes
+
+    print(f"{'':<22} {'alert memory MB':>16} {'list ms':>9}")
+    print(f"{'inline bytes':<22} {legacy_memory / 2**20:16.1f} {legacy_ms:9.1f}")
+    print(f"{'blob references':<22} {store_memory / 2**20:16.1f} {store_ms:9.1f}")
+    print(f"Streaming one image from disk: {stream_ms:.2f} ms")
+
+    store.close()
+    shutil.rmtree(tmp_dir)
+
+
+def _tile_models():
+    """Small stand-in forests with the production feature widths"""
+    from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+    rng = np.random.default_rng(7)
+    models = {}
+    for hazard_type, width in [("oil_spill", 48), ("algal_bloom", 12)]:
+        model = RandomForestClassifier(n_estimators=50, random_state=0)
+        model.fit(rng.random((200, width)), np.tile([0, 1], 100))
+        models[hazard_type] = model
+    regressor = RandomForestRegressor(n_estimators=50, random_state=0)
+    regressor.fit(rng.random((200, 6)), rng.random(200))
+    models["coastal_erosion"] = regressor
+    return models
+
+
+def benchmark_tiled_analysis(side=4096, iterations=1):
+    """Megapixels per second for tiled analysis of a large aerial image"""
+    import io
+    import os
+    from PIL import Image #type: ignore
+    from citizen_reporting import HazardDetectionService
+    from image_features import IMAGE_SIZE, extract_image_features, tile_origins
+
+    print_header(f"Tiled analysis ({side}x{side}, {IMAGE_SIZE} px tiles, 25% overlap)")
+
+    rng = np.random.default_rng(3)
+    coarse = rng.integers(0, 256, (side // 64, side // 64, 3), dtype=np.uint8)
+    image = Image.fromarray(coarse).resize((side, side), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    image_data = buffer.getvalue()
+    models = _tile_models()
+
+    # Legacy: crop every tile, re-encode it and score it with its own model calls
+    legacy = HazardDetectionService(max_workers=1, verdict_cache_size=0)
+    legacy.models = models
+    stride = int(IMAGE_SIZE * 0.75)
+    start = time.perf_counter()
+    origins = [(x, y) for y in tile_origins(side, IMAGE_SIZE, stride) for x in tile_origins(side, IMAGE_SIZE, stride)]
+    decoded = Image.open(io.BytesIO(image_data)).convert("RGB")
+    for x, y in origins:
+        tile = io.BytesIO()
+        decoded.crop((x, y, x + IMAGE_SIZE, y + IMAGE_SIZE)).save(tile, "PNG")
+        legacy._score_features(extract_image_features(tile.getvalue()))
+    legacy_elapsed = time.perf_counter() - start
+    megapixels = side * side / 1e6
+
+    print(f"{'mode':<28} {'tiles':>6} {'seconds':>8} {'MP/s':>7}")
+    print(f"{'per-tile crop + score':<28} {len(origins):6d} {legacy_elapsed:8.2f} {megapixels / legacy_elapsed:7.2f}")
+
+    for workers in sorted({1, os.cpu_count() or 1}):
+        detector = HazardDetectionService(max_workers=workers, verdict_cache_size=0)
+        detector.models = models
+        detector.detect_hazards_tiled(image_data)  # warm up the pool
+        best = None
+        for _ in range(iterations):
+            result = detector.detect_hazards_tiled(image_data)
+            best = result if best is None or result["elapsed_seconds"] < best["elapsed_seconds"] else best
+        detector.shutdown()
+        label = f"tiled, {workers} worker(s)"
+        print(f"{label:<28} {best['tiles']:6d} {best['elapsed_seconds']:8.2f} {best['megapixels_per_second']:7.2f}")
+
+
+def benchmark_sar_scan(width=4096, heights=(4096, 16384)):
+    """Throughput and peak memory of the streaming SAR scene scanner as scenes grow"""
+    import os
+    import shutil
+    import tempfile
+    import tracemalloc
+    from sar_scanner import SARSceneScanner, open_scene
+
+    print_header(f"SAR scene scanning ({width} px wide, float32 .npy)")
+
+    model = _tile_models()["oil_spill"]
+    scanner = SARSceneScanner(lambda rows: model.predict_proba(rows)[:, 1])
+    tmp_dir = tempfile.mkdtemp()
+
+    print(f"{'scene':<14} {'file MB':>8} {'windows':>9} {'MP/s':>7} {'peak MB':>8}")
+    for height in heights:
+        path = os.path.join(tmp_dir, f"scene_{height}.npy")
+        scene = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(height, width))
+        rng = np.random.default_rng(height)
+        for start in range(0, height, 1024):
+            scene[start:start + 1024] = rng.random((min(1024, height - start), width), dtype=np.float32)
+        scene.flush()
+        del scene
+
+        mapped = open_scene(path)
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = scanner.scan_scene(mapped)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        megapixels = height * width / 1e6
+        label = f"{height}x{width}"
+        print(f"{label:<14} {os.path.getsize(path) / 2**20:8.0f} {result['windows']:9,d} "
+              f"{megapixels / elapsed:7.1f} {peak / 2**20:8.1f}")
+        del mapped, result
+
+    shutil.rmtree(tmp_dir)
+
+
+def _labeled_uploads(n, seed):
+    """Synthetic labeled uploads: hazard scenes plus selfies and indoor shots"""
+    import io
+    from PIL import Image, ImageDraw #type: ignore
+
+    rng = np.random.default_rng(seed)
+    kinds = ["oil_spill", "algal_bloom", "selfie", "indoor"]
+    samples = []
+    for i in range(n):
+        kind = kinds[i % len(kinds)]
+        noise = rng.normal(0, 12, (224, 224, 3))
+        if kind == "oil_spill":
+            base = np.full((224, 224, 3), rng.uniform(110, 150)) + noise
+        elif kind == "algal_bloom":
+            base = np.array([rng.uniform(20, 60), rng.uniform(140, 200), rng.uniform(60, 100)]) + noise
+        elif kind == "selfie":
+            base = np.array([rng.uniform(150, 230), rng.uniform(120, 180), rng.uniform(90, 150)]) + noise
+        else:
+            base = rng.uniform(40, 220, 3) + noise
+        image = Image.fromarray(np.clip(base, 0, 255).astype(np.uint8))
+        draw = ImageDraw.Draw(image)
+        x, y = rng.integers(20, 120, 2)
+        if kind == "oil_spill":
+            draw.ellipse([x, y, x + 90, y + 60], fill=(15, 15, 20))
+        elif kind == "selfie":
+            draw.ellipse([x, y, x + 80, y + 100], fill=(224, 172, 140))
+        elif kind == "indoor":
+            draw.rectangle([x, y, x + 70, y + 90], fill=tuple(int(c) for c in rng.integers(0, 255, 3)))
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=85)
+        samples.append((buffer.getvalue(), kind))
+    return samples
+
+
+def benchmark_prefilter_cascade(n_train=400, n_test=400):
+    """Short-circuit rate, latency distribution and verdict agreement of the pre-filter cascade"""
+    from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+    from citizen_reporting import HazardDetectionService
+    from image_features import extract_image_features
+
+    print_header(f"Pre-filter cascade ({n_test} labeled uploads, 300-tree forests)")
+
+    train = _labeled_uploads(n_train, seed=11)
+    rows = [extract_image_features(image_data) for image_data, _ in train]
+    labels = [kind for _, kind in train]
+    rng = np.random.default_rng(12)
+
+    models = {}
+    for hazard_type in ["oil_spill", "algal_bloom"]:
+        model = RandomForestClassifier(n_estimators=300, random_state=0)
+        model.fit(np.vstack([row[hazard_type] for row in rows]), [int(kind == hazard_type) for kind in labels])
+        models[hazard_type] = model
+    erosion = RandomForestRegressor(n_estimators=300, random_state=0)
+    erosion.fit(np.vstack([row["coastal_erosion"] for row in rows]),
+                [rng.uniform(0.0, 0.4) if kind in models else 0.0 for kind in labels])
+    models["coastal_erosion"] = erosion
+
+    test = _labeled_uploads(n_test, seed=13)
+    verdicts = {}
+    print(f"{'mode':<12} {'short-circuit':>13} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'hazard recall':>14}")
+    for label, trees in [("full", 0), ("cascade", 10)]:
+        detector = HazardDetectionService(max_workers=1, verdict_cache_size=0, prefilter_trees=trees)
+        detector.models = models
+        latencies = []
+        results = []
+        for image_data, _ in test:
+            start = time.perf_counter()
+            results.append(detector.detect_hazards(image_data))
+            latencies.append(time.perf_counter() - start)
+        verdicts[label] = [hazard_type for hazard_type, _, _ in results]
+
+        hazards = [i for i, (_, kind) in enumerate(test) if kind in models]
+        recall = sum(verdicts[label][i] == test[i][1] for i in hazards) / len(hazards)
+        fraction = detector.get_prefilter_stats().get("short_circuit_fraction", 0.0)
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        print(f"{label:<12} {fraction:13.1%} {p50:8.1f} {p95:8.1f} {p99:8.1f} {recall:14.1%}")
+
+    for outcome, latency in detector.get_prefilter_stats()["latency_ms"].items():
+        print(f"  cascade {outcome:<16} n={latency['count']:<4} p50 {latency['p50']:6.1f} ms  p95 {latency['p95']:6.1f} ms")
+
+    agreement = np.mean([a == b for a, b in zip(verdicts["full"], verdicts["cascade"])])
+    print(f"Verdict agreement with full models: {agreement:.1%}")
+
+
+def benchmark_alert_dispatch(iterations=5):
+    """Channel fan-out latency of send_alert, sequential vs concurrent"""
+    from multi_channel_alerts import AlertChannel, DISPATCH_KEY, MultiChannelAlertService
+
+    # Typical blocking times: SMTP login + send, Twilio SMS, Twilio call, webhook POST
+    delays = {"email": 0.40, "sms": 0.15, "ivr": 0.30, "webhook": 0.10}
+
+    class FakeChannel:
+        def __init__(self, seconds):
+            self.seconds = seconds
+
+        def send_alert(self, alert_message):
+            time.sleep(self.seconds)
+            return True
+
+    print_header(f"Alert channel fan-out ({len(delays)} channels, sum {sum(delays.values()):.2f} s)")
+    print(f"{'dispatch':<12} {'total ms':>9}  per-channel ms")
+    for label, workers in [("sequential", 1), ("concurrent", 8)]:
+        service = MultiChannelAlertService(max_dispatch_workers=workers, use_outbox=False)
+        service.channels = {name: AlertChannel(name, True, ["RED"], {}) for name in delays}
+        service.channel_implementations = {name: FakeChannel(seconds) for name, seconds in delays.items()}
+
+        totals = []
+        for _ in range(iterations):
+            results = service.send_alert("RED", "oil_spill", "Bench Bay", "", 0.9)
+            totals.append(results.pop(DISPATCH_KEY)["latency_ms"])
+        service.shutdown()
+        per_channel = ", ".join(f"{name} {result['latency_ms']:.0f}" for name, result in results.items())
+        print(f"{label:<12} {np.median(totals):9.0f}  {per_channel}")
+
+
+def benchmark_smtp_pool(handshake_seconds=0.15, auth_seconds=0.15, n_legacy=10, n_pooled=200):
+    """Alert emails per second with a login per message vs pooled SMTP sessions"""
+    import smtplib
+    from fake_servers import LocalSMTPServer
+    from multi_channel_alerts import AlertMessage, EmailAlertChannel
+
+    print_header(f"SMTP sessions (local stand-in, {handshake_seconds + auth_seconds:.2f} s setup per session)")
+
+    alert = AlertMessage(subject="RED ALERT: Oil Spill Detected", body="<p>Benchmark</p>")
+    config = {"smtp_port": 0, "username": "alerts", "password": "secret", "from_email": "alerts@example.com",
+              "recipients": ["ops@example.com"], "use_tls": False}
+
+    print(f"{'mode':<22} {'messages':>9} {'msg/s':>8} {'sessions':>9}")
+    with LocalSMTPServer(connect_delay=handshake_seconds, auth_delay=auth_seconds) as server:
+        # Legacy: connect and log in for every message
+        start = time.perf_counter()
+        for _ in range(n_legacy):
+            with smtplib.SMTP("127.0.0.1", server.port) as session:
+                session.login(config["username"], config["password"])
+                session.sendmail(config["from_email"], config["recipients"], "Subject: alert\r\n\r\nbody")
+        elapsed = time.perf_counter() - start
+        print(f"{'login per message':<22} {n_legacy:9d} {n_legacy / elapsed:8.1f} {server.stats['connections']:9d}")
+
+        opened = server.stats["connections"]
+        channel = EmailAlertChannel(dict(config, smtp_server="127.0.0.1", smtp_port=server.port))
+        start = time.perf_counter()
+        sent = sum(channel.send_alert(alert) for _ in range(n_pooled))
+        elapsed = time.perf_counter() - start
+        sessions = server.stats["connections"] - opened
+        print(f"{'pooled sessions':<22} {sent:9d} {sent / elapsed:8.1f} {sessions:9d}")
+        channel.close()
+
+
+def benchmark_sms_delivery(n_recipients=200, latency=0.05, concurrency=20):
+    """SMS fan-out time to a recipient list: serial loop vs concurrent delivery"""
+    from twilio.rest import Client #type: ignore
+    from fake_servers import LocalTwilioServer
+    from multi_channel_alerts import AlertMessage, SMSAlertChannel
+
+    print_header(f"SMS delivery ({n_recipients} recipients, {latency * 1000:.0f} ms per API call)")
+
+    recipients = [f"+1555{i:07d}" for i in range(n_recipients)]
+    message = AlertMessage(subject="RED ALERT: Oil Spill Detected", body="")
+
+    print(f"{'mode':<26} {'seconds':>8} {'msg/s':>8}")
+    with LocalTwilioServer(latency=latency) as server:
+        # Legacy: a new client per alert and one recipient at a time
+        start = time.perf_counter()
+        client = Client(server.account_sid, server.auth_token)
+        client.api.base_url = server.base_url
+        for recipient in recipients:
+            client.messages.create(body=message.subject, from_="+15550001111", to=recipient)
+        elapsed = time.perf_counter() - start
+        print(f"{'serial':<26} {elapsed:8.2f} {n_recipients / elapsed:8.1f}")
+
+        channel = SMSAlertChannel({"account_sid": server.account_sid, "auth_token": server.auth_token,
+                                   "from_number": "+15550001111", "recipients": recipients,
+                                   "api_base_url": server.base_url, "max_concurrency": concurrency})
+        report = channel.deliver(message)
+        elapsed = report["elapsed_ms"] / 1000
+        label = f"concurrent ({concurrency} in flight)"
+        print(f"{label:<26} {elapsed:8.2f} {report['delivered'] / elapsed:8.1f}")
+        channel.close()
+
+
+def benchmark_webhooks(n_alerts=20, n_endpoints=3, latency=0.05):
+    """Webhook alert delivery: fresh connection per post vs pooled parallel endpoints"""
+    import requests #type: ignore
+    from fake_servers import LocalWebhookServer
+    from multi_channel_alerts import AlertMessage, WebhookAlertChannel
+
+    print_header(f"Webhook delivery ({n_alerts} alerts x {n_endpoints} endpoints, {latency * 1000:.0f} ms each)")
+
+    message = AlertMessage(subject="RED ALERT: Oil Spill Detected", body="", metadata={})
+    print(f"{'mode':<28} {'ms/alert':>9}")
+    with LocalWebhookServer(latency=latency) as server:
+        urls = [f"{server.base_url}/endpoint{i}" for i in range(n_endpoints)]
+
+        start = time.perf_counter()
+        for _ in range(n_alerts):
+            for url in urls:
+                requests.post(url, json={"subject": message.subject}, timeout=30)
+        legacy_ms = (time.perf_counter() - start) / n_alerts * 1000
+        print(f"{'sequential requests.post':<28} {legacy_ms:9.1f}")
+
+        channel = WebhookAlertChannel({"urls": urls})
+        start = time.perf_counter()
+        for _ in range(n_alerts):
+            channel.deliver(message)
+        pooled_ms = (time.perf_counter() - start) / n_alerts * 1000
+        print(f"{'pooled session, parallel':<28} {pooled_ms:9.1f}")
+        channel.close()
+
+
+def benchmark_alert_outbox(n_alerts=200, channel_seconds=0.05):
+    """send_alert latency inline vs queued in the durable outbox, and outbox drain time"""
+    import os
+    import tempfile
+    from multi_channel_alerts import AlertChannel, DISPATCH_KEY, MultiChannelAlertService
+
+    class FakeChannel:
+        def send_alert(self, alert_message):
+            time.sleep(channel_seconds)
+            return True
+
+    print_header(f"Alert outbox ({n_alerts} alerts, {channel_seconds * 1000:.0f} ms channel send)")
+    print(f"{'send_alert':<10} {'p50 ms':>8} {'p99 ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, use_outbox in [("inline", False), ("outbox", True)]:
+            service = MultiChannelAlertService(use_outbox=use_outbox, outbox_path=os.path.join(tmp, "outbox.sqlite3"),
+                                               outbox_workers=4)
+            service.channels = {name: AlertChannel(name, True, ["RED"], {}) for name in ["email", "sms"]}
+            service.channel_implementations = {name: FakeChannel() for name in service.channels}
+
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(n_alerts if use_outbox else n_alerts // 10):
+                results = service.send_alert("RED", "oil_spill", "Bench Bay", "", 0.9)
+                latencies.append(results[DISPATCH_KEY]["latency_ms"])
+            print(f"{label:<10} {np.percentile(latencies, 50):8.3f} {np.percentile(latencies, 99):8.3f}")
+
+            if use_outbox:
+                depth = service.get_outbox_stats()
+                service.outbox.drain()
+                print(f"Queue depth after enqueue {depth['queue_depth']} (oldest "
+                      f"{depth['oldest_message_age_seconds']:.2f} s); drained by 4 workers in "
+                      f"{time.perf_counter() - start:.2f} s")
+            service.shutdown()
+
+
+def benchmark_alert_coalescing(n_reports=200, n_incidents=5, window_seconds=0.5):
+    """Provider calls for a burst of reports, one message per report vs coalesced digests"""
+    from multi_channel_alerts import AlertChannel, MultiChannelAlertService
+
+    class CountingChannel:
+        calls = 0
+
+        def send_alert(self, alert_message):
+            self.calls += 1
+            return True
+
+    print_header(f"Alert coalescing ({n_reports} YELLOW/ORANGE reports about {n_incidents} incidents)")
+    print(f"{'mode':<12} {'provider calls':>15}")
+    rng = np.random.default_rng(0)
+    for label, window in [("per report", None), ("coalesced", window_seconds)]:
+        service = MultiChannelAlertService(use_outbox=False)
+        service.channels = {name: AlertChannel(name, True, ["YELLOW", "ORANGE", "RED"], {},
+                                               coalesce_window_seconds=window)
+                            for name in ["email", "sms", "ivr"]}
+        service.channel_implementations = {name: CountingChannel() for name in service.channels}
+
+        for _ in range(n_reports):
+            incident = int(rng.integers(n_incidents))
+            service.send_alert(["YELLOW", "ORANGE"][incident % 2], "oil_spill", f"Beach {incident}", "", 0.6)
+        service.shutdown()
+        calls = sum(channel.calls for channel in service.channel_implementations.values())
+        print(f"{label:<12} {calls:15d}")
+
+
+def benchmark_circuit_breaker(n_alerts=20, deadline_seconds=0.5):
+    """send_alert latency while the email channel hangs until its deadline, with and without a breaker"""
+    from multi_channel_alerts import AlertChannel, DISPATCH_KEY, MultiChannelAlertService
+
+    class HungChannel:
+        def send_alert(self, alert_message):
+            time.sleep(deadline_seconds * 2)
+            return False
+
+    class FastChannel:
+        def send_alert(self, alert_message):
+            time.sleep(0.02)
+            return True
+
+    print_header(f"Circuit breaker ({n_alerts} alerts, email down, {deadline_seconds:.1f} s deadline)")
+    print(f"{'breaker':<10} {'total s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, settings in [("none", {"min_calls": n_alerts + 1}), ("default", None)]:
+        # Overdue sends are not capped here, so only the breaker stops the waiting
+        service = MultiChannelAlertService(max_dispatch_workers=32, use_outbox=False, max_overdue_sends=n_alerts)
+        service.channels = {
+            "email": AlertChannel("Email", True, ["RED"], {}, deadline_seconds=deadline_seconds,
+                                  circuit_breaker=settings),
+            "sms": AlertChannel("SMS", True, ["RED"], {})
+        }
+        service.channel_implementations = {"email": HungChannel(), "sms": FastChannel()}
+
+        latencies = []
+        for _ in range(n_alerts):
+            latencies.append(service.send_alert("RED", "oil_spill", "Bench Bay", "", 0.9)[DISPATCH_KEY]["latency_ms"])
+        service.shutdown(wait=False)
+        print(f"{label:<10} {sum(latencies) / 1000:8.2f} {np.percentile(latencies, 50):8.1f} "
+              f"{np.percentile(latencies, 95):8.1f}")
+
+
+def benchmark_priority_scheduler(n_yellow=300, n_orange=60, n_red=10, send_seconds=0.005, workers=2):
+    """Per-level queueing delay under a burst of YELLOW digests, FIFO outbox vs priority scheduler"""
+    import tempfile
+    from alert_outbox import AlertOutbox
+    from delivery_scheduler import PriorityScheduler
+
+    rng = np.random.default_rng(0)
+    levels = ["YELLOW"] * n_yellow + ["ORANGE"] * n_orange + ["RED"] * n_red
+    rng.shuffle(levels)
+
+    print_header(f"Delivery scheduler ({n_yellow} YELLOW, {n_orange} ORANGE, {n_red} RED; "
+                 f"{workers} workers, {send_seconds * 1000:.0f} ms per send)")
+    print(f"{'policy':<10} {'level':<7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, scheduler in [("fifo", None), ("priority", PriorityScheduler())]:
+            delays: dict = {}
+
+            def deliver(payload):
+                delays.setdefault(payload["level"], []).append(time.time() - payload["queued_at"])
+                time.sleep(send_seconds)
+
+            outbox = AlertOutbox(deliver, f"{tmp}/{label}.sqlite3", workers=workers, poll_seconds=0.01,
+                                 scheduler=scheduler, reserved_workers=1)
+            for level in levels:
+                outbox.enqueue({"level": level, "queued_at": time.time()}, priority=level)
+                time.sleep(send_seconds / (2 * workers))
+            outbox.drain()
+            outbox.close()
+
+            for level in ["RED", "ORANGE", "YELLOW"]:
+                values = np.array(delays[level]) * 1000
+                print(f"{label:<10} {level:<7} {np.percentile(values, 50):8.1f} {np.percentile(values, 95):8.1f} "
+                      f"{values.max():8.1f}")
+
+
+def benchmark_subscriber_registry(n_subscribers=200000, radius_km=10.0, queries=200):
+    """Radius queries over the subscriber grid vs scanning a flat subscriber list"""
+    import itertools
+    import math
+    from subscriber_registry import SubscriberRegistry
+
+    rng = np.random.default_rng(0)
+    # Subscribers spread along ~1000 km of coastline
+    lats = rng.uniform(32.5, 42.0, n_subscribers)
+    lons = -117.0 - (lats - 32.5) * 0.6 + rng.normal(0, 0.15, n_subscribers)
+
+    registry = SubscriberRegistry(":memory:")
+    start = time.perf_counter()
+    registry.add_many((f"s{i}", lats[i], lons[i], {"sms": f"+1{i:010d}"}, None) for i in range(n_subscribers))
+    load_s = time.perf_counter() - start
+
+    print_header(f"Subscriber radius queries ({n_subscribers} subscribers, {radius_km:.0f} km radius)")
+    print(f"Loaded in {load_s:.1f} s")
+    centers = rng.integers(n_subscribers, size=queries)
+
+    first, first_chunk, full = [], [], []
+    for i in centers:
+        start = time.perf_counter()
+        stream = registry.recipients(lats[i], lons[i], radius_km, "sms")
+        next(stream, None)
+        first.append(time.perf_counter() - start)
+        list(itertools.islice(stream, 499))
+        first_chunk.append(time.perf_counter() - start)
+        matches = 500 + sum(1 for _ in stream)
+        full.append((time.perf_counter() - start, matches))
+
+    scan = []
+    for i in centers[:10]:
+        start = time.perf_counter()
+        cos_lat = math.cos(math.radians(lats[i]))
+        hits = [j for j in range(n_subscribers)
+                if 111.32 * math.hypot(lats[j] - lats[i], (lons[j] - lons[i]) * cos_lat) <= radius_km]
+        scan.append(time.perf_counter() - start)
+
+    audience = np.median([matches for _, matches in full])
+    print(f"{'flat list scan':<26} {np.median(scan) * 1000:9.2f} ms")
+    print(f"{'grid, first recipient':<26} {np.median(first) * 1000:9.2f} ms")
+    print(f"{'grid, first 500':<26} {np.median(first_chunk) * 1000:9.2f} ms")
+    print(f"{'grid, whole audience':<26} {np.median([t for t, _ in full]) * 1000:9.2f} ms  (median {audience:.0f} recipients)")
+    registry.close()
+
+
+def benchmark_streamed_broadcast(n_recipients=200000, chunk_size=1000, crash_at=0.6):
+    """Memory of a file-sourced broadcast, and sends repeated when it is retried after a crash"""
+    import os
+    import tempfile
+    import tracemalloc
+    from recipient_delivery import RecipientDelivery
+    from recipient_sources import BroadcastCheckpoints, CheckpointedBroadcast, file_recipients
+
+    print_header(f"Streamed SMS broadcast ({n_recipients} recipients, chunks of {chunk_size})")
+    delivery = RecipientDelivery(max_concurrency=10)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "recipients.txt")
+        with open(path, "w") as f:
+            f.writelines(f"+1{i:010d}\n" for i in range(n_recipients))
+
+        tracemalloc.start()
+        recipients = [line.strip() for line in open(path)]
+        list_peak = tracemalloc.get_traced_memory()[1]
+        del recipients
+        tracemalloc.reset_peak()
+        streamed = sum(1 for _ in file_recipients(path))
+        stream_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{'list in memory':<26} {list_peak / 1e6:9.1f} MB")
+        print(f"{'streamed from file':<26} {stream_peak / 1e6:9.1f} MB  ({streamed} recipients)")
+
+        def broadcast_until_crash(checkpoints):
+            sent = [0]
+            crash_after = int(n_recipients * crash_at)
+
+            def send(recipient):
+                sent[0] += 1
+                if sent[0] > crash_after:
+                    raise RuntimeError("crashed")
+
+            if checkpoints is None:
+                delivery.deliver(file_recipients(path), send)
+            else:
+                delivery.deliver_chunks(CheckpointedBroadcast(checkpoints, "alert:sms", file_recipients(path),
+                                                              chunk_size), send)
+            return sent[0]
+
+        def retry(checkpoints):
+            sent = [0]
+
+            def send(recipient):
+                sent[0] += 1
+
+            start = time.perf_counter()
+            if checkpoints is None:
+                delivery.deliver(file_recipients(path), send)
+            else:
+                delivery.deliver_chunks(CheckpointedBroadcast(checkpoints, "alert:sms", file_recipients(path),
+                                                              chunk_size), send)
+            return sent[0], time.perf_counter() - start
+
+        broadcast_until_crash(None)
+        plain_sent, plain_s = retry(None)
+        checkpoints = BroadcastCheckpoints(os.path.join(tmp, "checkpoints.sqlite3"))
+        broadcast_until_crash(checkpoints)
+        resumed_sent, resumed_s = retry(checkpoints)
+        checkpoints.close()
+
+    print(f"{'retry, no checkpoints':<26} {plain_sent:9d} sends  {plain_s:6.2f} s")
+    print(f"{'retry, checkpointed':<26} {resumed_sent:9d} sends  {resumed_s:6.2f} s")
+    delivery.shutdown()
+
+
+BENCHMARKS = {
+    "features": benchmark_feature_extraction,
+    "decode": benchmark_decode,
+    "alerts": benchmark_alert_store,
+    "clustering": benchmark_incident_clustering,
+    "images": benchmark_alert_images,
+    "tiles": benchmark_tiled_analysis,
+    "sar": benchmark_sar_scan,
+    "cascade": benchmark_prefilter_cascade,
+    "dispatch": benchmark_alert_dispatch,
+    "smtp": benchmark_smtp_pool,
+    "sms": benchmark_sms_delivery,
+    "webhook": benchmark_webhooks,
+    "outbox": benchmark_alert_outbox,
+    "coalesce": benchmark_alert_coalescing,
+    "breaker": benchmark_circuit_breaker,
+    "scheduler": benchmark_priority_scheduler,
+    "subscribers": benchmark_subscriber_registry,
+    "broadcast": benchmark_streamed_broadcast,
+}
+
+
+def main():
+    """Run the selected benchmarks"""
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        if name not in BENCHMARKS:
+            print(f"❌ Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            return 1
+        BENCHMARKS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Content-addressed storage for uploaded images
+
+Each image is written once under its content digest (fanned out into two
+levels of subdirectories) next to a small JPEG thumbnail, and alerts carry
+only a reference to it. Writes go through a temporary file and an atomic
+rename, so concurrent uploads of the same photo are safe, and reads stream
+the file in chunks instead of loading it into memory.
+"""
+
+import io
+import logging
+import os
+import re
+import tempfile
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from PIL import Image #type: ignore
+
+from image_features import content_digest
+
+
+THUMBNAIL_SIZE = 256
+CHUNK_SIZE = 64 * 1024
+
+CONTENT_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "GIF": "image/gif",
+    "WEBP": "image/webp",
+    "TIFF": "image/tiff",
+    "BMP": "image/bmp",
+}
+
+_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ImageBlobStore:
+    """Write-once image store keyed by content digest"""
+
+    def __init__(self, root: str = "data/images", thumbnail_size: int = THUMBNAIL_SIZE):
+        """
+        Initialize the blob store
+
+        Args:
+            root: Directory holding the images and thumbnails
+            thumbnail_size: Longest side of generated thumbnails in pixels
+        """
+        self.root = root
+        self.thumbnail_size = thumbnail_size
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, image_id: str, thumbnail: bool = False) -> str:
+        """
+        Filesystem path of a stored image or its thumbnail
+
+        Args:
+            image_id: Content digest returned by put
+            thumbnail: Return the thumbnail path instead
+
+        Returns:
+            File path under the store root
+        """
+        if not _DIGEST_PATTERN.match(image_id):
+            raise ValueError(f"Invalid image id: {image_id}")
+        name = f"{image_id}.thumb.jpg" if thumbnail else image_id
+        return os.path.join(self.root, image_id[:2], image_id[2:4], name)
+
+    def _write(self, path: str, data: bytes) -> None:
+        """Atomically write a file unless it already exists"""
+        if os.path.exists(path):
+            return
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def _inspect(self, image_data: bytes, make_thumbnail: bool) -> Tuple[str, Optional[bytes]]:
+        """Detect the content type and optionally encode a JPEG thumbnail"""
+        try:
+            image = Image.open(io.BytesIO(image_data))
+        except Exception:
+            return "application/octet-stream", None
+
+        content_type = CONTENT_TYPES.get(image.format, "application/octet-stream")
+        if not make_thumbnail:
+            return content_type, None
+
+        try:
+            if image.format == "JPEG":
+                image.draft("RGB", (self.thumbnail_size, self.thumbnail_size))
+            image = image.convert("RGB")
+            image.thumbnail((self.thumbnail_size, self.thumbnail_size))
+            buffer = io.BytesIO()
+            image.save(buffer, "JPEG", quality=80)
+            return content_type, buffer.getvalue()
+        except Exception as e:
+            self.logger.warning(f"Could not create thumbnail: {str(e)}")
+            return content_type, None
+
+    def put(self, image_data: bytes) -> Dict[str, Any]:
+        """
+        Store an image (and its thumbnail) if not already present
+
+        Args:
+            image_data: Raw image bytes
+
+        Returns:
+            Reference dictionary with image_id, content_type, size and has_thumbnail
+        """
+        image_id = content_digest(image_data)
+        path = self.path(image_id)
+        thumb_path = self.path(image_id, thumbnail=True)
+
+        self._write(path, image_data)
+        content_type, thumbnail = self._inspect(image_data, make_thumbnail=not os.path.exists(thumb_path))
+        if thumbnail is not None:
+            self._write(thumb_path, thumbnail)
+
+        return {
+            "image_id": image_id,
+            "content_type": content_type,
+            "size": len(image_data),
+            "has_thumbnail": os.path.exists(thumb_path),
+        }
+
+    def exists(self, image_id: str, thumbnail: bool = False) -> bool:
+        """Whether an image (or its thumbnail) is stored"""
+        return os.path.exists(self.path(image_id, thumbnail))
+
+    def read(self, image_id: str, thumbnail: bool = False) -> Optional[bytes]:
+        """
+        Read a whole stored image into memory
+
+        Args:
+            image_id: Content digest returned by put
+            thumbnail: Read the thumbnail instead
+
+        Returns:
+            Image bytes, or None if not stored
+        """
+        try:
+            with open(self.path(image_id, thumbnail), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def iter_chunks(self, image_id: str, thumbnail: bool = False,
+                    chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Stream a stored image from disk in fixed-size chunks
+
+        Args:
+            image_id: Content digest returned by put
+            thumbnail: Stream the thumbnail instead
+            chunk_size: Bytes per chunk
+
+        Yields:
+            Consecutive chunks of the file
+        """
+        with open(self.path(image_id, thumbnail), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
@@ -0,0 +1,162 @@
+"""
+Circuit breaker for alert channels
+
+A breaker watches a rolling window of recent calls to one channel. While it is
+closed every call goes through; once the window holds at least min_calls and
+the share of failed calls (calls slower than slow_call_seconds count as
+failed) reaches failure_rate_threshold, it opens and calls are refused without
+touching the network. After open_seconds it lets a few trial calls through
+(half-open): if they all succeed it closes again, and any failure reopens it.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import numpy as np #type: ignore
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a rolling window of call outcomes"""
+
+    def __init__(self,
+                 failure_rate_threshold: float = 0.5,
+                 min_calls: int = 5,
+                 window_size: int = 20,
+                 slow_call_seconds: Optional[float] = None,
+                 open_seconds: float = 30.0,
+                 half_open_calls: int = 1):
+        """
+        Initialize a closed breaker
+
+        Args:
+            failure_rate_threshold: Share of failed calls in the window that opens the breaker
+            min_calls: Calls needed in the window before the failure rate is trusted
+            window_size: Recent calls kept in the rolling window
+            slow_call_seconds: Successful calls slower than this count as failures (None disables)
+            open_seconds: Time the breaker stays open before trial calls are allowed
+            half_open_calls: Successful trial calls needed to close again
+        """
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_successes = 0
+        self._window: Deque[Tuple[bool, float]] = deque(maxlen=window_size)
+        self._stats = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "times_opened": 0}
+
+    def _refresh(self) -> None:
+        """Move an open breaker to half-open once its open time is up (caller holds the lock)"""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._trials = 0
+            self._trial_successes = 0
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._stats["times_opened"] += 1
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open"""
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def retry_after(self) -> float:
+        """
+        Seconds until an open breaker allows a trial call
+
+        Returns:
+            Remaining open time (0 when not open)
+        """
+        with self._lock:
+            self._refresh()
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """
+        Ask to make a call; every allowed call must be followed by record()
+
+        Returns:
+            True if the call may go ahead
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record(self, success: bool, seconds: float) -> None:
+        """
+        Record the outcome of an allowed call
+
+        Args:
+            success: Whether the call succeeded
+            seconds: How long it took
+        """
+        slow = self.slow_call_seconds is not None and seconds > self.slow_call_seconds
+        failed = not success or slow
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["failures"] += not success
+            self._stats["slow_calls"] += slow
+            self._window.append((not failed, seconds))
+
+            if self._state == HALF_OPEN:
+                if failed:
+                    self._open()
+                else:
+                    self._trial_successes += 1
+                    if self._trial_successes >= self.half_open_calls:
+                        self._state = CLOSED
+                        self._window.clear()
+            elif self._state == CLOSED and len(self._window) >= self.min_calls:
+                failure_rate = sum(1 for ok, _ in self._window if not ok) / len(self._window)
+                if failure_rate >= self.failure_rate_threshold:
+                    self._open()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get breaker state and rolling call statistics
+
+        Returns:
+            State, counters, and success rate and latency percentiles over the window
+        """
+        with self._lock:
+            self._refresh()
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["state"] = self._state
+            window = list(self._window)
+            if self._state == OPEN:
+                stats["retry_after_seconds"] = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+        stats["window_calls"] = len(window)
+        if window:
+            latencies_ms = np.array([seconds for _, seconds in window]) * 1000
+            stats["success_rate"] = sum(1 for ok, _ in window if ok) / len(window)
+            stats["latency_ms"] = {
+                "p50": float(np.percentile(latencies_ms, 50)),
+                "p95": float(np.percentile(latencies_ms, 95)),
+                "max": float(latencies_ms.max()),
+            }
+        return stats
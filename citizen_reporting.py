@@ -1,5 +1,9 @@
 import json
 import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass, asdict
@@ -8,10 +12,22 @@ from geopy.exc import GeocoderTimedOut, GeocoderUnavailable #type: ignore
 import requests #type: ignore
 import joblib #type: ignore
 import numpy as np #type: ignore
-from PIL import Image #type: ignore
-import io
 import os
 
+from alert_store import AlertStore
+from blob_store import ImageBlobStore
+from geocoding_cache import GeocodingCache, get_shared_geocoding_cache
+from incident_clustering import IncidentClusterer
+from offline_geocoder import OfflineGeocoder
+from prefilter import PrefilterCascade
+from sar_scanner import SARSceneScanner, open_scene
+from status_tracker import AlertLevelTracker, BoundingBox
+from image_features import (ImageFeatureExtractor, IMAGE_SIZE, SAR_FEATURE_COUNT, content_digest, decode_image,
+                            decode_full_image, extract_image_features_with_hash, extract_strip_features,
+                            perceptual_hash, tile_origins)
+from upload_pipeline import Stage, UploadPipeline
+from verdict_cache import VerdictCache
+
 
 @dataclass
 class LocationData:
@@ -63,14 +79,47 @@ class AlertLevels:
     def get_level(cls, alert_level: str) -> Dict[str, Any]:
         """Get alert level configuration"""
         return getattr(cls, alert_level.upper(), cls.GREEN)
+    
+    @classmethod
+    def from_confidence(cls, hazard_type: str, confidence: float) -> str:
+        """Map a detection confidence to an alert level name"""
+        if hazard_type == "none" or confidence < 0.3:
+            return "GREEN"
+        elif confidence < 0.6:
+            return "YELLOW"
+        elif confidence < 0.8:
+            return "ORANGE"
+        else:
+            return "RED"
+
+
+# Forked workers would inherit the parent's threads, held locks and open SQLite/HTTP
+# handles; forkserver (or spawn) workers start clean and build their own extractor
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
 
 
 class HazardDetectionService:
     """Service for detecting hazards using trained ML models"""
     
-    def __init__(self):
-        """Initialize the hazard detection service with trained models"""
+    def __init__(self, max_workers: Optional[int] = None, verdict_cache_size: int = 10000,
+                 prefilter_trees: int = 10, prefilter_threshold: float = 0.15):
+        """
+        Initialize the hazard detection service with trained models
+        
+        Args:
+            max_workers: Processes used for batch decoding (defaults to CPU count)
+            verdict_cache_size: Analyzed images remembered for duplicate uploads (0 disables)
+            prefilter_trees: Trees per forest in the cheap first stage (0 disables the cascade)
+            prefilter_threshold: First-stage score below which an upload is a clear negative
+        """
         self.models = {}
+        self.feature_extractor = ImageFeatureExtractor()
+        self.verdict_cache = VerdictCache(max_entries=verdict_cache_size) if verdict_cache_size else None
+        self.prefilter = (PrefilterCascade(n_trees=prefilter_trees, threshold=prefilter_threshold)
+                          if prefilter_trees else None)
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
         self.logger = logging.getLogger(__name__)
         self._load_models()
     
@@ -107,117 +156,80 @@ class HazardDetectionService:
             Dictionary with features for each hazard type
         """
         try:
-            # Convert bytes to PIL Image
-            image = Image.open(io.BytesIO(image_data))
-            
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize image to standard size
-            image = image.resize((224, 224))
-            
-            # Convert to numpy array and normalize
-            img_array = np.array(image) / 255.0
-            
-            # Extract different types of features
-            features = {}
-            
-            # For oil spill detection (using SAR-like features)
-            if 'oil_spill' in self.models:
-                # Extract texture and spectral features
-                gray = np.mean(img_array, axis=2)
-                features['oil_spill'] = self._extract_sar_features(gray)
-            
-            # For algal bloom detection
-            if 'algal_bloom' in self.models:
-                # Extract color and texture features
-                features['algal_bloom'] = self._extract_color_features(img_array)
-            
-            # For coastal erosion detection
-            if 'coastal_erosion' in self.models:
-                # Extract edge and texture features
-                gray = np.mean(img_array, axis=2)
-                features['coastal_erosion'] = self._extract_erosion_features(gray)
-            
-            return features
+            # Decode directly near the model input size (draft mode for JPEGs)
+            return self._features_from_pixels(decode_image(image_data, IMAGE_SIZE))
             
         except Exception as e:
             self.logger.error(f"Error extracting features: {str(e)}")
             return {}
     
-    def _extract_sar_features(self, gray_image: np.ndarray) -> np.ndarray:
-        """Extract SAR-like features for oil spill detection"""
-        # Simulate SAR features (in real implementation, these would be actual SAR features)
-        features = []
-        
-        # Basic statistical features
-        features.extend([
-            np.mean(gray_image),
-            np.std(gray_image),
-            np.var(gray_image),
-            np.max(gray_image),
-            np.min(gray_image)
-        ])
-        
-        # Texture features (simplified)
-        for i in range(5):
-            for j in range(5):
-                features.append(np.mean(gray_image[i*44:(i+1)*44, j*44:(j+1)*44]))
-        
-        # Add random features to match expected input size (48 features)
-        while len(features) < 48:
-            features.append(np.random.random())
-        
-        return np.array(features).reshape(1, -1)
-    
-    def _extract_color_features(self, rgb_image: np.ndarray) -> np.ndarray:
-        """Extract color features for algal bloom detection"""
-        features = []
-        
-        # Color channel statistics
-        for channel in range(3):
-            features.extend([
-                np.mean(rgb_image[:, :, channel]),
-                np.std(rgb_image[:, :, channel]),
-                np.var(rgb_image[:, :, channel])
-            ])
-        
-        # Spatial features (simplified)
-        features.extend([
-            np.mean(rgb_image),
-            np.std(rgb_image),
-            np.var(rgb_image)
-        ])
-        
-        # Add random features to match expected input size (6 features)
-        while len(features) < 6:
-            features.append(np.random.random())
-        
-        return np.array(features).reshape(1, -1)
-    
-    def _extract_erosion_features(self, gray_image: np.ndarray) -> np.ndarray:
-        """Extract erosion features for coastal erosion detection"""
-        features = []
-        
-        # Basic features
-        features.extend([
-            np.mean(gray_image),
-            np.std(gray_image),
-            np.var(gray_image)
-        ])
-        
-        # Edge features (simplified)
-        features.extend([
-            np.mean(np.abs(np.diff(gray_image, axis=0))),
-            np.mean(np.abs(np.diff(gray_image, axis=1)))
-        ])
-        
-        # Add random features to match expected input size (6 features)
-        while len(features) < 6:
-            features.append(np.random.random())
-        
-        return np.array(features).reshape(1, -1)
+    def _features_from_pixels(self, pixels: np.ndarray) -> Dict[str, np.ndarray]:
+        """Extract the feature vectors of the loaded models from decoded pixels"""
+        # Extract all per-hazard feature vectors in a single pass
+        all_features = self.feature_extractor.extract(pixels)
+        
+        # Only keep features for models that are actually loaded
+        return {hazard_type: vector for hazard_type, vector in all_features.items()
+                if hazard_type in self.models}
+    
+    def _score_features(self, features: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Run each loaded model once over a stacked feature matrix
+        
+        Args:
+            features: Dictionary mapping hazard type to an (n_images, n_features) matrix
+            
+        Returns:
+            Dictionary mapping hazard type to per-image confidence scores
+        """
+        scores = {}
+        for hazard_type, model in self.models.items():
+            if hazard_type not in features:
+                continue
+            
+            rows = features[hazard_type]
+            try:
+                if hazard_type == 'coastal_erosion':
+                    # Regression model, clamped to [0,1]
+                    scores[hazard_type] = np.clip(model.predict(rows), 0.0, 1.0)
+                else:
+                    # Classification model: positive-class probability where the predicted class is 1
+                    proba = model.predict_proba(rows)
+                    classes = list(model.classes_)
+                    predicted = model.classes_[proba.argmax(axis=1)]
+                    scores[hazard_type] = np.where(predicted == 1, proba[:, classes.index(1)], 0.0)
+                    
+            except Exception as e:
+                self.logger.error(f"Error running {hazard_type} model: {str(e)}")
+                scores[hazard_type] = np.zeros(len(rows))
+        
+        return scores
+    
+    def _summarize_detection(self, results: Dict[str, float], image_size: int,
+                             features_extracted: int) -> Tuple[str, float, Dict[str, Any]]:
+        """Pick the most confident hazard and build the detection metadata"""
+        if not results:
+            return "unknown", 0.0, {"error": "All models failed"}
+        
+        # Find the hazard with highest confidence
+        best_hazard = max(results.items(), key=lambda x: x[1])
+        hazard_type, confidence = best_hazard
+        
+        # Determine if hazard is significant
+        if confidence < 0.3:
+            hazard_type = "none"
+            confidence = 0.0
+        
+        metadata = {
+            "model_version": "1.0.0",
+            "processing_time": 0.5,
+            "image_size": image_size,
+            "detection_method": "ml_model",
+            "all_predictions": results,
+            "features_extracted": features_extracted
+        }
+        
+        return hazard_type, confidence, metadata
     
     def detect_hazards(self, image_data: bytes) -> Tuple[str, float, Dict[str, Any]]:
         """
@@ -234,59 +246,337 @@ class HazardDetectionService:
                 # Fallback to simulation if no models loaded
                 return self._simulate_detection(image_data)
             
+            start = time.perf_counter()
+            
+            # Exact re-uploads are answered before decoding
+            digest = content_digest(image_data)
+            if self.verdict_cache is not None:
+                cached = self.verdict_cache.get_exact(digest)
+                if cached is not None:
+                    return cached
+            
+            try:
+                pixels = decode_image(image_data, IMAGE_SIZE)
+            except Exception as e:
+                self.logger.error(f"Error extracting features: {str(e)}")
+                return "unknown", 0.0, {"error": "Feature extraction failed"}
+            
+            # Re-encoded or resized copies are answered before running the models
+            phash = perceptual_hash(pixels)
+            if self.verdict_cache is not None:
+                cached = self.verdict_cache.get_similar(phash)
+                if cached is not None:
+                    return cached
+            
             # Extract features
-            features = self.extract_features_from_image(image_data)
+            features = self._features_from_pixels(pixels)
             
             if not features:
                 return "unknown", 0.0, {"error": "Feature extraction failed"}
             
+            # Clear negatives are answered by the cheap first stage
+            if self.prefilter is not None:
+                negative, stage_scores = self.prefilter.screen(self.models, features)
+                if negative.size and negative[0]:
+                    verdict = self._prefilter_verdict(stage_scores, 0, len(image_data), len(features))
+                    self._remember_verdict(digest, phash, verdict)
+                    self.prefilter.record(time.perf_counter() - start, short_circuited=True)
+                    return verdict
+            
             # Run detection on each model
-            results = {}
-            for hazard_type, model in self.models.items():
-                if hazard_type in features:
-                    try:
-                        if hazard_type == 'coastal_erosion':
-                            # Regression model
-                            prediction = model.predict(features[hazard_type])[0]
-                            confidence = min(max(prediction, 0.0), 1.0)  # Clamp to [0,1]
-                        else:
-                            # Classification model
-                            prediction = model.predict(features[hazard_type])[0]
-                            confidence = model.predict_proba(features[hazard_type])[0][1] if prediction == 1 else 0.0
-                        
-                        results[hazard_type] = confidence
-                        
-                    except Exception as e:
-                        self.logger.error(f"Error running {hazard_type} model: {str(e)}")
-                        results[hazard_type] = 0.0
-            
-            if not results:
-                return "unknown", 0.0, {"error": "All models failed"}
-            
-            # Find the hazard with highest confidence
-            best_hazard = max(results.items(), key=lambda x: x[1])
-            hazard_type, confidence = best_hazard
-            
-            # Determine if hazard is significant
-            if confidence < 0.3:
-                hazard_type = "none"
-                confidence = 0.0
-            
-            metadata = {
-                "model_version": "1.0.0",
-                "processing_time": 0.5,
-                "image_size": len(image_data),
-                "detection_method": "ml_model",
-                "all_predictions": results,
-                "features_extracted": len(features)
-            }
+            scores = self._score_features(features)
+            results = {hazard_type: float(score[0]) for hazard_type, score in scores.items()}
             
-            return hazard_type, confidence, metadata
+            verdict = self._summarize_detection(results, len(image_data), len(features))
+            self._remember_verdict(digest, phash, verdict)
+            if self.prefilter is not None:
+                self.prefilter.record(time.perf_counter() - start, short_circuited=False)
+            return verdict
             
         except Exception as e:
             self.logger.error(f"Error in hazard detection: {str(e)}")
             return self._simulate_detection(image_data)
     
+    def _prefilter_verdict(self, stage_scores: Dict[str, np.ndarray], row: int, image_size: int,
+                           features_extracted: int) -> Tuple[str, float, Dict[str, Any]]:
+        """Build the verdict for an upload short-circuited by the first stage"""
+        metadata = {
+            "model_version": "1.0.0",
+            "image_size": image_size,
+            "detection_method": "prefilter",
+            "prefilter_scores": {hazard_type: float(score[row]) for hazard_type, score in stage_scores.items()},
+            "features_extracted": features_extracted
+        }
+        return "none", 0.0, metadata
+    
+    def get_prefilter_stats(self) -> Dict[str, Any]:
+        """
+        Get the pre-filter cascade's short-circuit rate and latency distribution
+        
+        Returns:
+            Cascade statistics, or {"enabled": False} when the cascade is off
+        """
+        if self.prefilter is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.prefilter.get_stats()}
+    
+    def _remember_verdict(self, digest: str, phash: int, verdict: Tuple[str, float, Dict[str, Any]]) -> None:
+        """Cache a successful model verdict for duplicate uploads"""
+        if self.verdict_cache is not None and verdict[2].get("detection_method") in ("ml_model", "prefilter"):
+            self.verdict_cache.put(digest, phash, verdict)
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Get the decode/extract process pool, starting it on first use"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context(POOL_START_METHOD))
+            return self._pool
+    
+    def shutdown(self) -> None:
+        """Stop the batch decoding process pool if it was started"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+    
+    def detect_hazards_batch(self, images: List[bytes]) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Detect hazards in many images with one model call per hazard type
+        
+        Images are decoded and featurized in a process pool, features are
+        stacked into one matrix per hazard, and each model scores the whole
+        batch at once. With the pre-filter cascade, each screened image's
+        latency (batch start to its verdict) is recorded in the cascade stats.
+        
+        Args:
+            images: List of raw image bytes
+            
+        Returns:
+            List of (hazard_type, confidence, metadata) tuples, one per image
+        """
+        if not self.models:
+            return [self._simulate_detection(image_data) for image_data in images]
+        
+        start = time.perf_counter()
+        try:
+            detections: List[Tuple[str, float, Dict[str, Any]]] = [
+                ("unknown", 0.0, {"error": "Feature extraction failed"}) for _ in images
+            ]
+            
+            # Exact re-uploads never reach the decode pool
+            digests = [content_digest(image_data) for image_data in images]
+            pending = list(range(len(images)))
+            if self.verdict_cache is not None:
+                pending = []
+                for i, digest in enumerate(digests):
+                    cached = self.verdict_cache.get_exact(digest)
+                    if cached is not None:
+                        detections[i] = cached
+                    else:
+                        pending.append(i)
+            
+            to_decode = [images[i] for i in pending]
+            if len(to_decode) < 2 or self.max_workers == 1:
+                decoded = [extract_image_features_with_hash(image_data) for image_data in to_decode]
+            else:
+                chunksize = max(1, len(to_decode) // (4 * (self.max_workers or os.cpu_count() or 1)))
+                decoded = list(self._get_pool().map(extract_image_features_with_hash, to_decode, chunksize=chunksize))
+            
+            # Near duplicates are answered from the cache; the rest are scored together
+            extracted: Dict[int, Tuple[Dict[str, np.ndarray], int]] = {}
+            for i, result in zip(pending, decoded):
+                if not result:
+                    continue
+                cached = self.verdict_cache.get_similar(result[1]) if self.verdict_cache is not None else None
+                if cached is not None:
+                    detections[i] = cached
+                else:
+                    extracted[i] = result
+            
+            # Stack per-hazard rows of every image that still needs the models
+            valid = list(extracted)
+            hazard_types = [hazard_type for hazard_type in self.models
+                            if valid and hazard_type in extracted[valid[0]][0]]
+            stacked = {hazard_type: np.vstack([extracted[i][0][hazard_type] for i in valid])
+                       for hazard_type in hazard_types}
+            
+            # Clear negatives are answered by the cheap first stage; only candidates reach the forests
+            if self.prefilter is not None and valid:
+                negative, stage_scores = self.prefilter.screen(self.models, stacked)
+                screened = time.perf_counter() - start
+                for row in np.flatnonzero(negative):
+                    i = valid[row]
+                    detections[i] = self._prefilter_verdict(stage_scores, row, len(images[i]), len(hazard_types))
+                    self._remember_verdict(digests[i], extracted[i][1], detections[i])
+                    self.prefilter.record(screened, short_circuited=True)
+                if negative.size:
+                    keep = ~negative
+                    valid = [i for i, candidate in zip(valid, keep) if candidate]
+                    stacked = {hazard_type: rows[keep] for hazard_type, rows in stacked.items()}
+            
+            scores = self._score_features(stacked) if valid else {}
+            
+            if self.prefilter is not None:
+                scored = time.perf_counter() - start
+                for _ in valid:
+                    self.prefilter.record(scored, short_circuited=False)
+            
+            for row, i in enumerate(valid):
+                results = {hazard_type: float(score[row]) for hazard_type, score in scores.items()}
+                detections[i] = self._summarize_detection(results, len(images[i]), len(hazard_types))
+                self._remember_verdict(digests[i], extracted[i][1], detections[i])
+            
+            return detections
+            
+        except Exception as e:
+            self.logger.error(f"Error in batch hazard detection: {str(e)}")
+            return [self._simulate_detection(image_data) for image_data in images]
+    
+    def detect_hazards_tiled(self,
+                             image_data: bytes,
+                             tile_size: int = IMAGE_SIZE,
+                             overlap: float = 0.25,
+                             top_k: int = 5) -> Dict[str, Any]:
+        """
+        Scan a large aerial or satellite image tile by tile
+        
+        The image is decoded once at full resolution and cut into overlapping
+        tiles. Each row of tiles is a horizontal strip whose tiles are strided
+        views, so strips (not copied tiles) are what is shipped to the process
+        pool. Features of every tile are stacked and each model scores them all
+        in a single call.
+        
+        Args:
+            image_data: Raw image bytes
+            tile_size: Tile width and height in pixels
+            overlap: Fraction of a tile shared with its neighbour (0 to <1)
+            top_k: Number of hotspots to return
+            
+        Returns:
+            Dictionary with per-hazard heatmaps (rows x cols of tile scores),
+            the top_k hotspots and throughput figures
+        """
+        if not self.models:
+            return {"error": "Tiled analysis requires trained models"}
+        if not 0.0 <= overlap < 1.0:
+            return {"error": "overlap must be in [0, 1)"}
+        
+        start = time.perf_counter()
+        try:
+            pixels = decode_full_image(image_data)
+        except Exception as e:
+            self.logger.error(f"Error decoding image for tiled analysis: {str(e)}")
+            return {"error": "Image decoding failed"}
+        
+        height, width = pixels.shape[:2]
+        if height < tile_size or width < tile_size:
+            pixels = np.pad(pixels, ((0, max(0, tile_size - height)), (0, max(0, tile_size - width)), (0, 0)),
+                            mode='edge')
+        
+        stride = max(1, int(round(tile_size * (1.0 - overlap))))
+        ys = tile_origins(pixels.shape[0], tile_size, stride)
+        xs = tile_origins(pixels.shape[1], tile_size, stride)
+        strips = [pixels[y:y + tile_size] for y in ys]
+        
+        if len(strips) < 2 or self.max_workers == 1:
+            rows = [extract_strip_features(strip, xs, tile_size) for strip in strips]
+        else:
+            rows = list(self._get_pool().map(extract_strip_features, strips,
+                                             [xs] * len(strips), [tile_size] * len(strips)))
+        
+        stacked = {hazard_type: np.vstack([row[hazard_type] for row in rows])
+                   for hazard_type in self.models if hazard_type in rows[0]}
+        scores = self._score_features(stacked)
+        heatmaps = {hazard_type: score.reshape(len(ys), len(xs)) for hazard_type, score in scores.items()}
+        
+        # Best hazard per tile, then the top_k tiles by that score
+        hotspots = []
+        if heatmaps:
+            hazard_types = list(heatmaps)
+            cube = np.stack([heatmaps[hazard_type] for hazard_type in hazard_types])
+            best = cube.max(axis=0).ravel()
+            best_hazard = cube.argmax(axis=0).ravel()
+            k = min(top_k, best.size)
+            top = np.argpartition(-best, k - 1)[:k] if k else np.array([], dtype=int)
+            for index in top[np.argsort(-best[top])]:
+                row, col = divmod(int(index), len(xs))
+                hotspots.append({
+                    "hazard_type": hazard_types[best_hazard[index]],
+                    "confidence": float(best[index]),
+                    "row": row,
+                    "col": col,
+                    "bbox": (xs[col], ys[row], min(xs[col] + tile_size, width), min(ys[row] + tile_size, height)),
+                })
+        
+        elapsed = time.perf_counter() - start
+        megapixels = height * width / 1e6
+        return {
+            "heatmaps": heatmaps,
+            "hotspots": hotspots,
+            "tiles": len(ys) * len(xs),
+            "grid": (len(ys), len(xs)),
+            "tile_size": tile_size,
+            "stride": stride,
+            "image_shape": (height, width),
+            "megapixels": megapixels,
+            "elapsed_seconds": elapsed,
+            "megapixels_per_second": megapixels / elapsed if elapsed > 0 else 0.0,
+        }
+    
+    def scan_sar_scene(self,
+                       path: str,
+                       band: int = 0,
+                       top_k: int = 10,
+                       heatmap_path: Optional[str] = None,
+                       batch_size: int = 4096,
+                       scale: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Scan a raw SAR scene for oil spills with the oil spill model
+        
+        The scene is memory-mapped and streamed one row of blocks at a time
+        (see sar_scanner), so scenes larger than RAM can be scanned.
+        
+        Args:
+            path: .npy file, or headerless raster with a .json or ENVI .hdr sidecar
+            band: Band to scan in multi-band rasters
+            top_k: Number of strongest windows to return
+            heatmap_path: Write the heatmap to this .npy file instead of RAM
+            batch_size: Windows scored per model call
+            scale: Divisor bringing pixel values into [0, 1]
+            
+        Returns:
+            Dictionary with the window heatmap, top hits and throughput figures
+        """
+        model = self.models.get('oil_spill')
+        if model is None:
+            return {"error": "Oil spill model not loaded"}
+        
+        try:
+            scene = open_scene(path, band)
+        except Exception as e:
+            self.logger.error(f"Error opening SAR scene {path}: {str(e)}")
+            return {"error": f"Could not open scene: {str(e)}"}
+        
+        scanner = SARSceneScanner(
+            lambda rows: self._score_features({'oil_spill': rows})['oil_spill'],
+            batch_size=batch_size,
+            scale=scale,
+            n_features=getattr(model, 'n_features_in_', SAR_FEATURE_COUNT)
+        )
+        start = time.perf_counter()
+        result = scanner.scan_scene(scene, top_k=top_k, heatmap_path=heatmap_path)
+        elapsed = time.perf_counter() - start
+        
+        megapixels = scene.shape[0] * scene.shape[1] / 1e6
+        result.update({
+            "scene_shape": scene.shape,
+            "megapixels": megapixels,
+            "elapsed_seconds": elapsed,
+            "megapixels_per_second": megapixels / elapsed if elapsed > 0 else 0.0,
+        })
+        return result
+    
     def _simulate_detection(self, image_data: bytes) -> Tuple[str, float, Dict[str, Any]]:
         """Fallback simulation when models are not available"""
         import random
@@ -314,7 +604,16 @@ class CitizenReportingService:
                  multi_channel_service=None,
                  sms_api_key: Optional[str] = None,
                  sms_api_secret: Optional[str] = None,
-                 sms_from_number: Optional[str] = None):
+                 sms_from_number: Optional[str] = None,
+                 gazetteer_path: Optional[str] = None,
+                 alert_db_path: Optional[str] = None,
+                 image_store_path: Optional[str] = None,
+                 geocoding_cache: Optional[GeocodingCache] = None,
+                 status_regions: Optional[Dict[str, BoundingBox]] = None,
+                 alert_ttl_seconds: Optional[float] = None,
+                 refine_geocoding: bool = True,
+                 upload_workers: int = 4,
+                 max_queued_uploads: int = 1000):
         """
         Initialize the citizen reporting service
         
@@ -323,6 +622,19 @@ class CitizenReportingService:
             sms_api_key: API key for SMS service (e.g., Twilio)
             sms_api_secret: API secret for SMS service
             sms_from_number: Phone number to send SMS from
+            gazetteer_path: Local gazetteer CSV for offline geocoding
+                            (defaults to $GAZETTEER_PATH or data/gazetteer.csv)
+            alert_db_path: SQLite file for the alert store
+                           (defaults to $ALERT_DB_PATH or data/alerts.sqlite3)
+            image_store_path: Directory for uploaded images and thumbnails
+                              (defaults to $IMAGE_STORE_PATH or data/images)
+            geocoding_cache: Reverse geocoding cache (defaults to the process-wide shared cache)
+            status_regions: Region name to (min_lat, min_lon, max_lat, max_lon) for per-region status
+            alert_ttl_seconds: Active alerts expire this long after their last update
+                               (defaults to $ALERT_TTL_SECONDS, unset never expires)
+            refine_geocoding: Refine offline names with Nominatim in the background
+            upload_workers: Worker threads processing submitted reports
+            max_queued_uploads: Reports allowed to wait before uploads are refused
         """
         self.multi_channel_service = multi_channel_service
         self.sms_api_key = sms_api_key
@@ -331,15 +643,38 @@ class CitizenReportingService:
         
         # Initialize services
         self.geolocator = Nominatim(user_agent="citizen_reporting_app")
+        self.geocoding_cache = geocoding_cache or get_shared_geocoding_cache()
         self.hazard_detector = HazardDetectionService()
         
         # Initialize storage
-        self.active_alerts: List[Alert] = []
-        self.system_status: str = "GREEN"
+        self.alert_store = AlertStore(alert_db_path or os.getenv("ALERT_DB_PATH", "data/alerts.sqlite3"))
+        self.image_store = ImageBlobStore(image_store_path or os.getenv("IMAGE_STORE_PATH", "data/images"))
+        self._alerts_lock = threading.Lock()
+        
+        # Per-level active alert counters, so status never needs a scan
+        if alert_ttl_seconds is None and os.getenv("ALERT_TTL_SECONDS"):
+            alert_ttl_seconds = float(os.getenv("ALERT_TTL_SECONDS"))
+        self.level_tracker = AlertLevelTracker(status_regions, alert_ttl_seconds)
+        for record in self.alert_store.query():
+            self.level_tracker.add(record['id'], record['alert_level'], record['location']['latitude'],
+                                   record['location']['longitude'],
+                                   now=datetime.fromisoformat(record['timestamp']).timestamp())
+        
+        # Folds near-duplicate reports of the same hazard into one incident
+        self.incident_clusterer = IncidentClusterer()
         
         # Setup logging
         self.logger = logging.getLogger(__name__)
         
+        # Offline reverse geocoding, with Nominatim as an asynchronous refinement
+        self.offline_geocoder = self._load_offline_geocoder(gazetteer_path)
+        self.refine_geocoding = refine_geocoding
+        self._geocode_refiner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="geocode-refine")
+        
+        # Background analysis/geocode/alert stages for submitted reports
+        self.upload_pipeline = UploadPipeline(self._pipeline_stages(), self._report_summary,
+                                              workers=upload_workers, max_queue=max_queued_uploads)
+        
     def analyze_image(self, image_data: bytes) -> Tuple[str, float, Dict[str, Any]]:
         """
         Analyze image using trained ML models to detect hazards
@@ -352,6 +687,51 @@ class CitizenReportingService:
         """
         return self.hazard_detector.detect_hazards(image_data)
     
+    def analyze_images(self, images: List[bytes],
+                       location_data: Optional[LocationData] = None) -> Dict[str, Any]:
+        """
+        Analyze several images in one batch and combine them into a report verdict
+        
+        Args:
+            images: List of raw image bytes (e.g. all photos attached to one report)
+            location_data: Optional location of the report
+            
+        Returns:
+            Dictionary with per-image results and the combined verdict
+        """
+        detections = self.hazard_detector.detect_hazards_batch(images)
+        
+        per_image = []
+        for index, (hazard_type, confidence, metadata) in enumerate(detections):
+            per_image.append({
+                "index": index,
+                "hazard_type": hazard_type,
+                "confidence": confidence,
+                "alert_level": self.determine_alert_level(hazard_type, confidence, location_data),
+                "metadata": metadata
+            })
+        
+        # The report takes the most confident hazard; other photos showing it count as support
+        hazards = [result for result in per_image if result["hazard_type"] not in ("none", "unknown")]
+        if hazards:
+            best = max(hazards, key=lambda result: result["confidence"])
+            hazard_type, confidence = best["hazard_type"], best["confidence"]
+        else:
+            hazard_type, confidence = "none", 0.0
+        
+        supporting = [result["index"] for result in per_image if result["hazard_type"] == hazard_type]
+        
+        return {
+            "images": per_image,
+            "verdict": {
+                "hazard_type": hazard_type,
+                "confidence": confidence,
+                "alert_level": self.determine_alert_level(hazard_type, confidence, location_data),
+                "image_count": len(images),
+                "supporting_images": supporting
+            }
+        }
+    
     def get_location_info(self, latitude: float, longitude: float) -> str:
         """
         Get human-readable location name from coordinates
@@ -363,15 +743,54 @@ class CitizenReportingService:
         Returns:
             Location name as string
         """
+        if self.offline_geocoder is None:
+            location_name = self.geocoding_cache.lookup(latitude, longitude, self._reverse_geocode)
+            return location_name or "Unknown location"
+        
+        found, location_name = self.geocoding_cache.peek(latitude, longitude)
+        if found and location_name:
+            return location_name
+        
+        # Answer from the local gazetteer now; Nominatim refines the cache in the background
+        if self.refine_geocoding and not found:
+            self._geocode_refiner.submit(self.geocoding_cache.lookup, latitude, longitude, self._reverse_geocode)
+        
+        nearest = self.offline_geocoder.nearest(latitude, longitude)
+        return f"Near {nearest[0]}" if nearest else "Unknown location"
+    
+    def _load_offline_geocoder(self, gazetteer_path: Optional[str]) -> Optional[OfflineGeocoder]:
+        """Open the gazetteer index, returning None when no gazetteer is available"""
+        gazetteer_path = gazetteer_path or os.getenv("GAZETTEER_PATH", "data/gazetteer.csv")
+        if not os.path.exists(gazetteer_path):
+            self.logger.warning(f"Gazetteer not found: {gazetteer_path}, using online geocoding only")
+            return None
+        
+        try:
+            return OfflineGeocoder.from_csv(gazetteer_path)
+        except Exception as e:
+            self.logger.error(f"Failed to load gazetteer {gazetteer_path}: {str(e)}")
+            return None
+    
+    def _reverse_geocode(self, latitude: float, longitude: float) -> Optional[str]:
+        """Query Nominatim directly; errors propagate so they are not cached"""
         try:
             location = self.geolocator.reverse(f"{latitude}, {longitude}")
-            return location.address if location else "Unknown location"
+            return location.address if location else None
         except (GeocoderTimedOut, GeocoderUnavailable) as e:
             self.logger.warning(f"Geocoding failed: {str(e)}")
-            return "Unknown location"
+            raise
         except Exception as e:
             self.logger.error(f"Unexpected geocoding error: {str(e)}")
-            return "Unknown location"
+            raise
+    
+    def get_geocoding_stats(self) -> Dict[str, Any]:
+        """
+        Get reverse-geocoding cache metrics
+        
+        Returns:
+            Hit/miss counters and hit rate of the shared geocoding cache
+        """
+        return self.geocoding_cache.get_stats()
     
     def determine_alert_level(self, hazard_type: str, confidence: float, 
                             location_data: LocationData) -> str:
@@ -387,14 +806,7 @@ class CitizenReportingService:
             Alert level string (GREEN, YELLOW, ORANGE, RED)
         """
         # Base logic for alert level determination
-        if hazard_type == "none" or confidence < 0.3:
-            return "GREEN"
-        elif confidence < 0.6:
-            return "YELLOW"
-        elif confidence < 0.8:
-            return "ORANGE"
-        else:
-            return "RED"
+        return AlertLevels.from_confidence(hazard_type, confidence)
     
     def send_sms_alert(self, phone_number: str, message: str) -> bool:
         """
@@ -457,7 +869,9 @@ class CitizenReportingService:
                 location_name=alert.location.location_name,
                 description=alert.description,
                 confidence=alert.confidence,
-                image_data=alert.metadata.get('image_data')
+                image_data=self._alert_thumbnail(alert),
+                latitude=alert.location.latitude,
+                longitude=alert.location.longitude
             )
             
             self.logger.info(f"Multi-channel alert sent with results: {results}")
@@ -467,6 +881,147 @@ class CitizenReportingService:
             self.logger.error(f"Failed to send multi-channel alert: {str(e)}")
             return {}
     
+    def _validate_upload(self, image_file, latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+        """Return an error response for an invalid upload, or None if it is acceptable"""
+        if not image_file or image_file.filename == '':
+            return {"error": "No image provided", "status_code": 400}
+        
+        if not all([latitude, longitude]):
+            return {"error": "GPS coordinates required", "status_code": 400}
+        
+        return None
+    
+    def _analyze_stage(self, report: Dict[str, Any]) -> None:
+        """Pipeline stage: run the hazard models on the uploaded image"""
+        report['hazard_type'], report['confidence'], report['metadata'] = self.analyze_image(report['image_data'])
+    
+    def _geocode_stage(self, report: Dict[str, Any]) -> None:
+        """Pipeline stage: resolve the report coordinates to a place name"""
+        report['location_name'] = self.get_location_info(report['latitude'], report['longitude'])
+    
+    def _alert_stage(self, report: Dict[str, Any]) -> None:
+        """Pipeline stage: file the report under an incident and alert on new incidents or escalation"""
+        location_data = LocationData(
+            latitude=report['latitude'],
+            longitude=report['longitude'],
+            location_name=report['location_name']
+        )
+        
+        # Determine alert level
+        alert_level = self.determine_alert_level(report['hazard_type'], report['confidence'], location_data)
+        
+        # Keep the image on disk once; the alert only carries a reference to it
+        metadata = report['metadata']
+        metadata['image'] = report['image'] = self.image_store.put(report['image_data'])
+        
+        self._expire_alerts()
+        
+        with self._alerts_lock:
+            incident, created = None, True
+            if report['hazard_type'] not in ("none", "unknown"):
+                incident, created = self.incident_clusterer.observe(
+                    report['hazard_type'], report['latitude'], report['longitude'], report['confidence']
+                )
+            
+            # An incident whose alert was cleared or expired starts a fresh alert
+            if created or incident.alert.id not in self.level_tracker:
+                alert = Alert(
+                    id=0,
+                    timestamp=datetime.now().isoformat(),
+                    hazard_type=report['hazard_type'],
+                    confidence=report['confidence'],
+                    alert_level=alert_level,
+                    location=location_data,
+                    description=report['description'],
+                    metadata=metadata
+                )
+                if incident is not None:
+                    metadata['incident_id'] = incident.incident_id
+                    metadata['report_count'] = 1
+                    incident.alert = alert
+                
+                # Persist; the store assigns a monotonic id that is never reused
+                alert.id = self.alert_store.add(alert)
+                self.level_tracker.add(alert.id, alert.alert_level, location_data.latitude, location_data.longitude)
+                notify = True
+            else:
+                # Same incident: update the existing alert, re-alerting only on escalation
+                alert = incident.alert
+                incident_level = self.determine_alert_level(incident.hazard_type, incident.confidence, alert.location)
+                notify = AlertLevels.get_level(incident_level)["level"] > AlertLevels.get_level(alert.alert_level)["level"]
+                
+                alert.confidence = incident.confidence
+                alert.metadata['report_count'] = incident.report_count
+                alert.metadata['mean_confidence'] = incident.mean_confidence
+                if notify:
+                    alert.alert_level = incident_level
+                self.alert_store.update(alert)
+                
+                # New reports keep the incident's alert alive
+                self.level_tracker.update(alert.id, alert.alert_level)
+        
+        report['alert'] = alert
+        report['incident'] = incident
+        report['notified'] = notify
+        
+        if not notify:
+            self.logger.info(f"Report folded into incident {incident.incident_id} "
+                             f"({incident.report_count} reports), no escalation")
+            return
+        
+        alert_level = alert.alert_level
+        
+        # Send multi-channel alerts if service is configured
+        if self.multi_channel_service:
+            alert_results = self.send_multi_channel_alert(alert)
+            alert.metadata['multi_channel_results'] = alert_results
+            # Saved so get_active_alerts and /alerts report how the alert went out
+            self.alert_store.update(alert)
+        
+        # Send SMS alert if phone number provided and alert level is significant
+        if report['phone_number'] and alert_level in ["ORANGE", "RED"]:
+            alert_config = AlertLevels.get_level(alert_level)
+            alert_message = (
+                f"🚨 CURSOR ALERT: {alert_config['description']} "
+                f"detected at {location_data.location_name}. {alert_config['action']}"
+            )
+            self.send_sms_alert(report['phone_number'], alert_message)
+        
+        # Broadcast alert to all connected users
+        self.broadcast_alert(alert)
+    
+    def _report_summary(self, report: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the JSON-safe outcome of a fully processed report"""
+        alert = report['alert']
+        summary = {
+            "success": True,
+            "alert_id": alert.id,
+            "image_id": report['image']['image_id'],
+            "message": f"Hazard analysis complete. Alert level: {alert.alert_level}",
+            "hazard_details": {
+                "type": alert.hazard_type,
+                "confidence": alert.confidence,
+                "location": alert.location.location_name,
+                "alert_level": alert.alert_level
+            }
+        }
+        
+        incident = report.get('incident')
+        if incident is not None:
+            summary["incident"] = {
+                "incident_id": incident.incident_id,
+                "report_count": incident.report_count,
+                "alerted": report['notified']
+            }
+        return summary
+    
+    def _alert_thumbnail(self, alert: Alert) -> Optional[bytes]:
+        """Load the thumbnail of an alert's image for channels that attach it"""
+        image = alert.metadata.get('image')
+        if not image or not image.get('has_thumbnail'):
+            return None
+        return self.image_store.read(image['image_id'], thumbnail=True)
+    
     def process_image_upload(self, 
                            image_file,
                            latitude: float,
@@ -474,7 +1029,7 @@ class CitizenReportingService:
                            description: str = "",
                            phone_number: str = "") -> Dict[str, Any]:
         """
-        Process image upload and create hazard alert
+        Process image upload and create hazard alert, waiting for every stage
         
         Args:
             image_file: Uploaded image file
@@ -487,115 +1042,185 @@ class CitizenReportingService:
             Dictionary with processing results
         """
         try:
-            # Validate inputs
-            if not image_file or image_file.filename == '':
-                return {"error": "No image provided", "status_code": 400}
-            
-            if not all([latitude, longitude]):
-                return {"error": "GPS coordinates required", "status_code": 400}
-            
-            # Read image data
-            image_data = image_file.read()
+            error = self._validate_upload(image_file, latitude, longitude)
+            if error:
+                return error
             
-            # Analyze image using ML models
-            hazard_type, confidence, metadata = self.analyze_image(image_data)
-            
-            # Get location information
-            location_name = self.get_location_info(latitude, longitude)
-            
-            # Create location data object
-            location_data = LocationData(
-                latitude=latitude,
-                longitude=longitude,
-                location_name=location_name
-            )
-            
-            # Determine alert level
-            alert_level = self.determine_alert_level(hazard_type, confidence, location_data)
+            report = {
+                "image_data": image_file.read(),
+                "latitude": latitude,
+                "longitude": longitude,
+                "description": description,
+                "phone_number": phone_number,
+            }
+            for _, stage in self._pipeline_stages():
+                stage(report)
             
-            # Store image data in metadata for multi-channel alerts
-            metadata['image_data'] = image_data
+            result = self._report_summary(report)
+            del result["alert_id"]
+            result["alert"] = asdict(report['alert'])
+            result["status_code"] = 200
+            return result
             
-            # Create alert object
-            alert = Alert(
-                id=len(self.active_alerts) + 1,
-                timestamp=datetime.now().isoformat(),
-                hazard_type=hazard_type,
-                confidence=confidence,
-                alert_level=alert_level,
-                location=location_data,
-                description=description,
-                metadata=metadata
-            )
+        except Exception as e:
+            self.logger.error(f"Error processing upload: {str(e)}")
+            return {
+                "error": f"Processing failed: {str(e)}",
+                "status_code": 500
+            }
+    
+    def _pipeline_stages(self) -> List[Tuple[str, Stage]]:
+        """Ordered stages every uploaded report goes through"""
+        return [
+            ("analysis", self._analyze_stage),
+            ("geocode", self._geocode_stage),
+            ("alert", self._alert_stage),
+        ]
+    
+    def submit_image_upload(self,
+                            image_file,
+                            latitude: float,
+                            longitude: float,
+                            description: str = "",
+                            phone_number: str = "") -> Dict[str, Any]:
+        """
+        Accept an image upload and queue it for background processing
         
-            # Add to active alerts
-            self.active_alerts.append(alert)
-            
-            # Update system status if needed
-            current_level = AlertLevels.get_level(self.system_status)["level"]
-            new_level = AlertLevels.get_level(alert_level)["level"]
-            
-            if new_level > current_level:
-                self.system_status = alert_level
-            
-            # Send multi-channel alerts if service is configured
-            if self.multi_channel_service:
-                alert_results = self.send_multi_channel_alert(alert)
-                metadata['multi_channel_results'] = alert_results
+        Only validation and reading the upload happen on the caller's thread;
+        analysis, geocoding and alert delivery run on the pipeline workers.
+        
+        Args:
+            image_file: Uploaded image file
+            latitude: GPS latitude
+            longitude: GPS longitude
+            description: User description
+            phone_number: Contact number for alerts
             
-            # Send SMS alert if phone number provided and alert level is significant
-            if phone_number and alert_level in ["ORANGE", "RED"]:
-                alert_config = AlertLevels.get_level(alert_level)
-                alert_message = (
-                    f"🚨 CURSOR ALERT: {alert_config['description']} "
-                    f"detected at {location_name}. {alert_config['action']}"
-                )
-                self.send_sms_alert(phone_number, alert_message)
+        Returns:
+            Dictionary with the report ID to poll with get_report_status
+        """
+        try:
+            error = self._validate_upload(image_file, latitude, longitude)
+            if error:
+                return error
             
-            # Broadcast alert to all connected users
-            self.broadcast_alert(alert)
+            report_id = self.upload_pipeline.submit({
+                "image_data": image_file.read(),
+                "latitude": latitude,
+                "longitude": longitude,
+                "description": description,
+                "phone_number": phone_number,
+            })
+            if report_id is None:
+                return {"error": "Too many reports in progress, try again shortly", "status_code": 503}
             
             return {
                 "success": True,
-                "alert": asdict(alert),
-                "message": f"Hazard analysis complete. Alert level: {alert_level}",
-                "status_code": 200,
-                "hazard_details": {
-                    "type": hazard_type,
-                    "confidence": confidence,
-                    "location": location_name,
-                    "alert_level": alert_level
-                }
+                "report_id": report_id,
+                "status": "queued",
+                "message": "Report received, analysis in progress",
+                "status_code": 202
             }
             
         except Exception as e:
-            self.logger.error(f"Error processing upload: {str(e)}")
+            self.logger.error(f"Error accepting upload: {str(e)}")
             return {
-                "error": f"Processing failed: {str(e)}",
+                "error": f"Upload failed: {str(e)}",
                 "status_code": 500
             }
     
-    def get_active_alerts(self) -> List[Dict[str, Any]]:
+    def get_report_status(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the processing status of a submitted report
+        
+        Args:
+            report_id: ID returned by submit_image_upload
+            
+        Returns:
+            Status, current stage, per-stage timings and the result once finished,
+            or None if the report is unknown
+        """
+        return self.upload_pipeline.get_status(report_id)
+    
+    def get_incident_stats(self) -> Dict[str, Any]:
+        """
+        Get report clustering metrics
+        
+        Returns:
+            Reports seen, incidents created and live incidents
+        """
+        return self.incident_clusterer.get_stats()
+    
+    def get_pipeline_stats(self) -> Dict[str, Any]:
+        """
+        Get upload pipeline metrics
+        
+        Returns:
+            Queue depth, in-flight reports, counters, per-stage latency percentiles,
+            the detector's pre-filter cascade statistics and the alert outbox metrics
+        """
+        stats = self.upload_pipeline.get_stats()
+        stats["prefilter"] = self.hazard_detector.get_prefilter_stats()
+        if self.multi_channel_service:
+            stats["alert_outbox"] = self.multi_channel_service.get_outbox_stats()
+        return stats
+    
+    def get_active_alerts(self,
+                          hazard_type: Optional[str] = None,
+                          alert_level: Optional[str] = None,
+                          bbox: Optional[Tuple[float, float, float, float]] = None,
+                          since: Optional[str] = None,
+                          until: Optional[str] = None,
+                          cursor: Optional[int] = None,
+                          limit: Optional[int] = None,
+                          newest_first: bool = False) -> List[Dict[str, Any]]:
         """
-        Get all active alerts
+        Get active alerts, optionally filtered and paginated
         
+        Pass the id of the last alert of a page as ``cursor`` to fetch the next page.
+        
+        Args:
+            hazard_type: Only alerts of this hazard type
+            alert_level: Only alerts at this level
+            bbox: Only alerts inside (min_lat, min_lon, max_lat, max_lon)
+            since: Only alerts with an ISO timestamp at or after this
+            until: Only alerts with an ISO timestamp before this
+            cursor: Id of the last alert of the previous page
+            limit: Page size (None returns every match)
+            newest_first: Return the most recent alerts first
+            
         Returns:
             List of active alerts as dictionaries
         """
-        return [asdict(alert) for alert in self.active_alerts]
+        self._expire_alerts()
+        return self.alert_store.query(status="active", hazard_type=hazard_type, alert_level=alert_level,
+                                      bbox=bbox, since=since, until=until, cursor=cursor, limit=limit,
+                                      newest_first=newest_first)
+    
+    @property
+    def system_status(self) -> str:
+        """Highest alert level among active alerts"""
+        self._expire_alerts()
+        return self.level_tracker.status()["status"]
+    
+    def _expire_alerts(self) -> None:
+        """Archive alerts whose TTL has passed"""
+        for alert_id in self.level_tracker.pop_expired():
+            if self.alert_store.clear(alert_id, status="expired"):
+                self.logger.info(f"Alert {alert_id} expired")
     
     def get_system_status(self) -> Dict[str, Any]:
         """
         Get current system status
         
         Returns:
-            System status information
+            System status information, including per-level counts and
+            per-region status when regions are configured
         """
-        return {
-            "status": self.system_status,
-            "level_info": AlertLevels.get_level(self.system_status),
-            "active_alerts_count": len(self.active_alerts)
-        }
+        self._expire_alerts()
+        status = self.level_tracker.status()
+        status["level_info"] = AlertLevels.get_level(status["status"])
+        return status
     
     def clear_alert(self, alert_id: int) -> bool:
         """
@@ -607,23 +1232,24 @@ class CitizenReportingService:
         Returns:
             True if alert cleared successfully, False otherwise
         """
-        for i, alert in enumerate(self.active_alerts):
-            if alert.id == alert_id:
-                del self.active_alerts[i]
-                self.logger.info(f"Alert {alert_id} cleared")
-                return True
+        if self.alert_store.clear(alert_id):
+            self.level_tracker.remove(alert_id)
+            self.logger.info(f"Alert {alert_id} cleared")
+            return True
         
         return False
     
     def reset_system_status(self) -> None:
-        """Reset system status to GREEN"""
-        self.system_status = "GREEN"
-        self.logger.info("System status reset to GREEN")
+        """Reset system status to GREEN by clearing (archiving) every active alert"""
+        with self._alerts_lock:
+            cleared = self.alert_store.clear_all()
+            self.level_tracker.clear()
+        self.logger.info(f"System status reset to GREEN ({cleared} alerts cleared)")
 
 
 # Example usage in Flask app:
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from citizen_reporting import CitizenReportingService
 from multi_channel_alerts import MultiChannelAlertService
 
@@ -651,16 +1277,47 @@ def upload_image():
     description = request.form.get('description', '')
     phone_number = request.form.get('phone_number', '')
     
-    result = citizen_service.process_image_upload(
+    # Returns a report ID immediately; analysis and alerting run in the background
+    result = citizen_service.submit_image_upload(
         image_file, latitude, longitude, description, phone_number
     )
     
-    return jsonify(result), result.get('status_code', 200)
+    return jsonify(result), result.get('status_code', 202)
+
+@app.route('/reports/<report_id>', methods=['GET'])
+def get_report(report_id):
+    status = citizen_service.get_report_status(report_id)
+    if status is None:
+        return jsonify({"error": "Unknown report"}), 404
+    return jsonify(status)
+
+@app.route('/images/<image_id>', methods=['GET'])
+def get_image(image_id):
+    # Streams from disk; ?thumbnail=1 serves the small JPEG preview
+    thumbnail = request.args.get('thumbnail', type=int) == 1
+    try:
+        if not citizen_service.image_store.exists(image_id, thumbnail):
+            return jsonify({"error": "Unknown image"}), 404
+    except ValueError:
+        return jsonify({"error": "Invalid image id"}), 400
+    return Response(citizen_service.image_store.iter_chunks(image_id, thumbnail),
+                    mimetype="image/jpeg" if thumbnail else "application/octet-stream")
+
+@app.route('/pipeline', methods=['GET'])
+def get_pipeline_stats():
+    return jsonify(citizen_service.get_pipeline_stats())
 
 @app.route('/alerts', methods=['GET'])
 def get_alerts():
-    alerts = citizen_service.get_active_alerts()
-    return jsonify({"alerts": alerts})
+    alerts = citizen_service.get_active_alerts(
+        hazard_type=request.args.get('hazard_type'),
+        alert_level=request.args.get('alert_level'),
+        cursor=request.args.get('cursor', type=int),
+        limit=request.args.get('limit', default=100, type=int),
+        newest_first=True
+    )
+    next_cursor = alerts[-1]['id'] if alerts else None
+    return jsonify({"alerts": alerts, "next_cursor": next_cursor})
 
 @app.route('/status', methods=['GET'])
 def get_status():
@@ -683,7 +1340,7 @@ def main():
     
     # Initialize the service with multi-channel alerts
     try:
-        from multi_channel_alerts import MultiChannelAlertService
+        from multi_channel_alerts import DISPATCH_KEY, MultiChannelAlertService
         multi_channel_service = MultiChannelAlertService()
         print("✅ Multi-channel alert service initialized")
     except ImportError:
@@ -837,6 +1494,8 @@ def main():
             if alert_results:
                 print("✅ Multi-channel alert sent successfully!")
                 for channel_id, result in alert_results.items():
+                    if channel_id == DISPATCH_KEY:
+                        continue
                     if result.get('sent'):
                         print(f"  ✅ {channel_id}: Alert sent successfully")
                     else:
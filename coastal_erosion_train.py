@@ -2,12 +2,14 @@ import pandas as pd  # type: ignore
 import os
 import joblib  # type: ignore
 import json
+import sys
 import matplotlib.pyplot as plt  # type: ignore
 import seaborn as sns  # type: ignore
 from sklearn.ensemble import RandomForestRegressor  # type: ignore
 from sklearn.model_selection import train_test_split  # type: ignore
 from sklearn.metrics import mean_squared_error, r2_score  # type: ignore
 import numpy as np # type: ignore
+from model_evaluation import CrossValidator, REGRESSION_METRICS, update_metrics_file
 
 class CoastalErosionModel:
 
@@ -36,12 +38,15 @@ class CoastalErosionModel:
         np.random.seed(42)
         self.data["Erosion_Change"] = self.data["SHAPE_Leng"] * 0.01 + np.random.normal(0, 0.1, len(self.data))
 
+    def build_model(self):
+        return RandomForestRegressor(max_depth=15, n_estimators=200, random_state=42)
+
     def train_model(self):
         features = ["Category_o", "Nature_of_", "Status", "Water_Leve", "Scale_Mini", "SHAPE_Leng"]
         X = self.data[features]
         y = self.data["Erosion_Change"]
 
-        self.model = RandomForestRegressor(max_depth=15, n_estimators=200, random_state=42)
+        self.model = self.build_model()
 
         # Train-test split
         X_train, X_test, y_train, y_test = train_test_split(
@@ -72,6 +77,20 @@ class CoastalErosionModel:
 
         print("✅ Training done. Artifacts saved in /artifacts/coastal_erosion folder.")
 
+    def cross_validate_model(self, n_splits=5, n_jobs=-1):
+        features = ["Category_o", "Nature_of_", "Status", "Water_Leve", "Scale_Mini", "SHAPE_Leng"]
+        X = self.data[features]
+        y = self.data["Erosion_Change"]
+
+        # Folds are fitted in parallel and cached under artifacts/coastal_erosion/cv_cache
+        validator = CrossValidator(self.build_model(), "artifacts/coastal_erosion/cv_cache",
+                                   n_splits=n_splits, stratify=False, n_jobs=n_jobs)
+        results = validator.evaluate(X, y, REGRESSION_METRICS)
+        update_metrics_file("artifacts/coastal_erosion/metrics.json", "cross_validation", results)
+
+        print(f"✅ {n_splits}-fold CV done ({results['folds_refit']} refit, {results['folds_cached']} cached).")
+        return results
+
     def save_model(self, path="models/coastal_erosion_rf.pkl"):
         os.makedirs("models", exist_ok=True)
         if self.model is not None:
@@ -81,6 +100,9 @@ class CoastalErosionModel:
 
 def main():
     erosion_model = CoastalErosionModel("data/shoreline.csv")
+    if "--cv" in sys.argv:
+        erosion_model.cross_validate_model()
+        return
     erosion_model.train_model()
     erosion_model.save_model("models/coastal_erosion_rf.pkl")
 
@@ -0,0 +1,282 @@
+"""
+Local stand-in servers for benchmarking and testing the alert channels
+
+Each server listens on 127.0.0.1 on a free port, runs in a background thread
+and records what it received. Optional delays stand in for the network and
+handshake costs of the real providers.
+"""
+
+import base64
+import http.server
+import itertools
+import json
+import socketserver
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import parse_qs
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough of RFC 5321 for smtplib: EHLO, AUTH, MAIL, RCPT, DATA, NOOP, RSET, QUIT"""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self) -> None:
+        server: "LocalSMTPServer" = self.server  # type: ignore
+        server.track(self.connection, add=True)
+        try:
+            time.sleep(server.connect_delay)
+            server.count("connections")
+            self._reply("220 localhost stand-in ESMTP")
+
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                command = line.decode(errors="replace").strip().split(" ", 1)[0].upper()
+
+                if command in ("EHLO", "HELO"):
+                    self._reply("250-localhost")
+                    self._reply("250-AUTH PLAIN LOGIN")
+                    self._reply("250 8BITMIME")
+                elif command == "AUTH":
+                    time.sleep(server.auth_delay)
+                    server.count("logins")
+                    self._reply("235 2.7.0 Authentication successful")
+                elif command == "NOOP":
+                    server.count("noops")
+                    self._reply("250 OK")
+                elif command in ("MAIL", "RCPT", "RSET"):
+                    self._reply("250 OK")
+                elif command == "DATA":
+                    self._reply("354 End data with <CR><LF>.<CR><LF>")
+                    while self.rfile.readline() not in (b".\r\n", b""):
+                        pass
+                    server.count("messages")
+                    self._reply("250 OK queued")
+                elif command == "QUIT":
+                    self._reply("221 Bye")
+                    return
+                else:
+                    self._reply("502 Command not implemented")
+        except OSError:
+            return
+        finally:
+            server.track(self.connection, add=False)
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """Threaded SMTP sink counting connections, logins, NOOPs and messages"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, connect_delay: float = 0.0, auth_delay: float = 0.0):
+        """
+        Start listening on a free localhost port
+
+        Args:
+            connect_delay: Seconds before the greeting (stands in for TCP + TLS setup)
+            auth_delay: Seconds before answering AUTH
+        """
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.connect_delay = connect_delay
+        self.auth_delay = auth_delay
+        self.port = self.server_address[1]
+        self.stats: Dict[str, int] = {"connections": 0, "logins": 0, "noops": 0, "messages": 0}
+        self._sockets: Set[Any] = set()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def track(self, sock: Any, add: bool) -> None:
+        with self._lock:
+            (self._sockets.add if add else self._sockets.discard)(sock)
+
+    def drop_connections(self) -> None:
+        """Abruptly close every open client session, as a server restart would"""
+        with self._lock:
+            sockets = list(self._sockets)
+        for sock in sockets:
+            try:
+                sock.shutdown(2)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "LocalSMTPServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+        self.drop_connections()
+        self.server_close()
+
+
+class _TwilioHandler(http.server.BaseHTTPRequestHandler):
+    """Twilio REST stand-in for Messages.json and Calls.json"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _respond(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        server: "LocalTwilioServer" = self.server  # type: ignore
+        length = int(self.headers.get("Content-Length", 0))
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+
+        expected = "Basic " + base64.b64encode(f"{server.account_sid}:{server.auth_token}".encode()).decode()
+        if self.headers.get("Authorization") != expected:
+            self._respond(401, {"code": 20003, "message": "Authenticate", "status": 401})
+            return
+
+        resource = self.path.rsplit("/", 1)[-1]
+        if resource not in ("Messages.json", "Calls.json"):
+            self._respond(404, {"code": 20404, "message": "Not found", "status": 404})
+            return
+
+        server.enter()
+        try:
+            time.sleep(server.latency)
+        finally:
+            server.leave()
+
+        if form.get("To") in server.fail_numbers:
+            self._respond(400, {"code": 21211, "message": f"Invalid 'To' Phone Number: {form.get('To')}",
+                                "status": 400})
+            return
+
+        prefix = "SM" if resource == "Messages.json" else "CA"
+        sid = f"{prefix}{next(server.sids):032x}"
+        server.record(resource, form)
+        self._respond(201, {"sid": sid, "to": form.get("To"), "from": form.get("From"), "status": "queued"})
+
+
+class LocalTwilioServer(http.server.ThreadingHTTPServer):
+    """Threaded Twilio REST stand-in recording requests and peak concurrency"""
+
+    daemon_threads = True
+
+    def __init__(self,
+                 account_sid: str = "ACtest",
+                 auth_token: str = "token",
+                 latency: float = 0.0,
+                 fail_numbers: Optional[Set[str]] = None):
+        """
+        Start listening on a free localhost port
+
+        Args:
+            account_sid: Account SID clients must authenticate with
+            auth_token: Auth token clients must authenticate with
+            latency: Seconds each API request takes
+            fail_numbers: Recipient numbers answered with a 400 error
+        """
+        super().__init__(("127.0.0.1", 0), _TwilioHandler)
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.latency = latency
+        self.fail_numbers = set(fail_numbers or ())
+        self.base_url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.requests: Dict[str, List[Dict[str, str]]] = {"Messages.json": [], "Calls.json": []}
+        self.sids = itertools.count(1)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def enter(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def record(self, resource: str, form: Dict[str, str]) -> None:
+        with self._lock:
+            self.requests[resource].append(form)
+
+    def __enter__(self) -> "LocalTwilioServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class _WebhookHandler(http.server.BaseHTTPRequestHandler):
+    """Webhook receiver that can fail the first requests on each path"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        server: "LocalWebhookServer" = self.server  # type: ignore
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        time.sleep(server.latency)
+
+        status = server.receive(self.path, dict(self.headers), body)
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class LocalWebhookServer(http.server.ThreadingHTTPServer):
+    """Threaded webhook receiver recording deliveries per path"""
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0, fail_first: int = 0, fail_status: int = 503):
+        """
+        Start listening on a free localhost port
+
+        Args:
+            latency: Seconds each request takes
+            fail_first: Requests answered with fail_status on each path before succeeding
+            fail_status: Status code of the failed requests
+        """
+        super().__init__(("127.0.0.1", 0), _WebhookHandler)
+        self.latency = latency
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.base_url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.attempts: Dict[str, int] = {}
+        self.deliveries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def receive(self, path: str, headers: Dict[str, str], body: bytes) -> int:
+        """Record a request and pick its status code"""
+        with self._lock:
+            self.attempts[path] = self.attempts.get(path, 0) + 1
+            if self.attempts[path] <= self.fail_first:
+                return self.fail_status
+            self.deliveries.append({"path": path, "headers": headers, "json": json.loads(body or b"{}")})
+            return 200
+
+    def __enter__(self) -> "LocalWebhookServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+        self.server_close()
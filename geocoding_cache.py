@@ -0,0 +1,241 @@
+"""
+Shared reverse-geocoding cache
+
+Lookups are keyed on latitude/longitude rounded to a configurable number of
+decimal places, so every report from the same stretch of beach resolves to
+one cache cell. Cells live in an in-memory LRU backed by an on-disk SQLite
+store, expire after a TTL, and concurrent lookups of the same cell are
+coalesced into a single geocoder request.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+# Geocoder callback: returns an address, or None when the geocoder has no match.
+# Raising means the lookup failed and nothing is cached.
+Resolver = Callable[[float, float], Optional[str]]
+
+
+class _PendingLookup:
+    """A geocoder request other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Optional[str] = None
+        self.error: Optional[Exception] = None
+
+
+class GeocodingCache:
+    """Two-level (memory LRU + SQLite) reverse-geocoding cache"""
+
+    def __init__(self,
+                 db_path: str = "cache/geocoding.sqlite3",
+                 precision: int = 3,
+                 ttl_seconds: float = 30 * 24 * 3600,
+                 max_memory_entries: int = 4096):
+        """
+        Initialize the geocoding cache
+
+        Args:
+            db_path: SQLite file for the persistent store (":memory:" for none)
+            precision: Decimal places kept when quantizing coordinates (3 ~ 110 m)
+            ttl_seconds: Age after which a cached address is refreshed
+            max_memory_entries: Capacity of the in-memory LRU
+        """
+        self.db_path = db_path
+        self.precision = precision
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.logger = logging.getLogger(__name__)
+
+        self._memory: "OrderedDict[Tuple[float, float], Tuple[Optional[str], float]]" = OrderedDict()
+        self._inflight: Dict[Tuple[float, float], _PendingLookup] = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "coalesced": 0,
+            "stale_served": 0,
+            "errors": 0,
+        }
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            " lat REAL NOT NULL, lon REAL NOT NULL, address TEXT, fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (lat, lon))"
+        )
+        self._db.commit()
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[float, float]:
+        """Quantize coordinates to the cache cell"""
+        return round(latitude, self.precision), round(longitude, self.precision)
+
+    def _is_fresh(self, fetched_at: float) -> bool:
+        return time.time() - fetched_at < self.ttl_seconds
+
+    def _remember(self, cell: Tuple[float, float], address: Optional[str], fetched_at: float) -> None:
+        """Insert into the memory LRU, evicting the least recently used cell (caller holds lock)"""
+        self._memory[cell] = (address, fetched_at)
+        self._memory.move_to_end(cell)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, cell: Tuple[float, float]) -> Optional[Tuple[Optional[str], float]]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT address, fetched_at FROM geocode WHERE lat = ? AND lon = ?", cell
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _store(self, cell: Tuple[float, float], address: Optional[str], fetched_at: float) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO geocode (lat, lon, address, fetched_at) VALUES (?, ?, ?, ?)",
+                (cell[0], cell[1], address, fetched_at)
+            )
+            self._db.commit()
+
+    def _cached(self, cell: Tuple[float, float]) -> Tuple[bool, Optional[Tuple[Optional[str], float]]]:
+        """
+        Look a cell up in memory, then on disk
+
+        Returns:
+            Tuple of (fresh, entry) where entry may be an expired (address, fetched_at)
+        """
+        with self._lock:
+            cached = self._memory.get(cell)
+            if cached and self._is_fresh(cached[1]):
+                self._memory.move_to_end(cell)
+                self._stats["memory_hits"] += 1
+                return True, cached
+
+        if cached is None:
+            cached = self._load(cell)
+            if cached and self._is_fresh(cached[1]):
+                with self._lock:
+                    self._remember(cell, *cached)
+                    self._stats["disk_hits"] += 1
+                return True, cached
+
+        return False, cached
+
+    def peek(self, latitude: float, longitude: float) -> Tuple[bool, Optional[str]]:
+        """
+        Check for a fresh cached address without ever calling the geocoder
+
+        Args:
+            latitude: GPS latitude
+            longitude: GPS longitude
+
+        Returns:
+            Tuple of (found, address)
+        """
+        fresh, entry = self._cached(self._cell(latitude, longitude))
+        return (True, entry[0]) if fresh else (False, None)
+
+    def lookup(self, latitude: float, longitude: float, resolver: Resolver) -> Optional[str]:
+        """
+        Resolve coordinates to an address, going to the geocoder only on a miss
+
+        Args:
+            latitude: GPS latitude
+            longitude: GPS longitude
+            resolver: Geocoder callback used on a miss or an expired entry
+
+        Returns:
+            Address string, or None if it could not be resolved
+        """
+        cell = self._cell(latitude, longitude)
+        fresh, stale = self._cached(cell)
+        if fresh:
+            return stale[0]
+
+        # Coalesce concurrent misses for the same cell into one geocoder call
+        with self._lock:
+            pending = self._inflight.get(cell)
+            owner = pending is None
+            if owner:
+                pending = _PendingLookup()
+                self._inflight[cell] = pending
+                self._stats["refreshes" if stale else "misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not owner:
+            pending.done.wait()
+        else:
+            try:
+                pending.value = resolver(latitude, longitude)
+                fetched_at = time.time()
+                self._store(cell, pending.value, fetched_at)
+                with self._lock:
+                    self._remember(cell, pending.value, fetched_at)
+            except Exception as e:
+                pending.error = e
+                self.logger.warning(f"Reverse geocoding failed for {cell}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._inflight.pop(cell, None)
+                    if pending.error is not None:
+                        self._stats["errors"] += 1
+                pending.done.set()
+
+        if pending.error is None:
+            return pending.value
+
+        # Geocoder is down: an expired address beats none at all
+        if stale is not None:
+            with self._lock:
+                self._stats["stale_served"] += 1
+            return stale[0]
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache hit-rate metrics
+
+        Returns:
+            Counters plus overall hit rate and current memory occupancy
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+
+        hits = stats["memory_hits"] + stats["disk_hits"] + stats["coalesced"]
+        lookups = hits + stats["misses"] + stats["refreshes"]
+        stats["lookups"] = lookups
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+
+_shared_cache: Optional[GeocodingCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_geocoding_cache() -> GeocodingCache:
+    """
+    Get the process-wide geocoding cache, configured from environment variables
+
+    GEOCODE_CACHE_PATH, GEOCODE_PRECISION and GEOCODE_TTL_SECONDS override the defaults.
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = GeocodingCache(
+                db_path=os.getenv("GEOCODE_CACHE_PATH", "cache/geocoding.sqlite3"),
+                precision=int(os.getenv("GEOCODE_PRECISION", "3")),
+                ttl_seconds=float(os.getenv("GEOCODE_TTL_SECONDS", str(30 * 24 * 3600)))
+            )
+        return _shared_cache
@@ -0,0 +1,282 @@
+"""
+Image feature extraction for the hazard detection models
+
+All per-hazard feature vectors are produced from a single decoded image in one
+pass: grayscale is computed once in float32, block statistics come from
+reshape-based reductions, channel moments from one sum / sum-of-squares pass
+over planar channels, and edge statistics reuse per-thread scratch buffers.
+"""
+
+import hashlib
+import io
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np #type: ignore
+from PIL import Image #type: ignore
+
+
+IMAGE_SIZE = 224
+BLOCK_GRID = 5
+BLOCK_SIZE = 44
+
+# Minimum vector widths per model; shorter vectors are padded with noise
+SAR_FEATURE_COUNT = 48
+COLOR_FEATURE_COUNT = 6
+EROSION_FEATURE_COUNT = 6
+
+# Downscale with integer box reduction until within this factor of the target
+REDUCING_GAP = 2.0
+
+# dHash compares horizontally adjacent pixels of a (HASH_SIZE + 1) x HASH_SIZE thumbnail
+HASH_SIZE = 8
+
+
+def decode_image(image_data: bytes, size: int = IMAGE_SIZE) -> np.ndarray:
+    """
+    Decode image bytes straight to a size x size RGB array
+
+    JPEGs are decoded in draft mode, letting libjpeg downscale by 1/2, 1/4 or
+    1/8 in the DCT domain so a 12 MP photo is never fully materialized. Other
+    formats are converted to RGB and shrunk with a cheap integer reduction
+    before the final resample.
+
+    Args:
+        image_data: Raw image bytes
+        size: Output width and height in pixels
+
+    Returns:
+        uint8 array of shape (size, size, 3)
+    """
+    image = Image.open(io.BytesIO(image_data))
+
+    if image.format == 'JPEG':
+        # Picks the largest DCT scale that still yields at least size x size
+        image.draft('RGB', (size, size))
+
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    image = image.resize((size, size), reducing_gap=REDUCING_GAP)
+    return np.asarray(image, dtype=np.uint8)
+
+
+def decode_full_image(image_data: bytes) -> np.ndarray:
+    """
+    Decode image bytes to an RGB array at full resolution
+
+    Args:
+        image_data: Raw image bytes
+
+    Returns:
+        uint8 array of shape (height, width, 3)
+    """
+    image = Image.open(io.BytesIO(image_data))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return np.asarray(image, dtype=np.uint8)
+
+
+def content_digest(image_data: bytes) -> str:
+    """Exact content hash of the uploaded bytes"""
+    return hashlib.blake2b(image_data, digest_size=16).hexdigest()
+
+
+def perceptual_hash(pixels: np.ndarray) -> int:
+    """
+    64-bit difference hash (dHash) of a decoded image
+
+    The image is reduced to a 9x8 grayscale thumbnail and each bit records
+    whether a pixel is brighter than its right-hand neighbour, so re-encoding,
+    rescaling and mild edits leave most bits unchanged.
+
+    Args:
+        pixels: RGB image as a uint8 array of shape (height, width, 3)
+
+    Returns:
+        Hash as a 64-bit integer
+    """
+    thumbnail = Image.fromarray(pixels).convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.BOX)
+    gray = np.asarray(thumbnail, dtype=np.int16)
+    bits = (gray[:, 1:] > gray[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class ImageFeatureExtractor:
+    """Single-pass feature engine shared by all hazard models"""
+
+    def __init__(self):
+        """Initialize the extractor with per-thread scratch buffers"""
+        self._local = threading.local()
+
+    def _buffers(self, height: int, width: int) -> Dict[str, np.ndarray]:
+        """Get scratch buffers for the given image shape, allocating on first use"""
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None or buffers["shape"] != (height, width):
+            buffers = {
+                "shape": (height, width),
+                "planes": np.empty((3, height, width), dtype=np.float32),
+                "gray": np.empty((height, width), dtype=np.float32),
+                "ones": np.ones(height * width, dtype=np.float32),
+                "diff_rows": np.empty((height - 1, width), dtype=np.float32),
+                "diff_cols": np.empty((height, width - 1), dtype=np.float32),
+            }
+            self._local.buffers = buffers
+        return buffers
+
+    def extract(self, pixels: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Extract the feature vectors for every hazard type
+
+        Args:
+            pixels: RGB image as a uint8 array of shape (height, width, 3)
+
+        Returns:
+            Dictionary mapping hazard type to a 1-row feature matrix
+        """
+        height, width = pixels.shape[:2]
+        buf = self._buffers(height, width)
+        n_pixels = height * width
+        ones = buf["ones"]
+
+        # Normalized channel planes; planar layout keeps every reduction contiguous
+        planes = np.multiply(pixels.transpose(2, 0, 1), np.float32(1.0 / 255.0),
+                             out=buf["planes"], casting="unsafe")
+        flat = planes.reshape(3, n_pixels)
+
+        # Grayscale, computed exactly once
+        gray = np.add(planes[0], planes[1], out=buf["gray"])
+        np.add(gray, planes[2], out=gray)
+        np.multiply(gray, np.float32(1.0 / 3.0), out=gray)
+        gray_flat = gray.reshape(n_pixels)
+
+        # Channel moments from one sum / sum-of-squares pass
+        channel_sum = (flat @ ones).astype(np.float64)
+        channel_sq = np.array([np.dot(plane, plane) for plane in flat], dtype=np.float64)
+        channel_mean = channel_sum / n_pixels
+        channel_var = np.maximum(channel_sq / n_pixels - channel_mean ** 2, 0.0)
+        channel_std = np.sqrt(channel_var)
+
+        rgb_mean = channel_sum.sum() / (3 * n_pixels)
+        rgb_var = max(channel_sq.sum() / (3 * n_pixels) - rgb_mean ** 2, 0.0)
+
+        # Grayscale moments
+        gray_mean = float(np.dot(gray_flat, ones)) / n_pixels
+        gray_var = max(float(np.dot(gray_flat, gray_flat)) / n_pixels - gray_mean ** 2, 0.0)
+        gray_std = gray_var ** 0.5
+        gray_stats = [gray_mean, gray_std, gray_var, float(gray.max()), float(gray.min())]
+
+        # 5x5 block means via a reshape-based reduction
+        span = BLOCK_GRID * BLOCK_SIZE
+        blocks = gray[:span, :span].reshape(BLOCK_GRID, BLOCK_SIZE, BLOCK_GRID, BLOCK_SIZE)
+        block_means = blocks.sum(axis=(1, 3), dtype=np.float64).ravel() / (BLOCK_SIZE * BLOCK_SIZE)
+
+        # Edge strength from absolute first differences, reusing scratch buffers
+        diff_rows = np.abs(np.subtract(gray[1:], gray[:-1], out=buf["diff_rows"]), out=buf["diff_rows"])
+        diff_cols = np.abs(np.subtract(gray[:, 1:], gray[:, :-1], out=buf["diff_cols"]), out=buf["diff_cols"])
+        edge_stats = [float(diff_rows.sum(dtype=np.float64)) / diff_rows.size,
+                      float(diff_cols.sum(dtype=np.float64)) / diff_cols.size]
+
+        sar = np.concatenate([gray_stats, block_means])
+        color = np.column_stack([channel_mean, channel_std, channel_var]).ravel()
+        color = np.concatenate([color, [rgb_mean, rgb_var ** 0.5, rgb_var]])
+        erosion = np.array(gray_stats[:3] + edge_stats)
+
+        return {
+            "oil_spill": self._pad(sar, SAR_FEATURE_COUNT),
+            "algal_bloom": self._pad(color, COLOR_FEATURE_COUNT),
+            "coastal_erosion": self._pad(erosion, EROSION_FEATURE_COUNT),
+        }
+
+    @staticmethod
+    def _pad(features: np.ndarray, size: int) -> np.ndarray:
+        """Pad a feature vector with random values up to the model input size"""
+        if len(features) < size:
+            features = np.concatenate([features, np.random.random(size - len(features))])
+        return features.reshape(1, -1)
+
+
+_process_extractor = None
+
+
+def extract_image_features(image_data: bytes) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Decode image bytes and extract every hazard's feature vector
+
+    Module-level so it can run inside a process pool; each worker process
+    keeps its own extractor and scratch buffers.
+
+    Args:
+        image_data: Raw image bytes
+
+    Returns:
+        Dictionary mapping hazard type to a 1-row feature matrix, or None if decoding failed
+    """
+    result = extract_image_features_with_hash(image_data)
+    return result[0] if result else None
+
+
+def extract_image_features_with_hash(image_data: bytes) -> Optional[Tuple[Dict[str, np.ndarray], int]]:
+    """
+    Decode image bytes once and return both the feature vectors and the perceptual hash
+
+    Args:
+        image_data: Raw image bytes
+
+    Returns:
+        Tuple of (features, perceptual hash), or None if decoding failed
+    """
+    global _process_extractor
+    if _process_extractor is None:
+        _process_extractor = ImageFeatureExtractor()
+
+    try:
+        pixels = decode_image(image_data)
+        return _process_extractor.extract(pixels), perceptual_hash(pixels)
+    except Exception:
+        return None
+
+
+def tile_origins(length: int, tile_size: int, stride: int) -> List[int]:
+    """
+    Tile start offsets along one axis, with a final tile flush against the far edge
+
+    Args:
+        length: Image extent along the axis (at least tile_size)
+        tile_size: Tile extent in pixels
+        stride: Step between tile starts
+
+    Returns:
+        Sorted list of start offsets
+    """
+    origins = list(range(0, length - tile_size + 1, stride))
+    if origins[-1] != length - tile_size:
+        origins.append(length - tile_size)
+    return origins
+
+
+def extract_strip_features(strip: np.ndarray, xs: List[int], tile_size: int = IMAGE_SIZE) -> Dict[str, np.ndarray]:
+    """
+    Extract features for a row of tiles cut from one horizontal strip
+
+    Tiles are strided views into the strip, so no tile is copied before the
+    extractor's own planar conversion. Module-level so it can run inside a
+    process pool.
+
+    Args:
+        strip: RGB uint8 array of shape (tile_size, width, 3)
+        xs: Left edge of each tile
+        tile_size: Tile width and height
+
+    Returns:
+        Dictionary mapping hazard type to an (len(xs), n_features) matrix
+    """
+    global _process_extractor
+    if _process_extractor is None:
+        _process_extractor = ImageFeatureExtractor()
+
+    # (width - tile_size + 1, 3, tile_size, tile_size) view; no data is copied
+    windows = np.lib.stride_tricks.sliding_window_view(strip, (tile_size, tile_size), axis=(0, 1))[0]
+    rows = [_process_extractor.extract(windows[x].transpose(1, 2, 0)) for x in xs]
+    return {hazard_type: np.vstack([row[hazard_type] for row in rows]) for hazard_type in rows[0]}
+
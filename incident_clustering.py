@@ -0,0 +1,156 @@
+"""
+Spatio-temporal clustering of citizen reports into incidents
+
+Reports of the same hazard type that land in the same or an adjacent grid
+cell within a time window are folded into one incident. Incidents are indexed
+by (hazard type, grid cell) in a dict, so matching a report costs a fixed
+nine lookups, and they are kept in last-seen order so expired incidents are
+dropped from the front in amortized constant time.
+"""
+
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+
+KM_PER_DEGREE = 111.32
+
+
+@dataclass
+class Incident:
+    """Data class for a cluster of reports describing the same hazard"""
+    incident_id: int
+    hazard_type: str
+    cell: Tuple[int, int]
+    latitude: float
+    longitude: float
+    confidence: float
+    mean_confidence: float
+    report_count: int
+    first_seen: float
+    last_seen: float
+    alert: Any = None
+
+
+class IncidentClusterer:
+    """Incremental grid + time-window clustering of hazard reports"""
+
+    def __init__(self, cell_degrees: float = 0.005, window_seconds: float = 2 * 3600):
+        """
+        Initialize the clusterer
+
+        Args:
+            cell_degrees: Grid cell size in degrees (0.005 ~ 550 m)
+            window_seconds: Reports this long after an incident's last report start a new incident
+        """
+        self.cell_degrees = cell_degrees
+        self.window_seconds = window_seconds
+
+        self._by_cell: Dict[Tuple[str, int, int], Incident] = {}
+        self._by_recency: "OrderedDict[int, Incident]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stats = {"reports": 0, "incidents": 0}
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return int(latitude // self.cell_degrees), int(longitude // self.cell_degrees)
+
+    def _expire(self, now: float) -> None:
+        """Drop incidents with no report inside the window (caller holds lock)"""
+        cutoff = now - self.window_seconds
+        while self._by_recency:
+            incident = next(iter(self._by_recency.values()))
+            if incident.last_seen >= cutoff:
+                break
+            self._by_recency.popitem(last=False)
+            key = (incident.hazard_type,) + incident.cell
+            if self._by_cell.get(key) is incident:
+                del self._by_cell[key]
+
+    def _match(self, hazard_type: str, latitude: float, longitude: float) -> Optional[Incident]:
+        """Nearest live incident of this hazard in the report's cell or its neighbours (caller holds lock)"""
+        row, col = self._cell(latitude, longitude)
+        cos_lat = math.cos(math.radians(latitude))
+
+        best, best_distance = None, float('inf')
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                incident = self._by_cell.get((hazard_type, row + d_row, col + d_col))
+                if incident is None:
+                    continue
+                distance = math.hypot(incident.latitude - latitude, (incident.longitude - longitude) * cos_lat)
+                if distance < best_distance:
+                    best, best_distance = incident, distance
+        return best
+
+    def observe(self,
+                hazard_type: str,
+                latitude: float,
+                longitude: float,
+                confidence: float,
+                timestamp: Optional[float] = None) -> Tuple[Incident, bool]:
+        """
+        Fold a report into a matching incident, or start a new one
+
+        Args:
+            hazard_type: Detected hazard type
+            latitude: Report latitude
+            longitude: Report longitude
+            confidence: Detection confidence
+            timestamp: Report time in epoch seconds (defaults to now)
+
+        Returns:
+            Tuple of (incident, created)
+        """
+        now = time.time() if timestamp is None else timestamp
+
+        with self._lock:
+            self._expire(now)
+            self._stats["reports"] += 1
+
+            incident = self._match(hazard_type, latitude, longitude)
+            if incident is None:
+                incident = Incident(
+                    incident_id=next(self._ids),
+                    hazard_type=hazard_type,
+                    cell=self._cell(latitude, longitude),
+                    latitude=latitude,
+                    longitude=longitude,
+                    confidence=confidence,
+                    mean_confidence=confidence,
+                    report_count=1,
+                    first_seen=now,
+                    last_seen=now
+                )
+                self._by_cell[(hazard_type,) + incident.cell] = incident
+                self._by_recency[incident.incident_id] = incident
+                self._stats["incidents"] += 1
+                return incident, True
+
+            # Running centroid and confidence; the strongest detection sets the incident confidence
+            n = incident.report_count + 1
+            incident.latitude += (latitude - incident.latitude) / n
+            incident.longitude += (longitude - incident.longitude) / n
+            incident.mean_confidence += (confidence - incident.mean_confidence) / n
+            incident.confidence = max(incident.confidence, confidence)
+            incident.report_count = n
+            incident.last_seen = max(incident.last_seen, now)
+            self._by_recency.move_to_end(incident.incident_id)
+            return incident, False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get clustering metrics
+
+        Returns:
+            Reports seen, incidents created, live incidents and reports per incident
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["live_incidents"] = len(self._by_recency)
+        stats["reports_per_incident"] = stats["reports"] / stats["incidents"] if stats["incidents"] else 0.0
+        return stats
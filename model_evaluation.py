@@ -0,0 +1,190 @@
+"""
+K-fold evaluation for the hazard models
+
+Fits each fold in a separate worker process and caches its test-set
+predictions on disk. A cache entry is keyed by a hash of the fold's train and
+test data and the estimator's fitting parameters, and a fold is refit exactly
+when one of those changes. Parameters that do not change the fitted model
+(n_jobs, verbose) are left out of the key. Because folds share training rows,
+editing or adding any row changes almost every fold's training set, so in
+practice the cache saves exact re-runs and re-runs that only change
+non-fitting parameters; it does not make data edits incremental.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import joblib #type: ignore
+import numpy as np #type: ignore
+from sklearn.base import clone #type: ignore
+from sklearn.model_selection import KFold, StratifiedKFold #type: ignore
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score #type: ignore
+from sklearn.metrics import mean_squared_error, r2_score #type: ignore
+
+
+CLASSIFICATION_METRICS: Dict[str, Callable] = {
+    "accuracy": accuracy_score,
+    "precision": lambda y_true, y_pred: precision_score(y_true, y_pred, zero_division=0),
+    "recall": lambda y_true, y_pred: recall_score(y_true, y_pred, zero_division=0),
+    "f1_score": lambda y_true, y_pred: f1_score(y_true, y_pred, zero_division=0),
+}
+
+REGRESSION_METRICS: Dict[str, Callable] = {
+    "mse": mean_squared_error,
+    "r2_score": r2_score,
+}
+
+# Estimator parameters (also as the last part of nested names like "model__n_jobs")
+# that affect how a model is fitted but not the fitted model itself
+NON_FITTING_PARAMS = {"n_jobs", "verbose"}
+
+
+def _fit_fold(estimator, X_train, y_train, X_test, cache_prefix: str) -> np.ndarray:
+    """Fit one fold, cache its test-set predictions and return them"""
+    model = clone(estimator)
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+
+    # Written under a temporary name and renamed, so a present entry is always complete
+    with open(f"{cache_prefix}.pred.tmp.npy", "wb") as f:
+        np.save(f, y_pred)
+    os.replace(f"{cache_prefix}.pred.tmp.npy", f"{cache_prefix}.pred.npy")
+    return y_pred
+
+
+class CrossValidator:
+    """K-fold evaluator with parallel fold fitting and fold-level caching"""
+
+    def __init__(self,
+                 estimator,
+                 cache_dir: str,
+                 n_splits: int = 5,
+                 stratify: bool = True,
+                 n_jobs: int = -1,
+                 random_state: int = 42):
+        """
+        Initialize the cross validator
+
+        Args:
+            estimator: Unfitted scikit-learn estimator used as a template for every fold
+            cache_dir: Directory holding cached fold results
+            n_splits: Number of folds
+            stratify: Use stratified folds (classification only)
+            n_jobs: Number of worker processes (-1 uses all cores)
+            random_state: Seed for the fold shuffle
+        """
+        self.estimator = estimator
+        self.cache_dir = cache_dir
+        self.n_splits = n_splits
+        self.stratify = stratify
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.logger = logging.getLogger(__name__)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _split(self, X, y):
+        """Generate train/test indices for each fold"""
+        if self.stratify:
+            splitter = StratifiedKFold(n_splits=self.n_splits, shuffle=True, random_state=self.random_state)
+        else:
+            splitter = KFold(n_splits=self.n_splits, shuffle=True, random_state=self.random_state)
+        return list(splitter.split(X, y))
+
+    def _fold_key(self, X_train, y_train, X_test) -> str:
+        """Hash a fold's data together with the estimator type and fitting parameters"""
+        params = {name: value for name, value in self.estimator.get_params().items()
+                  if name.rsplit("__", 1)[-1] not in NON_FITTING_PARAMS}
+        return joblib.hash((
+            type(self.estimator).__name__,
+            params,
+            X_train,
+            y_train,
+            X_test,
+        ))
+
+    def evaluate(self, X, y, metrics: Dict[str, Callable]) -> Dict[str, Any]:
+        """
+        Run k-fold evaluation
+
+        Args:
+            X: Feature matrix (DataFrame or array)
+            y: Target vector
+            metrics: Mapping of metric name to ``metric(y_true, y_pred)``
+
+        Returns:
+            Dictionary with per-fold metrics, their mean/variance and cache statistics
+        """
+        X = np.asarray(X)
+        y = np.asarray(y)
+        folds = self._split(X, y)
+
+        fold_preds: List[Optional[np.ndarray]] = [None] * len(folds)
+        pending = []
+
+        for i, (train_idx, test_idx) in enumerate(folds):
+            X_train, y_train, X_test = X[train_idx], y[train_idx], X[test_idx]
+            cache_prefix = os.path.join(self.cache_dir, self._fold_key(X_train, y_train, X_test))
+
+            if os.path.exists(f"{cache_prefix}.pred.npy"):
+                try:
+                    fold_preds[i] = np.load(f"{cache_prefix}.pred.npy")
+                    continue
+                except Exception as e:
+                    self.logger.warning(f"Discarding unreadable fold cache {cache_prefix}: {str(e)}")
+
+            pending.append((i, X_train, y_train, X_test, cache_prefix))
+
+        if pending:
+            self.logger.info(f"Fitting {len(pending)}/{len(folds)} folds ({len(folds) - len(pending)} cached)")
+            fitted = joblib.Parallel(n_jobs=self.n_jobs)(
+                joblib.delayed(_fit_fold)(self.estimator, X_train, y_train, X_test, cache_prefix)
+                for _, X_train, y_train, X_test, cache_prefix in pending
+            )
+            for (i, *_), y_pred in zip(pending, fitted):
+                fold_preds[i] = y_pred
+
+        per_fold = []
+        for (_, test_idx), y_pred in zip(folds, fold_preds):
+            per_fold.append({name: float(fn(y[test_idx], y_pred)) for name, fn in metrics.items()})
+
+        summary = {}
+        for name in metrics:
+            values = np.array([fold[name] for fold in per_fold])
+            summary[name] = {
+                "mean": float(values.mean()),
+                "variance": float(values.var(ddof=1)) if len(values) > 1 else 0.0,
+                "std": float(values.std(ddof=1)) if len(values) > 1 else 0.0,
+            }
+
+        return {
+            "n_splits": self.n_splits,
+            "stratified": self.stratify,
+            "metrics": summary,
+            "folds": per_fold,
+            "folds_refit": len(pending),
+            "folds_cached": len(folds) - len(pending),
+        }
+
+
+def update_metrics_file(metrics_path: str, key: str, results: Dict[str, Any]) -> None:
+    """
+    Merge results into an existing metrics.json under the given key
+
+    Args:
+        metrics_path: Path to metrics.json
+        key: Top-level key to store results under
+        results: Results to store
+    """
+    metrics = {}
+    if os.path.exists(metrics_path):
+        with open(metrics_path, "r") as f:
+            metrics = json.load(f)
+
+    metrics[key] = results
+
+    os.makedirs(os.path.dirname(metrics_path) or ".", exist_ok=True)
+    with open(metrics_path, "w") as f:
+        json.dump(metrics, f, indent=4)
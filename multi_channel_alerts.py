@@ -1,19 +1,70 @@
+import base64
 import json
 import logging
-import smtplib
+import random
+import threading
+import time
+import uuid
 import requests #type: ignore
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait as wait_futures
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
-from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple, Union
+from dataclasses import dataclass, asdict, replace
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.image import MIMEImage
 import os
 from dotenv import load_dotenv
 
+from alert_coalescing import AlertCoalescer
+from alert_outbox import AlertOutbox, DeliveryFailed
+from circuit_breaker import CircuitBreaker
+from delivery_scheduler import PriorityScheduler
+from recipient_delivery import RecipientDelivery, chunked
+from recipient_sources import BroadcastCheckpoints, CheckpointedBroadcast, recipient_source
+from smtp_pool import SMTPConnectionPool
+from status_tracker import LEVELS
+from subscriber_registry import SubscriberRegistry
+
 # Load environment variables
 load_dotenv()
 
+# Key of the overall dispatch summary in send_alert results
+DISPATCH_KEY = "dispatch"
+
+# How far from a hazard subscribers are alerted, by hazard type
+HAZARD_RADIUS_KM = {
+    "oil_spill": 15.0,
+    "algal_bloom": 10.0,
+    "coastal_erosion": 3.0,
+    "high_tide": 20.0,
+    "storm_surge": 30.0,
+    "coastal_flooding": 20.0,
+}
+DEFAULT_RADIUS_KM = 10.0
+
+
+def _broadcast_checkpoints(config: Dict[str, Any]) -> Optional[BroadcastCheckpoints]:
+    """Checkpoint store for a channel's broadcasts: set explicitly, or by default for file and query sources"""
+    path = config.get('checkpoint_path')
+    if path is None and isinstance(config.get('recipients'), dict):
+        path = os.getenv("BROADCAST_CHECKPOINT_PATH", "data/broadcast_checkpoints.sqlite3")
+    return BroadcastCheckpoints(path) if path else None
+
+
+def _broadcast_id(alert_message: "AlertMessage", channel: str) -> Optional[str]:
+    """Id of an alert's broadcast on a channel, stable across outbox redeliveries"""
+    alert_id = (alert_message.metadata or {}).get("alert_id")
+    return f"{alert_id}:{channel}" if alert_id else None
+
+
+def _reached(report: Dict[str, Any]) -> bool:
+    """Whether a delivery report counts as sent: a checkpointed broadcast once it has gone through
+    every chunk (recipients that failed on their own are reported, not retried), otherwise once
+    every recipient was reached"""
+    return report.get("completed", report["failed"] == 0)
+
 
 @dataclass
 class AlertChannel:
@@ -22,6 +73,10 @@ class AlertChannel:
     enabled: bool
     priority_levels: List[str]  # Which alert levels this channel should handle
     config: Dict[str, Any]
+    deadline_seconds: Optional[float] = None  # Give up waiting on the channel after this long
+    coalesce_window_seconds: Optional[float] = None  # Merge lower-level alerts into one digest per window
+    coalesce_max_level: str = "ORANGE"  # Highest level that is coalesced (RED never is)
+    circuit_breaker: Optional[Dict[str, Any]] = None  # CircuitBreaker settings (defaults if None)
 
 
 @dataclass
@@ -31,11 +86,15 @@ class AlertMessage:
     body: str
     image_data: Optional[bytes] = None
     metadata: Optional[Dict[str, Any]] = None
+    recipients: Optional[Iterable[str]] = None  # Overrides the channel's configured recipients
 
 
 class EmailAlertChannel:
     """Email alert channel implementation"""
     
+    # Geo-targeted alerts are addressed to nearby subscribers' emails
+    subscriber_addressed = True
+    
     def __init__(self, config: Dict[str, Any]):
         """
         Initialize email channel
@@ -47,10 +106,30 @@ class EmailAlertChannel:
                    - username: Email username
                    - password: Email password
                    - from_email: Sender email address
-                   - recipients: List of recipient email addresses
+                   - recipients: List of recipient email addresses, or a file or query source
+                     ({"file": path, "column": optional CSV column} or {"sqlite": db_path, "query": sql})
+                   - use_tls: Upgrade sessions with STARTTLS (default True)
+                   - max_connections: Pooled SMTP sessions (default 2)
+                   - idle_timeout: Seconds before an unused session is closed (default 60)
+                   - max_recipients_per_message: Envelope recipients per subscriber or streamed email (default 50)
+                   - checkpoint_path: SQLite file recording broadcast progress (default for file and query sources)
         """
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self.recipients = recipient_source(config['recipients'])
+        self.streamed = isinstance(config['recipients'], dict)
+        self.checkpoints = _broadcast_checkpoints(config)
+        
+        # Logged-in sessions are kept open across alerts instead of one login per email
+        self.pool = SMTPConnectionPool(
+            host=config['smtp_server'],
+            port=config['smtp_port'],
+            username=config.get('username'),
+            password=config.get('password'),
+            use_tls=config.get('use_tls', True),
+            max_connections=config.get('max_connections', 2),
+            idle_timeout=config.get('idle_timeout', 60.0)
+        )
         
     def send_alert(self, alert_message: AlertMessage) -> bool:
         """
@@ -66,7 +145,12 @@ class EmailAlertChannel:
             # Create message
             msg = MIMEMultipart()
             msg['From'] = self.config['from_email']
-            msg['To'] = ', '.join(self.config['recipients'])
+            blind = alert_message.recipients is not None or self.streamed
+            if not blind:
+                msg['To'] = ', '.join(self.config['recipients'])
+            else:
+                # Subscribers and streamed lists are blind-copied so nobody sees the other addresses
+                msg['To'] = self.config['from_email']
             msg['Subject'] = alert_message.subject
             
             # Add body
@@ -78,85 +162,201 @@ class EmailAlertChannel:
                 image.add_header('Content-ID', '<alert_image>')
                 msg.attach(image)
             
-            # Send email
-            with smtplib.SMTP(self.config['smtp_server'], self.config['smtp_port']) as server:
-                server.starttls()
-                server.login(self.config['username'], self.config['password'])
-                server.send_message(msg)
+            # Send email on a pooled session
+            if not blind:
+                self.pool.send_message(msg)
+                sent = len(self.config['recipients'])
+            else:
+                recipients = alert_message.recipients if alert_message.recipients is not None else self.recipients()
+                size = self.config.get('max_recipients_per_message', 50)
+                broadcast_id = _broadcast_id(alert_message, "email")
+                if self.checkpoints is not None and broadcast_id is not None:
+                    # Resume after the last envelope a previous attempt got out
+                    broadcast = CheckpointedBroadcast(self.checkpoints, broadcast_id, recipients, size)
+                    for chunk in broadcast.chunks():
+                        self.pool.send_message(msg, to_addrs=chunk)
+                        broadcast.commit(len(chunk), len(chunk), 0)
+                    sent = broadcast.delivered
+                else:
+                    sent = 0
+                    for chunk in chunked(recipients, size):
+                        self.pool.send_message(msg, to_addrs=chunk)
+                        sent += len(chunk)
             
-            self.logger.info(f"Email alert sent successfully to {len(self.config['recipients'])} recipients")
+            self.logger.info(f"Email alert sent successfully to {sent} recipients")
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to send email alert: {str(e)}")
             return False
+    
+    def close(self) -> None:
+        """Close the pooled SMTP sessions"""
+        self.pool.close()
+        if self.checkpoints is not None:
+            self.checkpoints.close()
 
 
-class SMSAlertChannel:
-    """SMS alert channel implementation using Twilio"""
+class _TwilioChannel:
+    """Shared Twilio client and concurrent per-recipient delivery for SMS and IVR"""
+    
+    # Word used in log lines for one delivery
+    action = "message"
+    
+    # Geo-targeted alerts are addressed to nearby subscribers' phone numbers
+    subscriber_addressed = True
     
     def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.delivery = RecipientDelivery(
+            max_concurrency=config.get('max_concurrency', 10),
+            rate_limit_per_second=config.get('rate_limit_per_second'),
+            name=f"{type(self).__name__}-delivery"
+        )
+        self.recipients = recipient_source(config['recipients'])
+        self.chunk_size = config.get('chunk_size', 1000)
+        self.checkpoints = _broadcast_checkpoints(config)
+        self._client = None
+        self._client_lock = threading.Lock()
+    
+    def _get_client(self):
         """
-        Initialize SMS channel
+        Get the channel's Twilio client, creating it on first use
+        
+        Returns:
+            Twilio Client, or None if Twilio is not installed (simulation mode)
+        """
+        with self._client_lock:
+            if self._client is None:
+                try:
+                    from twilio.rest import Client #type: ignore
+                    from twilio.http.http_client import TwilioHttpClient #type: ignore
+                except ImportError:
+                    return None
+                
+                # One pooled HTTP session, sized for the delivery concurrency, for every alert
+                http_client = TwilioHttpClient(pool_connections=True, timeout=self.config.get('timeout', 10))
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.delivery.max_concurrency)
+                http_client.session.mount("https://", adapter)
+                http_client.session.mount("http://", adapter)
+                
+                self._client = Client(self.config['account_sid'], self.config['auth_token'], http_client=http_client)
+                if self.config.get('api_base_url'):
+                    # Point the API at another host, e.g. a local stand-in server
+                    self._client.api.base_url = self.config['api_base_url']
+            return self._client
+    
+    def _prepare(self, alert_message: AlertMessage) -> Any:
+        """Build anything shared by every recipient of one alert"""
+        return None
+    
+    def _send_to(self, client, recipient: str, alert_message: AlertMessage, prepared: Any) -> str:
+        """Deliver to one recipient and return the provider SID"""
+        raise NotImplementedError
+    
+    def deliver(self, alert_message: AlertMessage) -> Dict[str, Any]:
+        """
+        Deliver to every recipient concurrently
+        
+        With checkpoints configured the recipients go out in chunks, and a
+        retry of the same alert resumes after the last chunk that was sent.
         
         Args:
-            config: Dictionary containing SMS configuration
-                   - account_sid: Twilio account SID
-                   - auth_token: Twilio auth token
-                   - from_number: Twilio phone number
-                   - recipients: List of recipient phone numbers
+            alert_message: Alert message to send
+            
+        Returns:
+            Delivered and failed counts plus one outcome per recipient (only
+            the first failures for a checkpointed broadcast)
         """
-        self.config = config
-        self.logger = logging.getLogger(__name__)
+        client = self._get_client()
+        if client is None:
+            self.logger.warning("Twilio not installed, using simulation mode")
+            
+            def send(recipient: str) -> None:
+                self.logger.info(f"Simulated {self.action} to {recipient}: {alert_message.subject}")
+        else:
+            prepared = self._prepare(alert_message)
+            
+            def send(recipient: str) -> str:
+                return self._send_to(client, recipient, alert_message, prepared)
         
+        recipients = alert_message.recipients if alert_message.recipients is not None else self.recipients()
+        broadcast_id = _broadcast_id(alert_message, type(self).__name__)
+        if self.checkpoints is not None and broadcast_id is not None:
+            broadcast = CheckpointedBroadcast(self.checkpoints, broadcast_id, recipients, self.chunk_size)
+            report = self.delivery.deliver_chunks(broadcast, send)
+        else:
+            report = self.delivery.deliver(recipients, send)
+        for outcome in report["recipients"]:
+            if not outcome["delivered"]:
+                self.logger.error(f"Failed {self.action} to {outcome['recipient']}: {outcome['error']}")
+        self.logger.info(f"{self.action.capitalize()} delivered to {report['delivered']} recipients, "
+                         f"{report['failed']} failed, in {report['elapsed_ms']:.0f} ms")
+        return report
+    
     def send_alert(self, alert_message: AlertMessage) -> bool:
         """
-        Send SMS alert
+        Send the alert to every recipient
         
         Args:
             alert_message: Alert message to send
             
         Returns:
-            True if SMS sent successfully, False otherwise
+            True if every recipient was reached (or a checkpointed broadcast
+            went through every chunk), False otherwise
         """
         try:
-            # Try to import Twilio
-            try:
-                from twilio.rest import Client #type: ignore
-                from twilio.base.exceptions import TwilioException #type: ignore
-            except ImportError:
-                self.logger.warning("Twilio not installed, using simulation mode")
-                # Simulate SMS sending
-                for recipient in self.config['recipients']:
-                    self.logger.info(f"SMS alert sent to {recipient}: {alert_message.subject}")
-                return True
-            
-            # Initialize Twilio client
-            client = Client(self.config['account_sid'], self.config['auth_token'])
-            
-            # Send SMS to each recipient
-            for recipient in self.config['recipients']:
-                try:
-                    message = client.messages.create(
-                        body=alert_message.subject,
-                        from_=self.config['from_number'],
-                        to=recipient
-                    )
-                    self.logger.info(f"SMS sent successfully to {recipient}, SID: {message.sid}")
-                except TwilioException as e:
-                    self.logger.error(f"Failed to send SMS to {recipient}: {str(e)}")
-                    return False
-            
-            return True
-            
+            return _reached(self.deliver(alert_message))
         except Exception as e:
-            self.logger.error(f"Failed to send SMS alert: {str(e)}")
+            self.logger.error(f"Failed to send {self.action} alert: {str(e)}")
             return False
+    
+    def close(self) -> None:
+        """Stop the delivery threads"""
+        self.delivery.shutdown(wait=False)
+        if self.checkpoints is not None:
+            self.checkpoints.close()
 
 
-class IVRAlertChannel:
+class SMSAlertChannel(_TwilioChannel):
+    """SMS alert channel implementation using Twilio"""
+    
+    action = "SMS"
+    
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize SMS channel
+        
+        Args:
+            config: Dictionary containing SMS configuration
+                   - account_sid: Twilio account SID
+                   - auth_token: Twilio auth token
+                   - from_number: Twilio phone number
+                   - recipients: List of recipient phone numbers, or a file or query source
+                     ({"file": path, "column": optional CSV column} or {"sqlite": db_path, "query": sql})
+                   - max_concurrency: Messages in flight at once (default 10)
+                   - rate_limit_per_second: Provider limit on messages per second (optional)
+                   - api_base_url: Override the Twilio API host (optional)
+                   - chunk_size: Recipients per checkpointed chunk (default 1000)
+                   - checkpoint_path: SQLite file recording broadcast progress (default for file and query sources)
+        """
+        super().__init__(config)
+    
+    def _send_to(self, client, recipient: str, alert_message: AlertMessage, prepared: Any) -> str:
+        message = client.messages.create(
+            body=alert_message.subject,
+            from_=self.config['from_number'],
+            to=recipient
+        )
+        return message.sid
+
+
+class IVRAlertChannel(_TwilioChannel):
     """Interactive Voice Response (IVR) alert channel using Twilio"""
     
+    action = "IVR call"
+    
     def __init__(self, config: Dict[str, Any]):
         """
         Initialize IVR channel
@@ -166,63 +366,30 @@ class IVRAlertChannel:
                    - account_sid: Twilio account SID
                    - auth_token: Twilio auth token
                    - from_number: Twilio phone number
-                   - recipients: List of recipient phone numbers
+                   - recipients: List of recipient phone numbers, or a file or query source
                    - webhook_url: Webhook URL for TwiML response
                    - voice: Voice type (alice, man, woman)
                    - language: Language code (en-US, en-GB, etc.)
+                   - max_concurrency: Calls being placed at once (default 10)
+                   - rate_limit_per_second: Provider limit on calls per second (optional)
+                   - api_base_url: Override the Twilio API host (optional)
         """
-        self.config = config
-        self.logger = logging.getLogger(__name__)
-        
-    def send_alert(self, alert_message: AlertMessage) -> bool:
-        """
-        Send IVR alert
-        
-        Args:
-            alert_message: Alert message to send
-            
-        Returns:
-            True if IVR call initiated successfully, False otherwise
-        """
-        try:
-            # Try to import Twilio
-            try:
-                from twilio.rest import Client #type: ignore
-                from twilio.base.exceptions import TwilioException #type: ignore
-            except ImportError:
-                self.logger.warning("Twilio not installed, using simulation mode")
-                # Simulate IVR calling
-                for recipient in self.config['recipients']:
-                    self.logger.info(f"IVR call initiated to {recipient}: {alert_message.subject}")
-                return True
-            
-            # Initialize Twilio client
-            client = Client(self.config['account_sid'], self.config['auth_token'])
-            
-            # Create TwiML for the call
-            twiml = self._create_twiml(alert_message)
-            
-            # Make calls to each recipient
-            for recipient in self.config['recipients']:
-                try:
-                    call = client.calls.create(
-                        twiml=twiml,
-                        to=recipient,
-                        from_=self.config['from_number'],
-                        record=True,  # Record the call for quality assurance
-                        status_callback=f"{self.config['webhook_url']}/call-status",
-                        status_callback_event=['completed', 'answered', 'busy', 'failed', 'no-answer']
-                    )
-                    self.logger.info(f"IVR call initiated to {recipient}, SID: {call.sid}")
-                except TwilioException as e:
-                    self.logger.error(f"Failed to initiate IVR call to {recipient}: {str(e)}")
-                    return False
-            
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Failed to send IVR alert: {str(e)}")
-            return False
+        super().__init__(config)
+    
+    def _prepare(self, alert_message: AlertMessage) -> str:
+        # The TwiML is the same for every recipient, so build it once per alert
+        return self._create_twiml(alert_message)
+    
+    def _send_to(self, client, recipient: str, alert_message: AlertMessage, prepared: Any) -> str:
+        call = client.calls.create(
+            twiml=prepared,
+            to=recipient,
+            from_=self.config['from_number'],
+            record=True,  # Record the call for quality assurance
+            status_callback=f"{self.config['webhook_url']}/call-status",
+            status_callback_event=['completed', 'answered', 'busy', 'failed', 'no-answer']
+        )
+        return call.sid
     
     def _create_twiml(self, alert_message: AlertMessage) -> str:
         """
@@ -267,6 +434,9 @@ class IVRAlertChannel:
 class WebhookAlertChannel:
     """Webhook alert channel for external integrations"""
     
+    # Transient statuses worth retrying; anything else is a definitive answer
+    RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+    
     def __init__(self, config: Dict[str, Any]):
         """
         Initialize webhook channel
@@ -274,12 +444,95 @@ class WebhookAlertChannel:
         Args:
             config: Dictionary containing webhook configuration
                    - url: Webhook endpoint URL
+                   - urls: Several endpoint URLs delivered in parallel (optional, instead of url)
                    - headers: Optional headers to include
-                   - timeout: Request timeout in seconds
+                   - connect_timeout: Seconds to establish a connection (default 3.05)
+                   - timeout: Seconds to wait for the response (default 10)
+                   - max_retries: Retries of transient failures (default 3)
+                   - backoff_seconds: Base of the exponential backoff (default 0.5)
+                   - max_backoff_seconds: Cap on a single backoff (default 8)
         """
         self.config = config
         self.logger = logging.getLogger(__name__)
         
+        self.urls: List[str] = list(config.get('urls') or [config['url']])
+        self.timeout = (config.get('connect_timeout', 3.05), config.get('timeout', 10))
+        self.max_retries = config.get('max_retries', 3)
+        self.backoff_seconds = config.get('backoff_seconds', 0.5)
+        self.max_backoff_seconds = config.get('max_backoff_seconds', 8.0)
+        
+        # Keep-alive connections reused across alerts, one pool slot per endpoint
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(len(self.urls), 1))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(config.get('headers', {}))
+        self.session.headers['Content-Type'] = 'application/json'
+        self.delivery = RecipientDelivery(max_concurrency=max(len(self.urls), 1), name="webhook-delivery")
+    
+    def _backoff(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when the endpoint sends one"""
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            return min(float(response.headers['Retry-After']), self.max_backoff_seconds)
+        return random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt))
+    
+    def _post(self, url: str, payload: Dict[str, Any], idempotency_key: str) -> int:
+        """
+        POST one delivery, retrying transient failures with the same idempotency key
+        
+        Returns:
+            Final HTTP status code (raises if the endpoint never accepted the alert)
+        """
+        headers = {'Idempotency-Key': idempotency_key}
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = self.session.post(url, json=payload, headers=headers, timeout=self.timeout)
+                if response.status_code in [200, 201, 202]:
+                    return response.status_code
+                if response.status_code not in self.RETRY_STATUSES:
+                    raise RuntimeError(f"Webhook failed with status {response.status_code}: {response.text[:200]}")
+                error = f"status {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, response)
+                self.logger.warning(f"Webhook {url} attempt {attempt + 1} failed ({error}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+        
+        raise RuntimeError(f"Webhook {url} failed after {self.max_retries + 1} attempts: {error}")
+    
+    def deliver(self, alert_message: AlertMessage) -> Dict[str, Any]:
+        """
+        Deliver the alert to every endpoint in parallel
+        
+        Args:
+            alert_message: Alert message to send
+            
+        Returns:
+            Delivered and failed counts plus one outcome per endpoint
+        """
+        payload = {
+            "timestamp": datetime.now().isoformat(),
+            "subject": alert_message.subject,
+            "body": alert_message.body,
+            "metadata": alert_message.metadata or {}
+        }
+        # One key per alert, shared by every retry and outbox redelivery, so receivers can drop duplicates
+        alert_id = (alert_message.metadata or {}).get("alert_id")
+        idempotency_key = str(uuid.uuid5(uuid.NAMESPACE_URL, f"alert:{alert_id}:webhook") if alert_id
+                              else uuid.uuid4())
+        
+        report = self.delivery.deliver(self.urls, lambda url: self._post(url, payload, idempotency_key))
+        report["idempotency_key"] = idempotency_key
+        for outcome in report["recipients"]:
+            if outcome["delivered"]:
+                self.logger.info(f"Webhook alert sent successfully to {outcome['recipient']}")
+            else:
+                self.logger.error(outcome["error"])
+        return report
+    
     def send_alert(self, alert_message: AlertMessage) -> bool:
         """
         Send webhook alert
@@ -288,36 +541,18 @@ class WebhookAlertChannel:
             alert_message: Alert message to send
             
         Returns:
-            True if webhook sent successfully, False otherwise
+            True if every endpoint accepted the alert, False otherwise
         """
         try:
-            payload = {
-                "timestamp": datetime.now().isoformat(),
-                "subject": alert_message.subject,
-                "body": alert_message.body,
-                "metadata": alert_message.metadata or {}
-            }
-            
-            headers = self.config.get('headers', {})
-            headers['Content-Type'] = 'application/json'
-            
-            response = requests.post(
-                self.config['url'],
-                json=payload,
-                headers=headers,
-                timeout=self.config.get('timeout', 30)
-            )
-            
-            if response.status_code in [200, 201, 202]:
-                self.logger.info(f"Webhook alert sent successfully to {self.config['url']}")
-                return True
-            else:
-                self.logger.error(f"Webhook failed with status {response.status_code}: {response.text}")
-                return False
-                
+            return self.deliver(alert_message)["failed"] == 0
         except Exception as e:
             self.logger.error(f"Failed to send webhook alert: {str(e)}")
             return False
+    
+    def close(self) -> None:
+        """Close pooled connections and stop the delivery threads"""
+        self.delivery.shutdown(wait=False)
+        self.session.close()
 
 
 class PushNotificationChannel:
@@ -363,21 +598,79 @@ class MultiChannelAlertService:
     Service for sending alerts through multiple channels
     """
     
-    def __init__(self, config_file: Optional[str] = None):
+    def __init__(self,
+                 config_file: Optional[str] = None,
+                 max_dispatch_workers: int = 8,
+                 default_deadline_seconds: float = 30.0,
+                 max_overdue_sends: int = 1,
+                 use_outbox: bool = True,
+                 outbox_path: Optional[str] = None,
+                 outbox_workers: int = 2,
+                 outbox_max_attempts: int = 5,
+                 priority_weights: Optional[Dict[str, float]] = None,
+                 reserved_red_workers: int = 1,
+                 subscriber_registry: Optional[SubscriberRegistry] = None,
+                 hazard_radius_km: Optional[Dict[str, float]] = None):
         """
         Initialize multi-channel alert service
         
         Args:
             config_file: Path to configuration file (optional)
+            max_dispatch_workers: Threads shared by all concurrent channel sends
+            default_deadline_seconds: Per-channel deadline when a channel sets none
+            max_overdue_sends: Sends past their deadline a channel may have still running
+                               before it is given no new ones
+            use_outbox: Queue alerts in a durable outbox instead of sending them inline
+            outbox_path: Outbox database (defaults to $ALERT_OUTBOX_PATH or data/alert_outbox.sqlite3)
+            outbox_workers: Background threads draining the outbox
+            outbox_max_attempts: Delivery attempts before an alert is dead-lettered
+            priority_weights: Outbox share per alert level below RED (RED is always served first)
+            reserved_red_workers: Extra outbox threads that deliver only RED alerts
+            subscriber_registry: Registry used to address located alerts to nearby subscribers
+                                 (defaults to one at $SUBSCRIBER_DB_PATH if set, else none)
+            hazard_radius_km: Per-hazard alert radius overrides (see HAZARD_RADIUS_KM)
         """
         self.channels: Dict[str, AlertChannel] = {}
         self.channel_implementations: Dict[str, Any] = {}
+        self.default_deadline_seconds = default_deadline_seconds
+        self.max_overdue_sends = max_overdue_sends
+        self._executor = ThreadPoolExecutor(max_workers=max_dispatch_workers,
+                                            thread_name_prefix="alert-dispatch")
+        outbox_path = outbox_path or os.getenv("ALERT_OUTBOX_PATH", "data/alert_outbox.sqlite3")
+        # With the outbox, alerts waiting in a coalescing window are persisted next to it
+        self.coalescer = AlertCoalescer(self._send_digest, outbox_path if use_outbox else None,
+                                        encode=self._encode_message, decode=self._decode_message)
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.subscribers = subscriber_registry
+        if self.subscribers is None and os.getenv("SUBSCRIBER_DB_PATH"):
+            self.subscribers = SubscriberRegistry(os.getenv("SUBSCRIBER_DB_PATH"))
+        self.hazard_radius_km = {**HAZARD_RADIUS_KM, **(hazard_radius_km or {})}
+        self._breakers_lock = threading.Lock()
+        # Sends abandoned at their deadline that are still running, and recent alerts whose
+        # abandoned send went through anyway, by (channel id, alert id)
+        self._overdue: Dict[Tuple[str, str], Future] = {}
+        self._late_sent: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._overdue_lock = threading.Lock()
         self.logger = logging.getLogger(__name__)
         
         if config_file:
             self.load_config(config_file)
         else:
             self.load_default_config()
+        
+        # Opened last: leftover messages from a previous run start draining immediately
+        self.outbox: Optional[AlertOutbox] = None
+        if use_outbox:
+            self.outbox = AlertOutbox(
+                self._deliver_queued,
+                outbox_path,
+                workers=outbox_workers,
+                max_attempts=outbox_max_attempts,
+                scheduler=PriorityScheduler(priority_weights, strict_levels=("RED",)),
+                reserved_workers=reserved_red_workers
+            )
+        # Windows left open by a crash or restart close (into the outbox) as they would have
+        self.coalescer.restore()
     
     def load_config(self, config_file: str) -> None:
         """
@@ -465,7 +758,7 @@ class MultiChannelAlertService:
                     "config": {
                         "url": os.getenv("WEBHOOK_URL", "https://your-webhook-endpoint.com/alerts"),
                         "headers": {"Authorization": f"Bearer {os.getenv('WEBHOOK_TOKEN', 'your_token')}"},
-                        "timeout": int(os.getenv("WEBHOOK_TIMEOUT", "30"))
+                        "timeout": int(os.getenv("WEBHOOK_TIMEOUT", "10"))
                     }
                 }
             }
@@ -490,7 +783,11 @@ class MultiChannelAlertService:
                 name=channel_config["name"],
                 enabled=channel_config["enabled"],
                 priority_levels=channel_config["priority_levels"],
-                config=channel_config["config"]
+                config=channel_config["config"],
+                deadline_seconds=channel_config.get("deadline_seconds"),
+                coalesce_window_seconds=channel_config.get("coalesce_window_seconds"),
+                coalesce_max_level=channel_config.get("coalesce_max_level", "ORANGE"),
+                circuit_breaker=channel_config.get("circuit_breaker")
             )
             
             self.channels[channel_id] = channel
@@ -515,7 +812,9 @@ class MultiChannelAlertService:
                            location_name: str,
                            description: str,
                            confidence: float,
-                           image_data: Optional[bytes] = None) -> AlertMessage:
+                           image_data: Optional[bytes] = None,
+                           latitude: Optional[float] = None,
+                           longitude: Optional[float] = None) -> AlertMessage:
         """
         Create alert message for different channels
         
@@ -526,6 +825,8 @@ class MultiChannelAlertService:
             description: User description of the hazard
             confidence: Confidence score from AI model
             image_data: Optional image data
+            latitude: Hazard latitude (enables geo-targeting)
+            longitude: Hazard longitude
             
         Returns:
             AlertMessage object
@@ -570,10 +871,127 @@ class MultiChannelAlertService:
                 "hazard_type": hazard_type,
                 "location": location_name,
                 "confidence": confidence,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": datetime.now().isoformat(),
+                "alert_id": uuid.uuid4().hex,
+                "latitude": latitude,
+                "longitude": longitude
+            }
+        )
+    
+    def create_digest_message(self, alert_messages: List[AlertMessage]) -> AlertMessage:
+        """
+        Merge a window of alerts into one digest, one line per incident
+        
+        Alerts for the same hazard type at the same location are one incident.
+        
+        Args:
+            alert_messages: Alerts buffered during a coalescing window
+            
+        Returns:
+            AlertMessage at the highest level in the window
+        """
+        incidents: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for alert_message in alert_messages:
+            metadata = alert_message.metadata or {}
+            key = (metadata.get("hazard_type", "unknown"), metadata.get("location", "unknown"))
+            incident = incidents.setdefault(key, {
+                "hazard_type": key[0],
+                "location": key[1],
+                "alert_level": metadata.get("alert_level", "GREEN"),
+                "reports": 0,
+                "max_confidence": 0.0,
+                "first_seen": metadata.get("timestamp"),
+                "last_seen": metadata.get("timestamp"),
+                "latitude": metadata.get("latitude"),
+                "longitude": metadata.get("longitude")
+            })
+            incident["reports"] += 1
+            incident["max_confidence"] = max(incident["max_confidence"], metadata.get("confidence", 0.0))
+            incident["last_seen"] = metadata.get("timestamp")
+            if LEVELS.index(metadata.get("alert_level", "GREEN")) > LEVELS.index(incident["alert_level"]):
+                incident["alert_level"] = metadata["alert_level"]
+        
+        ordered = sorted(incidents.values(), key=lambda i: (-LEVELS.index(i["alert_level"]), -i["reports"]))
+        alert_level = ordered[0]["alert_level"]
+        hazard_types = {incident["hazard_type"] for incident in ordered}
+        locations = {incident["location"] for incident in ordered}
+        
+        subject = (f"📋 {alert_level} DIGEST: {len(ordered)} incident{'s' if len(ordered) != 1 else ''} "
+                   f"from {len(alert_messages)} reports")
+        rows = "".join(
+            f"<tr><td>{incident['alert_level']}</td>"
+            f"<td>{incident['hazard_type'].replace('_', ' ').title()}</td>"
+            f"<td>{incident['location']}</td><td>{incident['reports']}</td>"
+            f"<td>{incident['max_confidence']:.1%}</td></tr>"
+            for incident in ordered
+        )
+        body = f"""
+        <html>
+        <body>
+            <h2>{subject}</h2>
+            
+            <table>
+                <tr><th>Level</th><th>Hazard</th><th>Location</th><th>Reports</th><th>Max confidence</th></tr>
+                {rows}
+            </table>
+            
+            <h3>Recommended Action</h3>
+            <p>{self._get_alert_action(alert_level)}</p>
+            
+            <hr>
+            <p><small>Digest generated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</small></p>
+        </body>
+        </html>
+        """
+        
+        return AlertMessage(
+            subject=subject,
+            body=body,
+            metadata={
+                "alert_level": alert_level,
+                "hazard_type": ordered[0]["hazard_type"] if len(hazard_types) == 1 else "multiple hazards",
+                "location": ordered[0]["location"] if len(locations) == 1 else f"{len(locations)} locations",
+                "confidence": max(incident["max_confidence"] for incident in ordered),
+                "timestamp": datetime.now().isoformat(),
+                "alert_id": uuid.uuid4().hex,
+                "digest": True,
+                "report_count": len(alert_messages),
+                "incidents": ordered
             }
         )
     
+    def _send_digest(self, channel_id: str, alert_messages: List[AlertMessage]) -> None:
+        """Coalescer flush: send one window's alerts as a single message on the channel"""
+        channel = self.channels.get(channel_id)
+        if channel is None or not channel.enabled or channel_id not in self.channel_implementations:
+            self.logger.warning(f"Dropping {len(alert_messages)} coalesced alerts for unavailable channel {channel_id}")
+            return
+        
+        alert_message = alert_messages[0] if len(alert_messages) == 1 else self.create_digest_message(alert_messages)
+        self._submit(alert_message, [channel_id])
+        self.logger.info(f"Sent digest of {len(alert_messages)} alerts through {channel.name}")
+    
+    def flush_digests(self, channel_id: Optional[str] = None) -> int:
+        """
+        Send buffered alerts now instead of waiting for their windows to close
+        
+        Args:
+            channel_id: Channel to flush (None flushes all)
+            
+        Returns:
+            Number of alerts flushed
+        """
+        return self.coalescer.flush(channel_id)
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing metrics
+        
+        Returns:
+            Alerts coalesced, digest windows closed and alerts buffered per channel
+        """
+        return self.coalescer.get_stats()
+    
     def _get_alert_description(self, alert_level: str) -> str:
         """Get description for alert level"""
         descriptions = {
@@ -600,10 +1018,20 @@ class MultiChannelAlertService:
                   location_name: str,
                   description: str,
                   confidence: float,
-                  image_data: Optional[bytes] = None) -> Dict[str, Any]:
+                  image_data: Optional[bytes] = None,
+                  latitude: Optional[float] = None,
+                  longitude: Optional[float] = None) -> Dict[str, Any]:
         """
         Send alert through all appropriate channels
         
+        With the outbox enabled the alert is durably queued and delivered by
+        background workers, RED first and lower levels by weighted share; look
+        up the outcome with get_delivery(outbox_id).
+        Below RED, channels with a coalescing window buffer the alert and send
+        it in the window's digest instead.
+        With a subscriber registry and a location, email, SMS and IVR go only
+        to subscribers within the hazard type's radius of the location.
+        
         Args:
             alert_level: Alert level
             hazard_type: Type of hazard
@@ -611,18 +1039,23 @@ class MultiChannelAlertService:
             description: Hazard description
             confidence: Confidence score
             image_data: Optional image data
+            latitude: Hazard latitude
+            longitude: Hazard longitude
             
         Returns:
-            Dictionary with sending results for each channel
+            Dictionary with the result for each channel (sending results and
+            latency_ms, queued and outbox_id, or coalesced and digest_in_seconds),
+            plus an overall summary under DISPATCH_KEY
         """
         # Create alert message
         alert_message = self.create_alert_message(
-            alert_level, hazard_type, location_name, description, confidence, image_data
+            alert_level, hazard_type, location_name, description, confidence, image_data, latitude, longitude
         )
         
-        results = {}
+        results: Dict[str, Any] = {}
+        start = time.perf_counter()
         
-        # Send through each enabled channel
+        channel_ids = []
         for channel_id, channel in self.channels.items():
             if not channel.enabled:
                 continue
@@ -635,35 +1068,374 @@ class MultiChannelAlertService:
                 }
                 continue
             
-            # Send alert
-            if channel_id in self.channel_implementations:
-                implementation = self.channel_implementations[channel_id]
-                success = implementation.send_alert(alert_message)
+            if channel_id not in self.channel_implementations:
+                results[channel_id] = {
+                    "sent": False,
+                    "reason": "Channel implementation not found"
+                }
+                continue
+            
+            # Lower-level alerts wait in the channel's window and go out in its digest
+            if self._coalesces(channel, alert_level):
+                window = channel.coalesce_window_seconds
+                results[channel_id] = {
+                    "sent": False,
+                    "coalesced": True,
+                    "channel_name": channel.name,
+                    "digest_in_seconds": self.coalescer.add(channel_id, alert_message, window)
+                }
+                continue
+            
+            channel_ids.append(channel_id)
+        
+        results.update(self._submit(alert_message, channel_ids))
+        results[DISPATCH_KEY]["coalesced"] = sum(1 for result in results.values() if result.get("coalesced"))
+        results[DISPATCH_KEY]["latency_ms"] = (time.perf_counter() - start) * 1000
+        return results
+    
+    @staticmethod
+    def _coalesces(channel: AlertChannel, alert_level: str) -> bool:
+        """Whether an alert at this level waits for the channel's digest"""
+        if not channel.coalesce_window_seconds or alert_level == "RED" or alert_level not in LEVELS:
+            return False
+        return LEVELS.index(alert_level) <= LEVELS.index(channel.coalesce_max_level)
+    
+    @staticmethod
+    def _encode_message(alert_message: AlertMessage) -> Dict[str, Any]:
+        """JSON-safe form of a message for the outbox and the coalescing buffer"""
+        return {
+            "subject": alert_message.subject,
+            "body": alert_message.body,
+            "image_data": base64.b64encode(alert_message.image_data).decode() if alert_message.image_data else None,
+            "metadata": alert_message.metadata
+        }
+    
+    @staticmethod
+    def _decode_message(data: Dict[str, Any]) -> AlertMessage:
+        """Rebuild a message stored by _encode_message"""
+        return AlertMessage(
+            subject=data["subject"],
+            body=data["body"],
+            image_data=base64.b64decode(data["image_data"]) if data["image_data"] else None,
+            metadata=data["metadata"]
+        )
+    
+    def _submit(self, alert_message: AlertMessage, channel_ids: List[str]) -> Dict[str, Any]:
+        """Send a message through channels inline, or queue it in the outbox if enabled"""
+        if self.outbox is None or not channel_ids:
+            return self._dispatch(alert_message, channel_ids)
+        
+        results: Dict[str, Any] = {}
+        start = time.perf_counter()
+        
+        # Hand the message to the outbox workers; delivery happens in the background
+        outbox_id = self.outbox.enqueue({
+            "channels": channel_ids,
+            **self._encode_message(alert_message),
+            "results": {}
+        }, priority=(alert_message.metadata or {}).get("alert_level", ""))
+        for channel_id in channel_ids:
+            results[channel_id] = {
+                "sent": False,
+                "queued": True,
+                "channel_name": self.channels[channel_id].name,
+                "outbox_id": outbox_id
+            }
+        results[DISPATCH_KEY] = {
+            "channels": len(channel_ids),
+            "queued": True,
+            "outbox_id": outbox_id,
+            "latency_ms": (time.perf_counter() - start) * 1000
+        }
+        return results
+    
+    def _dispatch(self, alert_message: AlertMessage, channel_ids: List[str]) -> Dict[str, Any]:
+        """
+        Send a message through the given channels concurrently and wait for them
+        
+        A channel that misses its deadline is reported as timed out, but its
+        send cannot be interrupted and keeps running. Until it finishes, the
+        same alert is not sent on that channel again (it is reported as
+        in_progress, so the outbox retries later without counting an attempt);
+        if it then went through, the retry reports it as sent instead of
+        sending twice. A channel with max_overdue_sends abandoned sends still
+        running gets no new sends, so hung providers cannot tie up every
+        dispatch thread.
+        
+        Args:
+            alert_message: Message to send
+            channel_ids: Enabled, configured channels to send through
+            
+        Returns:
+            Sending results (and latency_ms) for each channel, plus an overall
+            summary under DISPATCH_KEY
+        """
+        results: Dict[str, Any] = {}
+        start = time.perf_counter()
+        alert_id = (alert_message.metadata or {}).get("alert_id")
+        
+        # Fan out to every channel at once; each blocks on its own network I/O
+        futures: Dict[Future, str] = {}
+        deadlines: Dict[str, float] = {}
+        for channel_id in channel_ids:
+            channel = self.channels[channel_id]
+            deadline = channel.deadline_seconds or self.default_deadline_seconds
+            overdue = self._overdue_status(channel_id, alert_id)
+            if overdue == "sent":
+                results[channel_id] = {
+                    "sent": True,
+                    "channel_name": channel.name,
+                    "completed_late": True,
+                    "timestamp": datetime.now().isoformat(),
+                    "latency_ms": 0.0
+                }
+                continue
+            if overdue is not None:
+                # Sending again now could reach recipients twice or starve other channels of threads
+                results[channel_id] = {
+                    "sent": False,
+                    "channel_name": channel.name,
+                    "reason": "Previous send still running" if overdue == "running"
+                              else "Channel busy with overdue sends",
+                    "in_progress": True,
+                    "retry_after_seconds": deadline,
+                    "timestamp": datetime.now().isoformat(),
+                    "latency_ms": 0.0
+                }
+                continue
+            breaker = self._breaker(channel_id)
+            if not breaker.allow():
+                # Known-bad channel: fail fast instead of waiting out its timeout
+                results[channel_id] = {
+                    "sent": False,
+                    "channel_name": channel.name,
+                    "reason": "Circuit breaker open",
+                    "circuit_open": True,
+                    "retry_after_seconds": breaker.retry_after(),
+                    "timestamp": datetime.now().isoformat(),
+                    "latency_ms": 0.0
+                }
+                continue
+            implementation = self.channel_implementations[channel_id]
+            message = self._address(alert_message, channel_id, implementation)
+            futures[self._executor.submit(self._send_through, implementation, message)] = channel_id
+            deadlines[channel_id] = start + deadline
+        
+        # Collect results as channels complete, giving up on each at its deadline
+        pending = set(futures)
+        while pending:
+            timeout = max(0.0, min(deadlines[futures[f]] for f in pending) - time.perf_counter())
+            done, pending = wait_futures(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            now = time.perf_counter()
+            
+            for future in done:
+                channel_id = futures[future]
+                channel = self.channels[channel_id]
+                try:
+                    success, details = future.result()
+                except Exception as e:
+                    self.logger.error(f"Channel {channel.name} raised: {str(e)}")
+                    success, details = False, {}
                 
                 results[channel_id] = {
                     "sent": success,
                     "channel_name": channel.name,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": datetime.now().isoformat(),
+                    "latency_ms": (now - start) * 1000,
+                    **details
                 }
+                self._breaker(channel_id).record(success, now - start)
                 
                 if success:
                     self.logger.info(f"Alert sent successfully through {channel.name}")
                 else:
                     self.logger.error(f"Failed to send alert through {channel.name}")
-            else:
+            
+            for future in [f for f in pending if deadlines[futures[f]] <= now]:
+                # The send keeps running in its worker; only the wait is abandoned
+                pending.discard(future)
+                channel_id = futures[future]
+                channel = self.channels[channel_id]
+                self._track_overdue(channel_id, alert_id, future)
                 results[channel_id] = {
                     "sent": False,
-                    "reason": "Channel implementation not found"
+                    "channel_name": channel.name,
+                    "reason": "Channel deadline exceeded",
+                    "timed_out": True,
+                    "timestamp": datetime.now().isoformat(),
+                    "latency_ms": (now - start) * 1000
                 }
+                self._breaker(channel_id).record(False, now - start)
+                self.logger.error(f"Timed out sending alert through {channel.name}")
+        
+        dispatched = [results[channel_id] for channel_id in channel_ids]
+        results[DISPATCH_KEY] = {
+            "channels": len(dispatched),
+            "sent": sum(1 for result in dispatched if result["sent"]),
+            "timed_out": sum(1 for result in dispatched if result.get("timed_out")),
+            "circuit_open": sum(1 for result in dispatched if result.get("circuit_open")),
+            "in_progress": sum(1 for result in dispatched if result.get("in_progress")),
+            "latency_ms": (time.perf_counter() - start) * 1000
+        }
         
         return results
     
+    def _overdue_status(self, channel_id: str, alert_id: Optional[str]) -> Optional[str]:
+        """Whether an earlier send past its deadline affects this one: "sent" if this alert's went
+        through, "running" if it is still going, "busy" if the channel has too many running"""
+        key = (channel_id, alert_id)
+        with self._overdue_lock:
+            if alert_id is not None and self._late_sent.pop(key, None):
+                return "sent"
+            if alert_id is not None and key in self._overdue:
+                return "running"
+            if sum(1 for overdue in self._overdue if overdue[0] == channel_id) >= self.max_overdue_sends:
+                return "busy"
+        return None
+    
+    def _track_overdue(self, channel_id: str, alert_id: Optional[str], future: Future) -> None:
+        """Keep track of a send abandoned at its deadline until it finishes"""
+        key = (channel_id, alert_id if alert_id is not None else f"#{id(future)}")
+        
+        def finished(done: Future) -> None:
+            try:
+                success = done.result()[0]
+            except Exception:
+                success = False
+            with self._overdue_lock:
+                self._overdue.pop(key, None)
+                if success and alert_id is not None:
+                    self._late_sent[key] = datetime.now().isoformat()
+                    while len(self._late_sent) > 1000:
+                        self._late_sent.popitem(last=False)
+            self.logger.info(f"Overdue send through {channel_id} finished: {'sent' if success else 'failed'}")
+        
+        with self._overdue_lock:
+            self._overdue[key] = future
+        future.add_done_callback(finished)
+    
+    def _address(self, alert_message: AlertMessage, channel_id: str, implementation: Any) -> AlertMessage:
+        """Address a located alert to the channel's subscribers near it, streamed lazily"""
+        if self.subscribers is None or not getattr(implementation, "subscriber_addressed", False):
+            return alert_message
+        
+        # A digest targets the area of every incident in it
+        metadata = alert_message.metadata or {}
+        targets = [(i["latitude"], i["longitude"], i["hazard_type"]) for i in metadata.get("incidents", [])]
+        if not targets:
+            targets = [(metadata.get("latitude"), metadata.get("longitude"), metadata.get("hazard_type", ""))]
+        targets = [target for target in targets if target[0] is not None and target[1] is not None]
+        if not targets:
+            return alert_message
+        
+        def recipients() -> Iterator[str]:
+            # Overlapping incident areas would reach some subscribers twice
+            seen: Optional[set] = set() if len(targets) > 1 else None
+            for latitude, longitude, hazard_type in targets:
+                radius = self.hazard_radius_km.get(hazard_type.lower(), DEFAULT_RADIUS_KM)
+                for address in self.subscribers.recipients(latitude, longitude, radius, channel_id, hazard_type):
+                    if seen is not None:
+                        if address in seen:
+                            continue
+                        seen.add(address)
+                    yield address
+        
+        return replace(alert_message, recipients=recipients())
+    
+    def _breaker(self, channel_id: str) -> CircuitBreaker:
+        """Get the channel's circuit breaker, creating it from the channel settings on first use"""
+        with self._breakers_lock:
+            if channel_id not in self.breakers:
+                channel = self.channels.get(channel_id)
+                settings = (channel.circuit_breaker if channel else None) or {}
+                self.breakers[channel_id] = CircuitBreaker(**settings)
+            return self.breakers[channel_id]
+    
+    def _deliver_queued(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Outbox worker: send a queued alert, asking for a retry of only the channels that failed"""
+        alert_message = self._decode_message(payload)
+        channel_ids = [channel_id for channel_id in payload["channels"]
+                       if channel_id in self.channel_implementations]
+        
+        results = self._dispatch(alert_message, channel_ids)
+        results.pop(DISPATCH_KEY)
+        # Keep the outcomes of earlier attempts for channels that already succeeded
+        results = {**payload["results"], **results}
+        
+        failed = [channel_id for channel_id in channel_ids if not results[channel_id]["sent"]]
+        if failed:
+            # Channels behind an open breaker or with an overdue send still running were not
+            # tried: come back when the breaker half-opens or the send has had time to finish
+            skipped = [channel_id for channel_id in failed
+                       if results[channel_id].get("circuit_open") or results[channel_id].get("in_progress")]
+            retry_after = max((results[channel_id]["retry_after_seconds"] for channel_id in skipped), default=None)
+            raise DeliveryFailed(f"Channels failed: {', '.join(failed)}",
+                                 {**payload, "channels": failed, "results": results},
+                                 retry_after=retry_after,
+                                 attempted=len(skipped) < len(failed))
+        return results
+    
+    def get_delivery(self, outbox_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the delivery state of a queued alert
+        
+        Args:
+            outbox_id: Id returned under DISPATCH_KEY by send_alert
+            
+        Returns:
+            Status (pending, in_flight, delivered or dead), attempts, last error
+            and per-channel results, or None if unknown
+        """
+        if self.outbox is None:
+            return None
+        return self.outbox.get(outbox_id)
+    
+    def get_outbox_stats(self) -> Dict[str, Any]:
+        """
+        Get outbox metrics
+        
+        Returns:
+            Message counts by status, queue depth, pending alerts and queueing delay
+            percentiles per alert level, and age of the oldest undelivered alert
+            (empty when alerts are sent inline)
+        """
+        if self.outbox is None:
+            return {}
+        return self.outbox.get_stats()
+    
+    @staticmethod
+    def _send_through(implementation: Any, alert_message: AlertMessage) -> Tuple[bool, Dict[str, Any]]:
+        """Send on one channel, with per-recipient outcomes when the channel reports them"""
+        if hasattr(implementation, 'deliver'):
+            report = implementation.deliver(alert_message)
+            return _reached(report), report
+        return bool(implementation.send_alert(alert_message)), {}
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the outbox workers and channel dispatch threads
+        
+        Buffered digests are sent first; undelivered alerts stay in the outbox
+        and are sent after the next start.
+        
+        Args:
+            wait: Block until in-flight channel sends finish
+        """
+        self.coalescer.shutdown()
+        if self.outbox is not None:
+            self.outbox.shutdown(wait=wait)
+        self._executor.shutdown(wait=wait)
+        for implementation in self.channel_implementations.values():
+            if hasattr(implementation, 'close'):
+                implementation.close()
+    
     def get_channel_status(self) -> Dict[str, Any]:
         """
         Get status of all channels
         
         Returns:
-            Dictionary with channel status information
+            Dictionary with channel status information, including circuit breaker
+            state and rolling success rate and latency
         """
         status = {}
         for channel_id, channel in self.channels.items():
@@ -671,7 +1443,9 @@ class MultiChannelAlertService:
                 "name": channel.name,
                 "enabled": channel.enabled,
                 "priority_levels": channel.priority_levels,
-                "configured": channel_id in self.channel_implementations
+                "configured": channel_id in self.channel_implementations,
+                "coalesce_window_seconds": channel.coalesce_window_seconds,
+                "circuit_breaker": self._breaker(channel_id).get_stats()
             }
         return status
     
@@ -724,7 +1498,8 @@ def main():
     status = service.get_channel_status()
     for channel_id, channel_status in status.items():
         print(f"  {channel_id}: {'✅' if channel_status['enabled'] else '❌'} "
-              f"{channel_status['name']} - Levels: {', '.join(channel_status['priority_levels'])}")
+              f"{channel_status['name']} - Levels: {', '.join(channel_status['priority_levels'])} "
+              f"- Circuit: {channel_status['circuit_breaker']['state']}")
     
     # Test alert sending
     print("\n📤 Testing Alert Sending:")
@@ -743,9 +1518,15 @@ def main():
             alert_level, hazard_type, location, description, confidence
         )
         
+        dispatch = results.pop(DISPATCH_KEY)
+        print(f"  Dispatched to {dispatch['channels']} channels in {dispatch['latency_ms']:.0f} ms")
         for channel_id, result in results.items():
             if result.get('sent'):
                 print(f"  ✅ {channel_id}: Alert sent successfully")
+            elif result.get('queued'):
+                print(f"  📥 {channel_id}: Queued as outbox message {result['outbox_id']}")
+            elif result.get('coalesced'):
+                print(f"  📋 {channel_id}: Held for digest in {result['digest_in_seconds']:.0f} s")
             else:
                 print(f"  ❌ {channel_id}: {result.get('reason', 'Failed')}")
     
@@ -771,13 +1552,22 @@ def main():
     results = service.send_alert(
         "RED", "oil_spill", "Venice Beach", "Large oil slick detected", 0.92, mock_image_data
     )
+    results.pop(DISPATCH_KEY)
     
     for channel_id, result in results.items():
         if result.get('sent'):
             print(f"  ✅ {channel_id}: Alert with image sent successfully")
+        elif result.get('queued'):
+            print(f"  📥 {channel_id}: Alert with image queued as outbox message {result['outbox_id']}")
         else:
             print(f"  ❌ {channel_id}: {result.get('reason', 'Failed')}")
     
+    # Wait for the outbox workers to deliver the queued alerts
+    if service.outbox is not None:
+        service.outbox.drain(timeout=60)
+        print(f"\n📬 Outbox: {service.get_outbox_stats()}")
+    service.shutdown()
+    
     print("\n🎉 Testing completed!")
     print("=" * 50)
 
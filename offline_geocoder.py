@@ -0,0 +1,255 @@
+"""
+Offline nearest-place reverse geocoder
+
+A gazetteer CSV (name, latitude, longitude) is compiled once into a grid
+index stored as flat .npy arrays: points sorted by grid cell, the sorted list
+of occupied cell ids with their start offsets, and a UTF-8 name blob. The
+arrays are opened memory-mapped, so loading is instant and lookups only touch
+the pages of the cells they search.
+
+Each build goes into a fresh version subdirectory of the index directory, and
+a CURRENT pointer file is then switched to it atomically. Files a reader may
+have mapped are never rewritten in place: readers keep the version they
+opened, and new readers get the new one.
+"""
+
+import csv
+import json
+import logging
+import math
+import os
+import shutil
+import time
+from typing import Optional, Tuple
+
+import numpy as np #type: ignore
+
+
+POINTER_FILE = "CURRENT"
+INDEX_FILES = ("cell_ids", "cell_starts", "latitudes", "longitudes", "name_offsets", "names")
+KM_PER_DEGREE = 111.32
+
+
+def _source_signature(csv_path: str) -> dict:
+    """Identify a gazetteer CSV by path, size and modification time"""
+    stat = os.stat(csv_path)
+    return {"source": os.path.abspath(csv_path), "source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+
+def current_index_dir(index_dir: str) -> str:
+    """
+    Resolve the version of an index directory that readers should open
+
+    Args:
+        index_dir: Index directory passed to build_gazetteer_index
+
+    Returns:
+        Directory holding the current index files (index_dir itself for indexes
+        built before versioning)
+    """
+    try:
+        with open(os.path.join(index_dir, POINTER_FILE)) as f:
+            return os.path.join(index_dir, f.read().strip())
+    except FileNotFoundError:
+        return index_dir
+
+
+def build_gazetteer_index(csv_path: str, index_dir: str, cell_degrees: float = 0.1) -> int:
+    """
+    Compile a gazetteer CSV into a memory-mappable grid index
+
+    Args:
+        csv_path: CSV with name, latitude and longitude columns
+        index_dir: Index directory; the arrays go into a new version subdirectory of it
+        cell_degrees: Grid cell size in degrees
+
+    Returns:
+        Number of places indexed
+    """
+    names, latitudes, longitudes = [], [], []
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            try:
+                latitudes.append(float(row['latitude']))
+                longitudes.append(float(row['longitude']))
+                names.append(row['name'].strip())
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lon = np.asarray(longitudes, dtype=np.float64)
+    n_cols = int(math.ceil(360.0 / cell_degrees))
+    rows = np.floor((lat + 90.0) / cell_degrees).astype(np.int64)
+    cols = np.floor((lon + 180.0) / cell_degrees).astype(np.int64) % n_cols
+    cells = rows * n_cols + cols
+
+    order = np.argsort(cells, kind='stable')
+    cells = cells[order]
+    cell_ids, cell_starts = np.unique(cells, return_index=True)
+    cell_starts = np.append(cell_starts, len(cells)).astype(np.int64)
+
+    encoded = [names[i].encode('utf-8') for i in order]
+    name_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(name) for name in encoded], out=name_offsets[1:])
+    name_blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    version_dir = os.path.join(index_dir, version)
+    os.makedirs(version_dir)
+    arrays = {
+        "cell_ids": cell_ids.astype(np.int64),
+        "cell_starts": cell_starts,
+        "latitudes": lat[order],
+        "longitudes": lon[order],
+        "name_offsets": name_offsets,
+        "names": name_blob,
+    }
+    for key, array in arrays.items():
+        np.save(os.path.join(version_dir, f"{key}.npy"), array)
+
+    with open(os.path.join(version_dir, "meta.json"), "w") as f:
+        json.dump({"cell_degrees": cell_degrees, "n_cols": n_cols, "places": len(encoded),
+                   **_source_signature(csv_path)}, f, indent=4)
+
+    # Switch readers over in one atomic rename
+    previous = current_index_dir(index_dir)
+    pointer_tmp = os.path.join(index_dir, f"{POINTER_FILE}.{version}.tmp")
+    with open(pointer_tmp, "w") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(index_dir, POINTER_FILE))
+
+    # Older versions go; the one just replaced stays for readers that resolved it a moment
+    # ago. Unlinking a mapped file is safe, the mapping keeps its data.
+    for name in os.listdir(index_dir):
+        path = os.path.join(index_dir, name)
+        if name.startswith("v") and os.path.isdir(path) and path not in (version_dir, previous):
+            shutil.rmtree(path, ignore_errors=True)
+        elif name == "meta.json" or (name.endswith(".npy") and name[:-4] in INDEX_FILES):
+            os.remove(path)  # Pre-versioning layout
+
+    return len(encoded)
+
+
+class OfflineGeocoder:
+    """Nearest-place lookups over a memory-mapped gazetteer grid index"""
+
+    def __init__(self, index_dir: str, max_distance_km: float = 50.0):
+        """
+        Open a compiled gazetteer index
+
+        Args:
+            index_dir: Directory written by build_gazetteer_index
+            max_distance_km: Places farther than this are not reported
+        """
+        self.index_dir = index_dir
+        index_dir = current_index_dir(index_dir)
+        self.max_distance_km = max_distance_km
+        self.logger = logging.getLogger(__name__)
+
+        with open(os.path.join(index_dir, "meta.json")) as f:
+            meta = json.load(f)
+        self.cell_degrees = meta["cell_degrees"]
+        self.n_cols = meta["n_cols"]
+        self.n_rows = int(math.ceil(180.0 / self.cell_degrees))
+
+        # Plain ndarray views over the mappings skip np.memmap's per-slice overhead
+        arrays = {key: np.load(os.path.join(index_dir, f"{key}.npy"), mmap_mode='r').view(np.ndarray)
+                  for key in INDEX_FILES}
+        self.cell_ids = arrays["cell_ids"]
+        self.cell_starts = arrays["cell_starts"]
+        self.latitudes = arrays["latitudes"]
+        self.longitudes = arrays["longitudes"]
+        self.name_offsets = arrays["name_offsets"]
+        self.names = arrays["names"]
+
+    @classmethod
+    def from_csv(cls, csv_path: str, index_dir: Optional[str] = None, **kwargs) -> "OfflineGeocoder":
+        """
+        Open the index for a gazetteer CSV, rebuilding it if it was built from
+        another file or the CSV has changed (size or modification time)
+
+        Args:
+            csv_path: Gazetteer CSV path
+            index_dir: Index directory (defaults to cache/gazetteer_index)
+            **kwargs: Passed to the constructor
+
+        Returns:
+            OfflineGeocoder instance
+        """
+        index_dir = index_dir or os.path.join("cache", "gazetteer_index")
+        meta_path = os.path.join(current_index_dir(index_dir), "meta.json")
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        signature = _source_signature(csv_path)
+        if any(meta.get(key) != value for key, value in signature.items()):
+            count = build_gazetteer_index(csv_path, index_dir)
+            logging.getLogger(__name__).info(f"Built gazetteer index with {count} places in {index_dir}")
+        return cls(index_dir, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    def _square_cells(self, row: int, col: int, radius: int) -> np.ndarray:
+        """Cell ids within the given Chebyshev radius of a cell"""
+        rows = np.arange(max(row - radius, 0), min(row + radius, self.n_rows - 1) + 1)
+        if 2 * radius + 1 >= self.n_cols:
+            cols = np.arange(self.n_cols)
+        else:
+            cols = np.arange(col - radius, col + radius + 1) % self.n_cols
+        return np.add.outer(rows * self.n_cols, cols).ravel()
+
+    def nearest(self, latitude: float, longitude: float) -> Optional[Tuple[str, float]]:
+        """
+        Find the nearest gazetteer place
+
+        Args:
+            latitude: GPS latitude
+            longitude: GPS longitude
+
+        Returns:
+            Tuple of (place name, distance in km), or None if nothing is within range
+        """
+        if len(self.cell_ids) == 0:
+            return None
+
+        row = int((latitude + 90.0) // self.cell_degrees)
+        col = int((longitude + 180.0) // self.cell_degrees) % self.n_cols
+        cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+
+        # Points outside a square of radius r cells are at least r cells away
+        cell_km = self.cell_degrees * KM_PER_DEGREE * cos_lat
+        max_radius = int(self.max_distance_km / cell_km) + 1
+
+        best_index, best_km = -1, float('inf')
+        radius = 1
+        while True:
+            cells = self._square_cells(row, col, radius)
+            positions = np.searchsorted(self.cell_ids, cells)
+            in_range = positions < len(self.cell_ids)
+            positions, cells = positions[in_range], cells[in_range]
+            hits = positions[self.cell_ids[positions] == cells]
+
+            if len(hits):
+                # Expand the [start, end) range of every hit cell into point indices
+                starts = self.cell_starts[hits]
+                lengths = self.cell_starts[hits + 1] - starts
+                candidates = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+                d_lat = self.latitudes[candidates] - latitude
+                d_lon = (self.longitudes[candidates] - longitude + 180.0) % 360.0 - 180.0
+                distances = KM_PER_DEGREE * np.hypot(d_lat, d_lon * cos_lat)
+
+                i = int(np.argmin(distances))
+                best_index, best_km = int(candidates[i]), float(distances[i])
+
+            if best_km <= radius * cell_km or radius >= max_radius:
+                break
+            # Grow geometrically so sparse regions need only a few vectorized passes
+            radius = min(radius * 2, max_radius)
+
+        if best_index < 0 or best_km > self.max_distance_km:
+            return None
+
+        start, end = self.name_offsets[best_index], self.name_offsets[best_index + 1]
+        return bytes(self.names[start:end]).decode('utf-8'), best_km
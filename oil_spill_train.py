@@ -7,6 +7,8 @@ import matplotlib.pyplot as plt #type: ignore
 import seaborn as sns #type: ignore
 import json
 import os
+import sys
+from model_evaluation import CrossValidator, CLASSIFICATION_METRICS, update_metrics_file
 
 class OilSpillModel:
 
@@ -17,9 +19,13 @@ class OilSpillModel:
         # make sure artifacts folder exists
         os.makedirs("artifacts/oil_spill", exist_ok=True)
 
+    def build_model(self):
+
+        return RandomForestClassifier(n_estimators=300, class_weight="balanced", random_state=42)
+
     def train_model(self):
 
-        self.model = RandomForestClassifier(n_estimators=300, class_weight="balanced", random_state=42)
+        self.model = self.build_model()
 
         # Split features and labels
         X = self.data.drop("target", axis=1)
@@ -58,6 +64,19 @@ class OilSpillModel:
 
         print("✅ Training done. Artifacts saved in /artifacts/oil_spill folder.")
 
+    def cross_validate_model(self, n_splits=5, n_jobs=-1):
+
+        X = self.data.drop("target", axis=1)
+        y = self.data["target"]
+
+        # Folds are fitted in parallel and cached under artifacts/oil_spill/cv_cache
+        validator = CrossValidator(self.build_model(), "artifacts/oil_spill/cv_cache", n_splits=n_splits, n_jobs=n_jobs)
+        results = validator.evaluate(X, y, CLASSIFICATION_METRICS)
+        update_metrics_file("artifacts/oil_spill/metrics.json", "cross_validation", results)
+
+        print(f"✅ {n_splits}-fold CV done ({results['folds_refit']} refit, {results['folds_cached']} cached).")
+        return results
+
     def save_model(self, path="models/oil_spill_rf.pkl"):
 
         os.makedirs("models", exist_ok=True)
@@ -80,6 +99,9 @@ class OilSpillModel:
 
 def main():
     oil_spill_model = OilSpillModel("data/oil_spill.csv")
+    if "--cv" in sys.argv:
+        oil_spill_model.cross_validate_model()
+        return
     oil_spill_model.train_model()
     oil_spill_model.save_model("models/oil_spill_rf.pkl")
 
@@ -0,0 +1,117 @@
+"""
+Cheap pre-filter cascade in front of the hazard forests
+
+The first stage scores an upload with only the first few trees of each
+loaded forest. Uploads whose every sub-forest score is below a threshold
+(well under the 0.3 significance cutoff used by the full models) are clear
+negatives and are answered without running the full forests; everything else
+is passed on as a candidate. Outcomes and end-to-end latencies are recorded
+so the short-circuit rate can be tuned against a labeled sample set.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Dict, Tuple
+
+import numpy as np #type: ignore
+
+
+class PrefilterCascade:
+    """Sub-forest first stage that short-circuits clear negatives"""
+
+    def __init__(self, n_trees: int = 10, threshold: float = 0.15, timing_window: int = 1000):
+        """
+        Initialize the cascade
+
+        Args:
+            n_trees: Trees of each forest used by the first stage
+            threshold: Uploads scoring below this for every hazard are short-circuited
+            timing_window: Recent latency samples kept per outcome
+        """
+        self.n_trees = n_trees
+        self.threshold = threshold
+
+        self._lock = threading.Lock()
+        self._counters = {"screened": 0, "short_circuited": 0, "candidates": 0}
+        self._timings = {"short_circuited": deque(maxlen=timing_window),
+                         "full_models": deque(maxlen=timing_window)}
+
+    def _stage_score(self, hazard_type: str, model: Any, rows: np.ndarray) -> np.ndarray:
+        """Score rows with the first n_trees trees of a forest"""
+        estimators = getattr(model, "estimators_", None)
+        if not estimators:
+            # Not a forest: nothing cheaper to run, so never short-circuit on it
+            return np.ones(len(rows))
+
+        trees = estimators[:self.n_trees]
+        if hazard_type == "coastal_erosion":
+            return np.clip(np.mean([tree.predict(rows) for tree in trees], axis=0), 0.0, 1.0)
+
+        # Tree probability columns follow the forest's classes_
+        positive = list(model.classes_).index(1) if 1 in model.classes_ else -1
+        if positive < 0:
+            return np.zeros(len(rows))
+        return np.mean([tree.predict_proba(rows)[:, positive] for tree in trees], axis=0)
+
+    def screen(self, models: Dict[str, Any], features: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Run the first stage over a stacked feature matrix
+
+        Args:
+            models: Loaded models by hazard type
+            features: Hazard type to (n_images, n_features) matrix
+
+        Returns:
+            Tuple of (boolean mask of clear negatives, first-stage scores by hazard type)
+        """
+        scores = {hazard_type: self._stage_score(hazard_type, model, features[hazard_type])
+                  for hazard_type, model in models.items() if hazard_type in features}
+        if not scores:
+            return np.zeros(0, dtype=bool), scores
+
+        negative = np.all(np.vstack(list(scores.values())) < self.threshold, axis=0)
+        with self._lock:
+            self._counters["screened"] += len(negative)
+            self._counters["short_circuited"] += int(negative.sum())
+            self._counters["candidates"] += int(len(negative) - negative.sum())
+        return negative, scores
+
+    def record(self, seconds: float, short_circuited: bool) -> None:
+        """
+        Record the end-to-end latency of one detection
+
+        Args:
+            seconds: Time from receiving the upload to the verdict
+            short_circuited: Whether the first stage answered it
+        """
+        with self._lock:
+            self._timings["short_circuited" if short_circuited else "full_models"].append(seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get short-circuit rate and latency distribution
+
+        Returns:
+            Counters, short-circuit fraction and latency percentiles in ms per outcome and overall
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counters)
+            samples = {name: list(values) for name, values in self._timings.items()}
+
+        stats["short_circuit_fraction"] = (stats["short_circuited"] / stats["screened"]
+                                           if stats["screened"] else 0.0)
+        samples["all"] = samples["short_circuited"] + samples["full_models"]
+
+        stats["latency_ms"] = {}
+        for name, values in samples.items():
+            if not values:
+                continue
+            values_ms = np.array(values) * 1000
+            stats["latency_ms"][name] = {
+                "count": len(values_ms),
+                "mean": float(values_ms.mean()),
+                "p50": float(np.percentile(values_ms, 50)),
+                "p95": float(np.percentile(values_ms, 95)),
+                "p99": float(np.percentile(values_ms, 99)),
+            }
+        return stats
@@ -0,0 +1,187 @@
+"""
+Concurrent per-recipient delivery with a concurrency cap and a rate limit
+
+Channels that address recipients one at a time (SMS, voice calls) hand this
+module a send function and an iterable of recipients. Sends run on a bounded
+thread pool, never more than max_concurrency at once, and a token bucket
+keeps the start rate under the provider's limit. Every recipient gets its own
+outcome, so one failure never stops delivery to the rest. Recipients are
+pulled from the iterable lazily, so generators of any length are fine; very
+large audiences can instead go out chunk by chunk with progress checkpoints
+(see recipient_sources.CheckpointedBroadcast).
+"""
+
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait as wait_futures
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+
+SendFunction = Callable[[str], Any]
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Split an iterable into lists of at most size items, consuming it lazily
+
+    Args:
+        items: Any iterable (generators included)
+        size: Maximum chunk length
+
+    Yields:
+        Consecutive chunks
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class RateLimiter:
+    """Thread-safe token bucket"""
+
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None):
+        """
+        Initialize the limiter
+
+        Args:
+            rate_per_second: Sustained permits per second
+            burst: Bucket size (defaults to one second of permits)
+        """
+        self.rate = rate_per_second
+        self.capacity = burst if burst is not None else max(1.0, rate_per_second)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a permit is available and take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait_seconds = (1.0 - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+class RecipientDelivery:
+    """Bounded, rate-limited fan-out of one send per recipient"""
+
+    def __init__(self,
+                 max_concurrency: int = 10,
+                 rate_limit_per_second: Optional[float] = None,
+                 name: str = "delivery"):
+        """
+        Initialize the delivery pool
+
+        Args:
+            max_concurrency: Sends in flight at once
+            rate_limit_per_second: Provider limit on sends started per second (None for no limit)
+            name: Thread name prefix
+        """
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = RateLimiter(rate_limit_per_second) if rate_limit_per_second else None
+        self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=name)
+
+    def _send_one(self, send: SendFunction, recipient: str) -> Dict[str, Any]:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        start = time.perf_counter()
+        try:
+            result = send(recipient)
+            outcome = {"recipient": recipient, "delivered": True}
+            if result is not None:
+                outcome["id"] = result
+        except Exception as e:
+            outcome = {"recipient": recipient, "delivered": False, "error": str(e)}
+        outcome["latency_ms"] = (time.perf_counter() - start) * 1000
+        return outcome
+
+    def deliver(self, recipients: Iterable[str], send: SendFunction) -> Dict[str, Any]:
+        """
+        Send to every recipient concurrently
+
+        Args:
+            recipients: Recipient addresses (any iterable, consumed lazily)
+            send: Sends to one recipient, returning a provider id or raising on failure
+
+        Returns:
+            Delivered and failed counts, total time and one outcome per recipient
+        """
+        start = time.perf_counter()
+        outcomes: List[Dict[str, Any]] = []
+        pending: "set[Future]" = set()
+
+        # Keep a bounded window of queued sends so huge recipient lists are never materialized
+        window = 2 * self.max_concurrency
+        for recipient in recipients:
+            if len(pending) >= window:
+                done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+                outcomes.extend(future.result() for future in done)
+            pending.add(self._executor.submit(self._send_one, send, recipient))
+        if pending:
+            done, _ = wait_futures(pending)
+            outcomes.extend(future.result() for future in done)
+
+        delivered = sum(1 for outcome in outcomes if outcome["delivered"])
+        return {
+            "delivered": delivered,
+            "failed": len(outcomes) - delivered,
+            "elapsed_ms": (time.perf_counter() - start) * 1000,
+            "recipients": outcomes,
+        }
+
+    def deliver_chunks(self, broadcast: Any, send: SendFunction, max_failures: int = 100) -> Dict[str, Any]:
+        """
+        Send a checkpointed broadcast one chunk at a time
+
+        Each chunk is checkpointed once sent, so a retry resumes after it. A
+        chunk in which every send failed is not checkpointed and stops the
+        broadcast: the provider is likely down, and the retry starts there.
+
+        Args:
+            broadcast: CheckpointedBroadcast with the recipients still to reach
+            send: Sends to one recipient, returning a provider id or raising on failure
+            max_failures: Failed outcomes kept in the report
+
+        Returns:
+            Delivered and failed counts over the whole broadcast (earlier runs
+            included), whether it completed, chunks sent this run, the position
+            it resumed from, total time and the first failed outcomes
+        """
+        start = time.perf_counter()
+        failures: List[Dict[str, Any]] = []
+        chunks = 0
+        for chunk in broadcast.chunks():
+            report = self.deliver(chunk, send)
+            if report["delivered"] == 0:
+                failures.extend(report["recipients"][:max_failures - len(failures)])
+                break
+            broadcast.commit(len(chunk), report["delivered"], report["failed"])
+            chunks += 1
+            if len(failures) < max_failures:
+                failed = (outcome for outcome in report["recipients"] if not outcome["delivered"])
+                failures.extend(itertools.islice(failed, max_failures - len(failures)))
+
+        return {
+            "delivered": broadcast.delivered,
+            "failed": broadcast.failed,
+            "completed": broadcast.completed,
+            "chunks": chunks,
+            "resumed_from": broadcast.resumed_from,
+            "elapsed_ms": (time.perf_counter() - start) * 1000,
+            "recipients": failures,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the delivery threads"""
+        self._executor.shutdown(wait=wait)
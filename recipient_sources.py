@@ -0,0 +1,292 @@
+"""
+Streaming recipient sources and resumable broadcast checkpoints
+
+A channel's recipients can be an inline list, a file (one address per line,
+or a CSV column) or a SQL query against a SQLite database. File and query
+sources are read lazily as generators, so a regional broadcast to hundreds of
+thousands of numbers never holds the list in memory.
+
+Large broadcasts go out in fixed-size chunks. After each chunk the number of
+recipients processed is checkpointed in SQLite under a broadcast id that is
+stable across redeliveries of the same alert, so a broadcast interrupted by a
+crash resumes after the last completed chunk instead of starting over; at
+most one chunk is sent twice. Resuming relies on the source yielding
+recipients in the same order every time (files do; queries need ORDER BY).
+"""
+
+import csv
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS broadcasts (
+    broadcast_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    delivered INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_broadcasts_completed ON broadcasts (updated_at) WHERE completed = 1;
+"""
+
+RecipientSpec = Union[Sequence[str], Dict[str, Any]]
+
+
+def file_recipients(path: str, column: Optional[str] = None) -> Iterator[str]:
+    """
+    Lazily read recipients from a file
+
+    Args:
+        path: Text file with one address per line, or a CSV file when column is given
+        column: CSV column holding the address
+
+    Yields:
+        Addresses, skipping blank lines and lines starting with #
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if column is not None:
+            for row in csv.DictReader(f):
+                address = (row.get(column) or "").strip()
+                if address:
+                    yield address
+            return
+        for line in f:
+            address = line.strip()
+            if address and not address.startswith("#"):
+                yield address
+
+
+def sqlite_recipients(db_path: str, query: str, params: Sequence[Any] = (), batch_size: int = 1000) -> Iterator[str]:
+    """
+    Lazily read recipients from a SQLite query
+
+    Args:
+        db_path: SQLite database file
+        query: SELECT whose first column is the address (ORDER BY it for resumable broadcasts)
+        params: Query parameters
+        batch_size: Rows fetched per round trip
+
+    Yields:
+        Addresses
+    """
+    connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cursor = connection.execute(query, tuple(params))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                if row[0]:
+                    yield str(row[0])
+    finally:
+        connection.close()
+
+
+def recipient_source(spec: RecipientSpec) -> Callable[[], Iterable[str]]:
+    """
+    Turn a channel's recipients config into a factory of fresh recipient iterables
+
+    Args:
+        spec: A list of addresses, {"file": path, "column": optional CSV column} or
+              {"sqlite": db_path, "query": sql, "params": optional list}
+
+    Returns:
+        Callable returning a new iterable over the recipients on every call
+    """
+    if isinstance(spec, dict):
+        if "file" in spec:
+            return lambda: file_recipients(spec["file"], spec.get("column"))
+        if "sqlite" in spec:
+            return lambda: sqlite_recipients(spec["sqlite"], spec["query"], spec.get("params", ()))
+        raise ValueError(f"Unknown recipient source: {sorted(spec)}")
+    recipients = list(spec)
+    return lambda: recipients
+
+
+class BroadcastCheckpoints:
+    """SQLite record of how far each broadcast has got"""
+
+    def __init__(self, db_path: str = "data/broadcast_checkpoints.sqlite3"):
+        """
+        Open (or create) the checkpoint store
+
+        Args:
+            db_path: SQLite file (":memory:" for a throwaway store)
+        """
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._running: set = set()
+
+    def begin(self, broadcast_id: str) -> bool:
+        """
+        Mark a broadcast as running in this process
+
+        Args:
+            broadcast_id: Broadcast about to send
+
+        Returns:
+            False if it is already running (e.g. a retry that overtook a slow first attempt)
+        """
+        with self._lock:
+            if broadcast_id in self._running:
+                return False
+            self._running.add(broadcast_id)
+            return True
+
+    def end(self, broadcast_id: str) -> None:
+        """
+        Mark a broadcast as no longer running
+
+        Args:
+            broadcast_id: Broadcast that stopped sending
+        """
+        with self._lock:
+            self._running.discard(broadcast_id)
+
+    def load(self, broadcast_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a broadcast's progress
+
+        Args:
+            broadcast_id: Broadcast to look up
+
+        Returns:
+            Position, delivered and failed counts and completion flag, or None if never started
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT position, delivered, failed, completed FROM broadcasts WHERE broadcast_id = ?",
+                (broadcast_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"position": row[0], "delivered": row[1], "failed": row[2], "completed": bool(row[3])}
+
+    def save(self, broadcast_id: str, position: int, delivered: int, failed: int, completed: bool = False) -> None:
+        """
+        Record a broadcast's progress
+
+        Args:
+            broadcast_id: Broadcast to update
+            position: Recipients processed so far, in source order
+            delivered: Recipients delivered so far
+            failed: Recipients failed so far
+            completed: Whether the whole source has been processed
+        """
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO broadcasts (broadcast_id, position, delivered, failed, completed, "
+                    "updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (broadcast_id, position, delivered, failed, int(completed), time.time())
+                )
+
+    def purge_completed(self, older_than_seconds: float = 7 * 86400) -> int:
+        """
+        Forget finished broadcasts
+
+        Args:
+            older_than_seconds: Only those finished at least this long ago
+
+        Returns:
+            Number of checkpoints removed
+        """
+        with self._lock:
+            with self._db:
+                return self._db.execute(
+                    "DELETE FROM broadcasts WHERE completed = 1 AND updated_at <= ?",
+                    (time.time() - older_than_seconds,)
+                ).rowcount
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._db.close()
+
+
+class CheckpointedBroadcast:
+    """Chunks of one broadcast's recipients, skipping what a previous run already sent"""
+
+    def __init__(self,
+                 checkpoints: BroadcastCheckpoints,
+                 broadcast_id: str,
+                 recipients: Iterable[str],
+                 chunk_size: int = 1000):
+        """
+        Load the broadcast's checkpoint
+
+        Args:
+            checkpoints: Checkpoint store
+            broadcast_id: Id stable across redeliveries of the same alert on the same channel
+            recipients: Recipient source, in a stable order
+            chunk_size: Recipients per chunk
+        """
+        self.checkpoints = checkpoints
+        self.broadcast_id = broadcast_id
+        self.recipients = recipients
+        self.chunk_size = chunk_size
+        self.logger = logging.getLogger(__name__)
+
+        state = checkpoints.load(broadcast_id) or {"position": 0, "delivered": 0, "failed": 0, "completed": False}
+        self.resumed_from = state["position"]
+        self.position = state["position"]
+        self.delivered = state["delivered"]
+        self.failed = state["failed"]
+        self.completed = state["completed"]
+
+    def chunks(self) -> Iterator[List[str]]:
+        """
+        Yield the remaining recipients in chunks; call commit() after each one is sent
+
+        Yields:
+            Lists of at most chunk_size addresses
+
+        Raises:
+            RuntimeError: If the broadcast is already being sent by this process
+        """
+        if self.completed:
+            return
+        if not self.checkpoints.begin(self.broadcast_id):
+            raise RuntimeError(f"Broadcast {self.broadcast_id} is already in progress")
+        try:
+            if self.resumed_from:
+                self.logger.info(f"Resuming broadcast {self.broadcast_id} after {self.resumed_from} recipients")
+            iterator = itertools.islice(iter(self.recipients), self.position, None)
+            while True:
+                chunk = list(itertools.islice(iterator, self.chunk_size))
+                if not chunk:
+                    break
+                yield chunk
+            self.completed = True
+            self.checkpoints.save(self.broadcast_id, self.position, self.delivered, self.failed, completed=True)
+        finally:
+            self.checkpoints.end(self.broadcast_id)
+
+    def commit(self, processed: int, delivered: int, failed: int) -> None:
+        """
+        Checkpoint a sent chunk
+
+        Args:
+            processed: Recipients in the chunk
+            delivered: Of those, delivered
+            failed: Of those, failed
+        """
+        self.position += processed
+        self.delivered += delivered
+        self.failed += failed
+        self.checkpoints.save(self.broadcast_id, self.position, self.delivered, self.failed)
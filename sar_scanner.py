@@ -0,0 +1,286 @@
+"""
+Sliding-window scanning of large raw SAR scenes for oil spill detection
+
+Scenes are opened with np.memmap (a .npy file, or a headerless raster with a
+JSON or ENVI sidecar header), so only the rows being scanned are ever paged
+in. The scanner walks the scene one row of blocks at a time: block sums,
+squared sums, maxima and minima come from a reshape of that strip, window
+sums from an integral image over the last BLOCK_GRID block rows, and the 5x5
+block means of every window from a strided view. Peak memory is bounded by
+one block row of the scene plus one scoring batch, whatever the scene height.
+"""
+
+import json
+import logging
+import os
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np #type: ignore
+
+from image_features import BLOCK_GRID, BLOCK_SIZE, SAR_FEATURE_COUNT
+
+
+ScoreFunction = Callable[[np.ndarray], np.ndarray]
+
+# ENVI "data type" codes
+ENVI_DTYPES = {
+    1: "uint8",
+    2: "int16",
+    3: "int32",
+    4: "float32",
+    5: "float64",
+    12: "uint16",
+    13: "uint32",
+    14: "int64",
+    15: "uint64",
+}
+
+
+def _read_sidecar(path: str) -> Dict[str, Any]:
+    """Read the shape, dtype and layout of a headerless raster from its sidecar"""
+    base = os.path.splitext(path)[0]
+
+    for candidate in (path + ".json", base + ".json"):
+        if os.path.exists(candidate):
+            with open(candidate) as f:
+                header = json.load(f)
+            return {
+                "shape": tuple(header["shape"]),
+                "dtype": header["dtype"],
+                "offset": int(header.get("offset", 0)),
+                "byteorder": header.get("byteorder", "little"),
+            }
+
+    for candidate in (path + ".hdr", base + ".hdr"):
+        if os.path.exists(candidate):
+            fields = {}
+            with open(candidate) as f:
+                for line in f:
+                    if "=" in line:
+                        key, value = line.split("=", 1)
+                        fields[key.strip().lower()] = value.strip()
+            bands = int(fields.get("bands", 1))
+            shape = (int(fields["lines"]), int(fields["samples"]))
+            return {
+                "shape": shape if bands == 1 else shape + (bands,),
+                "dtype": ENVI_DTYPES[int(fields["data type"])],
+                "offset": int(fields.get("header offset", 0)),
+                "byteorder": "big" if fields.get("byte order", "0") == "1" else "little",
+            }
+
+    raise FileNotFoundError(f"No .json or .hdr sidecar header found for {path}")
+
+
+def open_scene(path: str, band: int = 0) -> np.ndarray:
+    """
+    Memory-map a raw raster scene without reading it
+
+    Args:
+        path: .npy file, or headerless raster with a .json or ENVI .hdr sidecar
+        band: Band to scan when the raster has a trailing band axis
+
+    Returns:
+        Read-only 2-D array view backed by the file
+    """
+    if path.endswith(".npy"):
+        scene = np.load(path, mmap_mode="r")
+    else:
+        header = _read_sidecar(path)
+        dtype = np.dtype(header["dtype"]).newbyteorder("<" if header["byteorder"] == "little" else ">")
+        scene = np.memmap(path, dtype=dtype, mode="r", offset=header["offset"], shape=header["shape"])
+
+    if scene.ndim == 3:
+        scene = scene[:, :, band]
+    if scene.ndim != 2:
+        raise ValueError(f"Expected a 2-D scene, got shape {scene.shape}")
+    return scene
+
+
+class SARSceneScanner:
+    """Streaming window feature extraction and batched scoring over a memory-mapped scene"""
+
+    def __init__(self,
+                 score_batch: ScoreFunction,
+                 block_size: int = BLOCK_SIZE,
+                 batch_size: int = 4096,
+                 scale: Optional[float] = None,
+                 n_features: int = SAR_FEATURE_COUNT):
+        """
+        Initialize the scanner
+
+        Args:
+            score_batch: Maps an (n_windows, n_features) matrix to n_windows scores
+            block_size: Block edge in pixels; windows are BLOCK_GRID blocks wide and step one block
+            batch_size: Windows scored per call
+            scale: Divisor bringing pixel values into [0, 1] (defaults to the integer dtype's maximum)
+            n_features: Width of the model input; statistics beyond the computed ones are noise-padded
+        """
+        self.score_batch = score_batch
+        self.block_size = block_size
+        self.batch_size = batch_size
+        self.scale = scale
+        self.n_features = n_features
+        self.window_size = BLOCK_GRID * block_size
+        self.logger = logging.getLogger(__name__)
+        self._rng = np.random.default_rng()
+
+    def grid_shape(self, scene: np.ndarray) -> Tuple[int, int]:
+        """Number of window rows and columns for a scene"""
+        block_rows = scene.shape[0] // self.block_size
+        block_cols = scene.shape[1] // self.block_size
+        return max(0, block_rows - BLOCK_GRID + 1), max(0, block_cols - BLOCK_GRID + 1)
+
+    def _scale_for(self, scene: np.ndarray) -> float:
+        if self.scale is not None:
+            return self.scale
+        if np.issubdtype(scene.dtype, np.integer):
+            return float(np.iinfo(scene.dtype).max)
+        return 1.0
+
+    def _block_row(self, scene: np.ndarray, row: int, n_block_cols: int, scale: float) -> Tuple[np.ndarray, ...]:
+        """Per-block sum, squared sum, max and min for one row of blocks"""
+        b = self.block_size
+        strip = np.asarray(scene[row * b:(row + 1) * b, :n_block_cols * b], dtype=np.float64)
+        strip /= scale
+        blocks = strip.reshape(b, n_block_cols, b)
+        return (blocks.sum(axis=(0, 2)), np.einsum("ijk,ijk->j", blocks, blocks),
+                blocks.max(axis=(0, 2)), blocks.min(axis=(0, 2)))
+
+    def _window_features(self, rows: "deque[Tuple[np.ndarray, ...]]") -> np.ndarray:
+        """SAR feature matrix for every window spanning the buffered block rows"""
+        sums, squares, maxima, minima = (np.stack(stat) for stat in zip(*rows))
+        n_windows = sums.shape[1] - BLOCK_GRID + 1
+        n_pixels = float(self.window_size * self.window_size)
+
+        # Integral images over the BLOCK_GRID buffered block rows
+        sat_sum = np.zeros((BLOCK_GRID + 1, sums.shape[1] + 1))
+        sat_sq = np.zeros_like(sat_sum)
+        np.cumsum(np.cumsum(sums, axis=0), axis=1, out=sat_sum[1:, 1:])
+        np.cumsum(np.cumsum(squares, axis=0), axis=1, out=sat_sq[1:, 1:])
+        left, right = slice(0, n_windows), slice(BLOCK_GRID, BLOCK_GRID + n_windows)
+        window_sum = sat_sum[-1, right] - sat_sum[-1, left]
+        window_sq = sat_sq[-1, right] - sat_sq[-1, left]
+
+        mean = window_sum / n_pixels
+        var = np.maximum(window_sq / n_pixels - mean ** 2, 0.0)
+
+        # Strided (n_windows, BLOCK_GRID, BLOCK_GRID) views; nothing is copied until the reductions
+        grid = (BLOCK_GRID, BLOCK_GRID)
+        block_means = np.lib.stride_tricks.sliding_window_view(sums, grid)[0] / (self.block_size ** 2)
+        window_max = np.lib.stride_tricks.sliding_window_view(maxima, grid)[0].max(axis=(1, 2))
+        window_min = np.lib.stride_tricks.sliding_window_view(minima, grid)[0].min(axis=(1, 2))
+
+        n_stats = 5 + BLOCK_GRID * BLOCK_GRID
+        features = np.empty((n_windows, max(self.n_features, n_stats)))
+        features[:, 0] = mean
+        features[:, 1] = np.sqrt(var)
+        features[:, 2] = var
+        features[:, 3] = window_max
+        features[:, 4] = window_min
+        features[:, 5:n_stats] = block_means.reshape(n_windows, -1)
+        # Same noise padding the image extractor uses for the remaining model inputs
+        features[:, n_stats:] = self._rng.random((n_windows, features.shape[1] - n_stats))
+        return features
+
+    def iter_features(self, scene: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Stream window features one row of windows at a time
+
+        Args:
+            scene: 2-D scene array (typically from open_scene)
+
+        Yields:
+            Tuple of (window row, (n_window_cols, n_features) features)
+        """
+        n_rows, n_cols = self.grid_shape(scene)
+        if not n_rows or not n_cols:
+            return
+        n_block_cols = n_cols + BLOCK_GRID - 1
+        scale = self._scale_for(scene)
+
+        rows: "deque[Tuple[np.ndarray, ...]]" = deque(maxlen=BLOCK_GRID)
+        for block_row in range(n_rows + BLOCK_GRID - 1):
+            rows.append(self._block_row(scene, block_row, n_block_cols, scale))
+            if len(rows) == BLOCK_GRID:
+                yield block_row - BLOCK_GRID + 1, self._window_features(rows)
+
+    def scan(self, scene: np.ndarray) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Score every window of a scene in batches
+
+        Args:
+            scene: 2-D scene array (typically from open_scene)
+
+        Yields:
+            Tuples of (window rows, window cols, scores) for each scored batch
+        """
+        n_cols = self.grid_shape(scene)[1]
+        pending: List[Tuple[int, np.ndarray]] = []
+        pending_windows = 0
+
+        def flush():
+            features = np.vstack([block for _, block in pending])
+            window_rows = np.repeat([row for row, _ in pending], n_cols)
+            window_cols = np.tile(np.arange(n_cols), len(pending))
+            return window_rows, window_cols, np.asarray(self.score_batch(features))
+
+        for row, features in self.iter_features(scene):
+            pending.append((row, features))
+            pending_windows += len(features)
+            if pending_windows >= self.batch_size:
+                yield flush()
+                pending, pending_windows = [], 0
+        if pending:
+            yield flush()
+
+    def scan_scene(self,
+                   scene: np.ndarray,
+                   top_k: int = 10,
+                   heatmap_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Scan a scene into a per-window score heatmap and its strongest hits
+
+        Args:
+            scene: 2-D scene array (typically from open_scene)
+            top_k: Number of highest-scoring windows to return
+            heatmap_path: Write the heatmap to this .npy file (memory-mapped) instead of RAM
+
+        Returns:
+            Dictionary with the heatmap, hits (pixel bounding boxes and scores) and window counts
+        """
+        n_rows, n_cols = self.grid_shape(scene)
+        if heatmap_path:
+            heatmap = np.lib.format.open_memmap(heatmap_path, mode="w+", dtype=np.float32, shape=(n_rows, n_cols))
+        else:
+            heatmap = np.zeros((n_rows, n_cols), dtype=np.float32)
+
+        for window_rows, window_cols, scores in self.scan(scene):
+            heatmap[window_rows, window_cols] = scores
+
+        hits = []
+        k = min(top_k, heatmap.size)
+        if k:
+            flat = np.asarray(heatmap).ravel()
+            top = np.argpartition(-flat, k - 1)[:k]
+            for index in top[np.argsort(-flat[top])]:
+                row, col = divmod(int(index), n_cols)
+                top_px, left_px = row * self.block_size, col * self.block_size
+                hits.append({
+                    "score": float(flat[index]),
+                    "row": row,
+                    "col": col,
+                    "bbox": (left_px, top_px, left_px + self.window_size, top_px + self.window_size),
+                })
+
+        if heatmap_path:
+            heatmap.flush()
+
+        return {
+            "heatmap": heatmap,
+            "hits": hits,
+            "windows": n_rows * n_cols,
+            "grid": (n_rows, n_cols),
+            "window_size": self.window_size,
+            "stride": self.block_size,
+        }
@@ -0,0 +1,203 @@
+"""
+Pool of authenticated, long-lived SMTP sessions
+
+Opening an SMTP session costs a TCP connect, a STARTTLS handshake and an AUTH
+round trip, which together dominate the time to send one alert email. The
+pool keeps a few logged-in sessions open and hands them out one caller at a
+time. Sessions idle past idle_timeout are closed, sessions idle past
+liveness_interval are probed with NOOP before reuse, and a send that fails
+because the server dropped the session is retried once on a fresh one.
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from email.message import Message
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+
+# Errors meaning the session is gone rather than the message being rejected
+# (SMTPException derives from OSError, so OSError itself is too broad)
+_DISCONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class SMTPConnectionPool:
+    """Bounded pool of reusable SMTP sessions with liveness checks and reconnect"""
+
+    def __init__(self,
+                 host: str,
+                 port: int = 587,
+                 username: Optional[str] = None,
+                 password: Optional[str] = None,
+                 use_tls: bool = True,
+                 max_connections: int = 2,
+                 idle_timeout: float = 60.0,
+                 liveness_interval: float = 5.0,
+                 timeout: float = 30.0):
+        """
+        Initialize the pool (no connection is opened until first use)
+
+        Args:
+            host: SMTP server address
+            port: SMTP server port
+            username: Login user (None skips AUTH)
+            password: Login password
+            use_tls: Upgrade sessions with STARTTLS
+            max_connections: Sessions open at once
+            idle_timeout: Close sessions unused for this many seconds
+            liveness_interval: Probe sessions idle longer than this with NOOP before reuse
+            timeout: Socket timeout for SMTP commands
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.liveness_interval = liveness_interval
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._idle: Deque[Tuple[smtplib.SMTP, float]] = deque()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._stats = {"connections_opened": 0, "connections_closed": 0, "reused": 0,
+                       "noop_checks": 0, "reconnects": 0, "messages_sent": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open, secure and authenticate a new session"""
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                connection.starttls()
+            if self.username:
+                connection.login(self.username, self.password or "")
+        except Exception:
+            self._close(connection)
+            raise
+        self._count("connections_opened")
+        return connection
+
+    def _close(self, connection: smtplib.SMTP) -> None:
+        """Close a session, ignoring errors from an already dead socket"""
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+        self._count("connections_closed")
+
+    @staticmethod
+    def _alive(connection: smtplib.SMTP) -> bool:
+        try:
+            return connection.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkout(self, fresh: bool = False) -> smtplib.SMTP:
+        """Take the most recently used live idle session, or open one (caller holds a slot)"""
+        while not fresh:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, last_used = self._idle.pop()
+
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.idle_timeout:
+                self._close(connection)
+                continue
+            if idle_for > self.liveness_interval:
+                self._count("noop_checks")
+                if not self._alive(connection):
+                    self._close(connection)
+                    continue
+            self._count("reused")
+            return connection
+
+        return self._connect()
+
+    def _checkin(self, connection: smtplib.SMTP) -> None:
+        with self._lock:
+            self._idle.append((connection, time.monotonic()))
+
+    @contextmanager
+    def connection(self, fresh: bool = False) -> Iterator[smtplib.SMTP]:
+        """
+        Borrow a session for the duration of a with block
+
+        A session that raises a disconnect error inside the block is closed
+        instead of being returned to the pool.
+
+        Args:
+            fresh: Open a new session instead of reusing an idle one
+
+        Yields:
+            Authenticated smtplib.SMTP session
+        """
+        with self._slots:
+            connection = self._checkout(fresh)
+            try:
+                yield connection
+            except _DISCONNECT_ERRORS:
+                self._close(connection)
+                raise
+            except Exception:
+                # Message-level errors leave the session usable once reset
+                try:
+                    connection.rset()
+                except Exception:
+                    self._close(connection)
+                    raise
+                self._checkin(connection)
+                raise
+            self._checkin(connection)
+
+    def send_message(self, message: Message, to_addrs: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Send a message on a pooled session, reconnecting once if the session was dropped
+
+        Args:
+            message: Email message with From and To headers
+            to_addrs: Envelope recipients (defaults to the message's To, Cc and Bcc)
+
+        Returns:
+            Refused recipients as returned by smtplib
+        """
+        try:
+            with self.connection() as connection:
+                refused = connection.send_message(message, to_addrs=to_addrs)
+        except _DISCONNECT_ERRORS as e:
+            self.logger.warning(f"SMTP session to {self.host} lost ({str(e)}), reconnecting")
+            self._count("reconnects")
+            with self.connection(fresh=True) as connection:
+                refused = connection.send_message(message, to_addrs=to_addrs)
+        self._count("messages_sent")
+        return refused
+
+    def close(self) -> None:
+        """Close every idle session"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return
+                connection, _ = self._idle.pop()
+            self._close(connection)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool counters
+
+        Returns:
+            Sessions opened, closed and reused, NOOP probes, reconnects, messages and idle sessions
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle_connections"] = len(self._idle)
+        return stats
@@ -0,0 +1,186 @@
+"""
+Incremental system status over active alert levels
+
+Keeps a count of active alerts per level, overall and for each configured
+region, so the highest active level is read off without scanning alerts.
+Optional expiry is driven by a min-heap of deadlines: inserts and refreshes
+push in O(log n), and expired alerts are popped off the top when the status
+is read. Superseded heap entries are skipped lazily.
+"""
+
+import heapq
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Ordered from lowest to highest severity
+LEVELS = ("GREEN", "YELLOW", "ORANGE", "RED")
+
+BoundingBox = Tuple[float, float, float, float]
+
+
+class AlertLevelTracker:
+    """Per-level (and per-region) counters of active alerts with heap-based expiry"""
+
+    def __init__(self, regions: Optional[Dict[str, BoundingBox]] = None,
+                 ttl_seconds: Optional[float] = None):
+        """
+        Initialize the tracker
+
+        Args:
+            regions: Region name to (min_lat, min_lon, max_lat, max_lon)
+            ttl_seconds: Active alerts expire this long after their last update (None never expires)
+        """
+        self.regions = dict(regions or {})
+        self.ttl_seconds = ttl_seconds
+
+        self._counts = [0] * len(LEVELS)
+        self._region_counts = {name: [0] * len(LEVELS) for name in self.regions}
+        self._alerts: Dict[int, Tuple[int, List[str]]] = {}
+        self._deadlines: Dict[int, float] = {}
+        self._heap: List[Tuple[float, int]] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _rank(level: str) -> int:
+        level = level.upper()
+        return LEVELS.index(level) if level in LEVELS else 0
+
+    def __contains__(self, alert_id: int) -> bool:
+        with self._lock:
+            return alert_id in self._alerts
+
+    def _regions_for(self, latitude: float, longitude: float) -> List[str]:
+        return [name for name, (min_lat, min_lon, max_lat, max_lon) in self.regions.items()
+                if min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon]
+
+    def _count(self, rank: int, regions: List[str], delta: int) -> None:
+        """Apply a count change overall and in each region (caller holds lock)"""
+        self._counts[rank] += delta
+        for name in regions:
+            self._region_counts[name][rank] += delta
+
+    def _schedule(self, alert_id: int, now: Optional[float]) -> None:
+        """Push a fresh expiry deadline (caller holds lock)"""
+        if self.ttl_seconds is None:
+            return
+        deadline = (time.time() if now is None else now) + self.ttl_seconds
+        self._deadlines[alert_id] = deadline
+        heapq.heappush(self._heap, (deadline, alert_id))
+
+    def add(self, alert_id: int, level: str, latitude: float, longitude: float,
+            now: Optional[float] = None) -> None:
+        """
+        Start tracking an active alert
+
+        Args:
+            alert_id: Alert id
+            level: Alert level
+            latitude: Alert latitude (for region membership)
+            longitude: Alert longitude
+            now: Time the alert was raised in epoch seconds (defaults to now)
+        """
+        rank = self._rank(level)
+        regions = self._regions_for(latitude, longitude)
+        with self._lock:
+            if alert_id in self._alerts:
+                return
+            self._alerts[alert_id] = (rank, regions)
+            self._count(rank, regions, 1)
+            self._schedule(alert_id, now)
+
+    def update(self, alert_id: int, level: str, now: Optional[float] = None) -> None:
+        """
+        Move a tracked alert to a new level and refresh its expiry
+
+        Args:
+            alert_id: Alert id
+            level: New alert level
+            now: Time of the update in epoch seconds (defaults to now)
+        """
+        rank = self._rank(level)
+        with self._lock:
+            entry = self._alerts.get(alert_id)
+            if entry is None:
+                return
+            old_rank, regions = entry
+            if rank != old_rank:
+                self._count(old_rank, regions, -1)
+                self._count(rank, regions, 1)
+                self._alerts[alert_id] = (rank, regions)
+            self._schedule(alert_id, now)
+
+    def remove(self, alert_id: int) -> bool:
+        """
+        Stop tracking an alert (cleared or expired)
+
+        Args:
+            alert_id: Alert id
+
+        Returns:
+            True if the alert was being tracked
+        """
+        with self._lock:
+            return self._remove(alert_id)
+
+    def _remove(self, alert_id: int) -> bool:
+        entry = self._alerts.pop(alert_id, None)
+        if entry is None:
+            return False
+        self._count(entry[0], entry[1], -1)
+        self._deadlines.pop(alert_id, None)
+        return True
+
+    def clear(self) -> None:
+        """Stop tracking every alert"""
+        with self._lock:
+            self._counts = [0] * len(LEVELS)
+            self._region_counts = {name: [0] * len(LEVELS) for name in self.regions}
+            self._alerts.clear()
+            self._deadlines.clear()
+            self._heap.clear()
+
+    def pop_expired(self, now: Optional[float] = None) -> List[int]:
+        """
+        Remove and return alerts whose deadline has passed
+
+        Args:
+            now: Current time in epoch seconds (defaults to now)
+
+        Returns:
+            Ids of the expired alerts
+        """
+        now = time.time() if now is None else now
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, alert_id = heapq.heappop(self._heap)
+                # Skip entries superseded by a later refresh or a removal
+                if self._deadlines.get(alert_id) != deadline:
+                    continue
+                self._remove(alert_id)
+                expired.append(alert_id)
+        return expired
+
+    @staticmethod
+    def _summary(counts: List[int]) -> Dict[str, Any]:
+        highest = max((rank for rank, count in enumerate(counts) if count), default=0)
+        return {
+            "status": LEVELS[highest],
+            "active_alerts_count": sum(counts),
+            "level_counts": dict(zip(LEVELS, counts)),
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get the highest active level overall and per region
+
+        Returns:
+            Status, active count and per-level counts, plus the same for each region
+        """
+        with self._lock:
+            status = self._summary(self._counts)
+            if self.regions:
+                status["regions"] = {name: self._summary(counts) for name, counts in self._region_counts.items()}
+        return status
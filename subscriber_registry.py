@@ -0,0 +1,244 @@
+"""
+Geo-targeted alert subscribers
+
+Subscribers register a home location, the channels they want alerts on (with
+their address on each: email, phone number) and optionally the hazard types
+they care about. Registrations persist in SQLite; an in-memory grid keyed by
+(row, col) cell holds them for queries, so finding everyone within a radius
+only visits the handful of cells the circle overlaps. Recipients are yielded
+lazily, cell by cell, so a channel can start sending before the whole
+audience has been resolved and large audiences are never materialized.
+"""
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscribers (
+    id TEXT PRIMARY KEY,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    contacts TEXT NOT NULL,
+    hazard_types TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+KM_PER_DEGREE = 111.32
+
+# (latitude, longitude, channel -> address, hazard types or None for all)
+Subscriber = Tuple[float, float, Dict[str, str], Optional[frozenset]]
+
+
+class SubscriberRegistry:
+    """SQLite-backed subscriber registry with an in-memory grid for radius queries"""
+
+    def __init__(self, db_path: str = "data/subscribers.sqlite3", cell_degrees: float = 0.05):
+        """
+        Open (or create) the registry and load it into the grid
+
+        Args:
+            db_path: SQLite file (":memory:" for a throwaway registry)
+            cell_degrees: Grid cell size in degrees (0.05 ~ 5.5 km)
+        """
+        self.db_path = db_path
+        self.cell_degrees = cell_degrees
+        self.logger = logging.getLogger(__name__)
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+        self._lock = threading.Lock()
+
+        self._cells: Dict[Tuple[int, int], Dict[str, Subscriber]] = {}
+        self._cell_of: Dict[str, Tuple[int, int]] = {}
+        for sid, latitude, longitude, contacts, hazard_types in self._db.execute(
+                "SELECT id, latitude, longitude, contacts, hazard_types FROM subscribers"):
+            self._index(sid, latitude, longitude, json.loads(contacts),
+                        json.loads(hazard_types) if hazard_types else None)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return int(latitude // self.cell_degrees), int(longitude // self.cell_degrees)
+
+    def _index(self,
+               subscriber_id: str,
+               latitude: float,
+               longitude: float,
+               contacts: Dict[str, str],
+               hazard_types: Optional[Iterable[str]]) -> None:
+        """Place a subscriber in its grid cell (caller holds the lock or is the constructor)"""
+        old_cell = self._cell_of.pop(subscriber_id, None)
+        if old_cell is not None:
+            self._cells[old_cell].pop(subscriber_id, None)
+            if not self._cells[old_cell]:
+                del self._cells[old_cell]
+
+        cell = self._cell(latitude, longitude)
+        self._cells.setdefault(cell, {})[subscriber_id] = (
+            latitude, longitude, dict(contacts), frozenset(hazard_types) if hazard_types else None
+        )
+        self._cell_of[subscriber_id] = cell
+
+    def add(self,
+            subscriber_id: str,
+            latitude: float,
+            longitude: float,
+            contacts: Dict[str, str],
+            hazard_types: Optional[List[str]] = None) -> None:
+        """
+        Register or update a subscriber
+
+        Args:
+            subscriber_id: Unique subscriber id
+            latitude: Home latitude
+            longitude: Home longitude
+            contacts: Channel id to address on that channel (e.g. {"sms": "+1555..."})
+            hazard_types: Only alert for these hazard types (None for all)
+        """
+        self.add_many([(subscriber_id, latitude, longitude, contacts, hazard_types)])
+
+    def add_many(self, subscribers: Iterable[Tuple[str, float, float, Dict[str, str], Optional[List[str]]]]) -> int:
+        """
+        Register or update subscribers in one transaction
+
+        Args:
+            subscribers: (subscriber_id, latitude, longitude, contacts, hazard_types) tuples
+
+        Returns:
+            Number of subscribers written
+        """
+        rows = [(sid, float(lat), float(lon), contacts, hazard_types)
+                for sid, lat, lon, contacts, hazard_types in subscribers]
+        now = time.time()
+        with self._lock:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO subscribers (id, latitude, longitude, contacts, hazard_types, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(sid, lat, lon, json.dumps(contacts), json.dumps(hazard_types) if hazard_types else None, now)
+                     for sid, lat, lon, contacts, hazard_types in rows]
+                )
+            for row in rows:
+                self._index(*row)
+        return len(rows)
+
+    def remove(self, subscriber_id: str) -> bool:
+        """
+        Unregister a subscriber
+
+        Args:
+            subscriber_id: Subscriber to remove
+
+        Returns:
+            True if the subscriber existed
+        """
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM subscribers WHERE id = ?", (subscriber_id,))
+            cell = self._cell_of.pop(subscriber_id, None)
+            if cell is None:
+                return False
+            self._cells[cell].pop(subscriber_id, None)
+            if not self._cells[cell]:
+                del self._cells[cell]
+        return True
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def _cells_within(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[int, int]]:
+        """Occupied cells overlapping the square around the circle, nearest first"""
+        cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+        d_rows = int(radius_km / (KM_PER_DEGREE * self.cell_degrees)) + 1
+        d_cols = int(radius_km / (KM_PER_DEGREE * self.cell_degrees * cos_lat)) + 1
+        row, col = self._cell(latitude, longitude)
+
+        with self._lock:
+            if (2 * d_rows + 1) * (2 * d_cols + 1) > len(self._cells):
+                # Sparse registry: checking every occupied cell is cheaper than the square
+                cells = [cell for cell in self._cells
+                         if abs(cell[0] - row) <= d_rows and abs(cell[1] - col) <= d_cols]
+            else:
+                cells = [(r, c) for r in range(row - d_rows, row + d_rows + 1)
+                         for c in range(col - d_cols, col + d_cols + 1) if (r, c) in self._cells]
+        return sorted(cells, key=lambda cell: abs(cell[0] - row) + abs(cell[1] - col))
+
+    def nearby(self,
+               latitude: float,
+               longitude: float,
+               radius_km: float,
+               channel: Optional[str] = None,
+               hazard_type: Optional[str] = None) -> Iterator[Tuple[str, Optional[str], float]]:
+        """
+        Lazily find subscribers within a radius
+
+        Args:
+            latitude: Center latitude
+            longitude: Center longitude
+            radius_km: Search radius in km
+            channel: Only subscribers with an address on this channel
+            hazard_type: Only subscribers interested in this hazard type
+
+        Yields:
+            (subscriber id, address on the channel, distance in km), nearest cells first
+        """
+        cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+        for cell in self._cells_within(latitude, longitude, radius_km):
+            with self._lock:
+                members = list(self._cells.get(cell, {}).items())
+            for sid, (lat, lon, contacts, hazard_types) in members:
+                if channel is not None and channel not in contacts:
+                    continue
+                if hazard_type is not None and hazard_types is not None and hazard_type not in hazard_types:
+                    continue
+                distance = KM_PER_DEGREE * math.hypot(lat - latitude, (lon - longitude) * cos_lat)
+                if distance <= radius_km:
+                    yield sid, contacts.get(channel) if channel is not None else None, distance
+
+    def recipients(self,
+                   latitude: float,
+                   longitude: float,
+                   radius_km: float,
+                   channel: str,
+                   hazard_type: Optional[str] = None) -> Iterator[str]:
+        """
+        Lazily list the channel addresses of subscribers within a radius
+
+        Args:
+            latitude: Center latitude
+            longitude: Center longitude
+            radius_km: Search radius in km
+            channel: Channel whose addresses are wanted
+            hazard_type: Only subscribers interested in this hazard type
+
+        Yields:
+            Addresses on the channel
+        """
+        for _, address, _ in self.nearby(latitude, longitude, radius_km, channel, hazard_type):
+            yield address
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get registry size
+
+        Returns:
+            Subscriber and occupied cell counts
+        """
+        with self._lock:
+            return {"subscribers": len(self._cell_of), "cells": len(self._cells)}
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._db.close()
@@ -91,17 +91,29 @@ def test_model_loading():
         print("❌ No models could be loaded")
         return False
 
+def temp_service_paths():
+    """Storage arguments pointing under a fresh temp dir, so tests leave data/ and cache/ alone"""
+    from geocoding_cache import GeocodingCache
+    
+    tmp = tempfile.mkdtemp()
+    return {"alert_db_path": os.path.join(tmp, "alerts.sqlite3"),
+            "image_store_path": os.path.join(tmp, "images"),
+            "geocoding_cache": GeocodingCache(db_path=os.path.join(tmp, "geocoding.sqlite3"))}
+
 def test_service_initialization():
     """Test if services can be initialized"""
     print("\n🚀 Testing service initialization...")
     
     try:
         # Test multi-channel alert service
-        multi_channel_service = MultiChannelAlertService()
+        multi_channel_service = MultiChannelAlertService(
+            outbox_path=os.path.join(tempfile.mkdtemp(), "alert_outbox.sqlite3")
+        )
         print("✅ Multi-channel alert service initialized")
         
         # Test citizen reporting service
-        citizen_service = CitizenReportingService(multi_channel_service=multi_channel_service)
+        citizen_service = CitizenReportingService(multi_channel_service=multi_channel_service,
+                                                  **temp_service_paths())
         print("✅ Citizen reporting service initialized")
         
         return True, multi_channel_service, citizen_service
@@ -143,6 +155,380 @@ def create_mock_file_object(file_path):
     
     return MockFile(file_path)
 
+def test_feature_extraction():
+    """Test the single-pass image feature extractor"""
+    print("\n🧮 Testing feature extraction...")
+    
+    from image_features import ImageFeatureExtractor, IMAGE_SIZE
+    
+    pixels = np.random.randint(0, 256, (IMAGE_SIZE, IMAGE_SIZE, 3), dtype=np.uint8)
+    features = ImageFeatureExtractor().extract(pixels)
+    
+    assert features['oil_spill'].shape == (1, 48)
+    assert features['algal_bloom'].shape == (1, 12)
+    assert features['coastal_erosion'].shape == (1, 6)
+    
+    # Grayscale mean and block means must match a plain float64 computation
+    gray = (pixels / 255.0).mean(axis=2)
+    assert np.isclose(features['oil_spill'][0, 0], gray.mean(), atol=1e-5)
+    assert np.isclose(features['oil_spill'][0, 5], gray[:44, :44].mean(), atol=1e-5)
+    assert np.isclose(features['coastal_erosion'][0, 3], np.abs(np.diff(gray, axis=0)).mean(), atol=1e-5)
+    
+    print("✅ Feature vectors extracted for all hazard types")
+
+def test_cross_validation():
+    """Test k-fold evaluation caching and the metrics.json merge"""
+    print("\n🔁 Testing cross-validation fold cache...")
+    
+    import json
+    from sklearn.datasets import make_classification
+    from sklearn.ensemble import RandomForestClassifier
+    from model_evaluation import CLASSIFICATION_METRICS, CrossValidator, update_metrics_file
+    
+    X, y = make_classification(n_samples=120, n_features=6, random_state=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, "cv_cache")
+        
+        def evaluate(X, y, n_estimators=10):
+            model = RandomForestClassifier(n_estimators=n_estimators, random_state=0)
+            return CrossValidator(model, cache_dir, n_splits=4, n_jobs=1).evaluate(X, y, CLASSIFICATION_METRICS)
+        
+        first = evaluate(X, y)
+        assert first["folds_refit"] == 4 and first["folds_cached"] == 0
+        assert len(first["folds"]) == 4 and 0.5 < first["metrics"]["accuracy"]["mean"] <= 1.0
+        
+        # A second run reuses every fold and gives the same scores
+        second = evaluate(X, y)
+        assert second["folds_cached"] == 4 and second["folds_refit"] == 0
+        assert second["metrics"] == first["metrics"]
+        
+        # Parameters that do not change the fitted model keep the cache
+        model = RandomForestClassifier(n_estimators=10, random_state=0, n_jobs=2, verbose=0)
+        assert CrossValidator(model, cache_dir, n_splits=4, n_jobs=1).evaluate(
+            X, y, CLASSIFICATION_METRICS)["folds_cached"] == 4
+        assert not any(name.endswith(".model.pkl") for name in os.listdir(cache_dir))
+        
+        # Changed fitting parameters or data invalidate the cached folds
+        assert evaluate(X, y, n_estimators=11)["folds_refit"] == 4
+        changed = X.copy()
+        changed[0, 0] += 1.0
+        assert evaluate(changed, y)["folds_refit"] == 4
+        
+        metrics_path = os.path.join(tmp, "metrics.json")
+        with open(metrics_path, "w") as f:
+            json.dump({"accuracy": 0.9, "n_samples": 120}, f)
+        update_metrics_file(metrics_path, "cross_validation", second)
+        with open(metrics_path) as f:
+            merged = json.load(f)
+        assert merged["accuracy"] == 0.9 and merged["n_samples"] == 120
+        assert merged["cross_validation"]["metrics"]["accuracy"] == second["metrics"]["accuracy"]
+    
+    print(f"✅ Cross-validation accuracy {first['metrics']['accuracy']['mean']:.2f}, cached folds reused")
+
+def test_batch_analysis():
+    """Test batch analysis against single-image detection"""
+    print("\n🗂️ Testing batch image analysis...")
+    
+    import io
+    from sklearn.ensemble import RandomForestClassifier
+    from citizen_reporting import CitizenReportingService, HazardDetectionService
+    
+    # Tiny stand-in model over the 12 deterministic colour features
+    rng = np.random.default_rng(0)
+    model = RandomForestClassifier(n_estimators=5, random_state=0)
+    model.fit(rng.random((40, 12)), np.tile([0, 1], 20))
+    
+    # No verdict cache, so single-image detection recomputes every batch result
+    detector = HazardDetectionService(max_workers=2, verdict_cache_size=0)
+    detector.models = {'algal_bloom': model}
+    
+    images = []
+    for color in ['blue', 'green', 'brown']:
+        buffer = io.BytesIO()
+        Image.new('RGB', (640, 480), color=color).save(buffer, 'JPEG')
+        images.append(buffer.getvalue())
+    images.append(b"not an image")
+    
+    batch = detector.detect_hazards_batch(images)
+    assert len(batch) == 4
+    assert batch[3][0] == "unknown"
+    for image_data, (hazard_type, confidence, metadata) in zip(images[:3], batch[:3]):
+        single = detector.detect_hazards(image_data)
+        assert single[0] == hazard_type and np.isclose(single[1], confidence)
+    
+    service = CitizenReportingService(**temp_service_paths())
+    service.hazard_detector = detector
+    report = service.analyze_images(images)
+    detector.shutdown()
+    assert len(report['images']) == 4
+    assert report['verdict']['image_count'] == 4
+    print(f"✅ Batch verdict: {report['verdict']['hazard_type']} ({report['verdict']['alert_level']})")
+
+def test_verdict_cache():
+    """Test that duplicate and near-duplicate images reuse the cached verdict"""
+    print("\n🪞 Testing duplicate image verdict cache...")
+    
+    import io
+    from sklearn.ensemble import RandomForestClassifier
+    from citizen_reporting import HazardDetectionService
+    
+    rng = np.random.default_rng(1)
+    model = RandomForestClassifier(n_estimators=5, random_state=0)
+    model.fit(rng.random((40, 12)), np.tile([0, 1], 20))
+    detector = HazardDetectionService(max_workers=1)
+    detector.models = {'algal_bloom': model}
+    
+    def encode(image, size, quality):
+        buffer = io.BytesIO()
+        image.resize(size).save(buffer, 'JPEG', quality=quality)
+        return buffer.getvalue()
+    
+    y, x = np.mgrid[0:480, 0:640]
+    photo = Image.fromarray(np.stack([x % 256, y % 256, (x * y) % 256], axis=2).astype(np.uint8))
+    other = Image.fromarray(np.stack([y % 256, (x + y) % 256, x % 256], axis=2).astype(np.uint8))
+    original = encode(photo, (640, 480), 90)
+    
+    first = detector.detect_hazards(original)
+    assert "cache_hit" not in first[2]
+    
+    exact = detector.detect_hazards(original)
+    assert exact[2]["cache_hit"] == "exact" and exact[:2] == first[:2]
+    
+    # A re-shared, downscaled and recompressed copy
+    reshared = detector.detect_hazards(encode(photo, (320, 240), 60))
+    assert reshared[2]["cache_hit"] == "near_duplicate" and reshared[:2] == first[:2]
+    
+    different = detector.detect_hazards(encode(other, (640, 480), 90))
+    assert "cache_hit" not in different[2]
+    
+    stats = detector.verdict_cache.get_stats()
+    assert stats["exact_hits"] == 1 and stats["near_hits"] == 1 and stats["entries"] == 2
+    print(f"✅ Verdict cache: {stats}")
+
+def test_tiled_analysis():
+    """Test tiled analysis of a large image finds the hazardous region"""
+    print("\n🧩 Testing tiled large-image analysis...")
+    
+    import io
+    from sklearn.ensemble import RandomForestClassifier
+    from citizen_reporting import HazardDetectionService
+    from image_features import ImageFeatureExtractor
+    
+    # Algal model trained to flag green water against blue water
+    extractor = ImageFeatureExtractor()
+    rows = [extractor.extract(np.full((224, 224, 3), color, dtype=np.uint8))['algal_bloom'][0]
+            for color in [(20, 60, 200), (30, 80, 180), (40, 190, 60), (60, 170, 50)]]
+    model = RandomForestClassifier(n_estimators=5, random_state=0)
+    model.fit(np.array(rows), [0, 0, 1, 1])
+    
+    pixels = np.zeros((700, 900, 3), dtype=np.uint8)
+    pixels[:] = (20, 60, 200)
+    pixels[300:, 480:] = (40, 190, 60)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'PNG')
+    
+    results = []
+    for workers in [1, 2]:
+        detector = HazardDetectionService(max_workers=workers, verdict_cache_size=0)
+        detector.models = {'algal_bloom': model}
+        results.append(detector.detect_hazards_tiled(buffer.getvalue(), top_k=3))
+        detector.shutdown()
+    
+    inline, pooled = results
+    assert inline["grid"] == (4, 6) and inline["heatmaps"]["algal_bloom"].shape == (4, 6)
+    assert np.array_equal(inline["heatmaps"]["algal_bloom"], pooled["heatmaps"]["algal_bloom"])
+    
+    hotspot = inline["hotspots"][0]
+    left, top, right, bottom = hotspot["bbox"]
+    assert hotspot["hazard_type"] == "algal_bloom" and hotspot["confidence"] > 0.5
+    assert left >= 480 and top >= 300
+    print(f"✅ {inline['tiles']} tiles at {inline['megapixels_per_second']:.1f} MP/s, top hotspot {hotspot['bbox']}")
+
+def test_sar_scene_scanner():
+    """Test memory-mapped sliding-window scanning of raw SAR scenes"""
+    print("\n🛰️ Testing SAR scene scanner...")
+    
+    import json
+    from sar_scanner import SARSceneScanner, open_scene
+    
+    # Bright sea clutter with a dark (low backscatter) slick
+    rng = np.random.default_rng(2)
+    scene = (rng.random((660, 880)) * 0.2 + 0.6).astype(np.float32)
+    scene[440:660, 616:836] = 0.05
+    
+    tmp_dir = tempfile.mkdtemp()
+    npy_path = os.path.join(tmp_dir, "scene.npy")
+    raw_path = os.path.join(tmp_dir, "scene.raw")
+    np.save(npy_path, scene)
+    scene.tofile(raw_path)
+    with open(raw_path + ".json", "w") as f:
+        json.dump({"shape": list(scene.shape), "dtype": "float32"}, f)
+    
+    scanner = SARSceneScanner(lambda rows: 1.0 - rows[:, 0], batch_size=50)
+    mapped = open_scene(npy_path)
+    assert isinstance(mapped, np.memmap)
+    
+    # Streamed features match a direct computation on one window
+    row, features = next(scanner.iter_features(mapped))
+    window = scene[:220, 44:264].astype(np.float64)
+    blocks = window.reshape(5, 44, 5, 44).mean(axis=(1, 3)).ravel()
+    expected = [window.mean(), window.std(), window.var(), window.max(), window.min()] + list(blocks)
+    assert row == 0 and features.shape == (16, 48)
+    assert np.allclose(features[1, :30], expected)
+    
+    result = scanner.scan_scene(mapped, top_k=1)
+    raw_result = scanner.scan_scene(open_scene(raw_path), top_k=1)
+    assert result["grid"] == (11, 16)
+    assert np.allclose(result["heatmap"], raw_result["heatmap"])
+    assert result["hits"][0]["bbox"] == (616, 440, 836, 660)
+    print(f"✅ Scanned {result['windows']} windows, strongest hit {result['hits'][0]['bbox']}")
+
+def test_prefilter_cascade():
+    """Test that the cheap first stage short-circuits clear negatives only"""
+    print("\n🚦 Testing pre-filter cascade...")
+    
+    import io
+    from sklearn.ensemble import RandomForestClassifier
+    from citizen_reporting import HazardDetectionService
+    from image_features import ImageFeatureExtractor
+    
+    extractor = ImageFeatureExtractor()
+    colors = [(20, 60, 200), (30, 80, 180), (40, 190, 60), (60, 170, 50)]
+    rows = [extractor.extract(np.full((224, 224, 3), color, dtype=np.uint8))['algal_bloom'][0] for color in colors]
+    model = RandomForestClassifier(n_estimators=20, random_state=0)
+    model.fit(np.array(rows), [0, 0, 1, 1])
+    
+    detector = HazardDetectionService(max_workers=1, verdict_cache_size=0, prefilter_trees=5)
+    detector.models = {'algal_bloom': model}
+    
+    def encode(color):
+        buffer = io.BytesIO()
+        Image.new('RGB', (320, 240), color=color).save(buffer, 'PNG')
+        return buffer.getvalue()
+    
+    negative = detector.detect_hazards(encode((25, 70, 190)))
+    assert negative[0] == "none" and negative[2]["detection_method"] == "prefilter"
+    
+    positive = detector.detect_hazards(encode((45, 185, 55)))
+    assert positive[0] == "algal_bloom" and positive[2]["detection_method"] == "ml_model"
+    
+    batch = detector.detect_hazards_batch([encode((25, 70, 190)), encode((45, 185, 55))])
+    assert [verdict[2]["detection_method"] for verdict in batch] == ["prefilter", "ml_model"]
+    
+    stats = detector.get_prefilter_stats()
+    assert stats["screened"] == 4 and stats["short_circuited"] == 2
+    # Batch rows are timed too, short-circuited or not
+    assert stats["latency_ms"]["short_circuited"]["count"] == 2
+    assert stats["latency_ms"]["full_models"]["count"] == 2
+    print(f"✅ Short-circuited {stats['short_circuit_fraction']:.0%} of uploads")
+
+def test_image_blob_store():
+    """Test content-addressed image storage, thumbnails and streaming"""
+    print("\n🖼️ Testing image blob store...")
+    
+    import io
+    from blob_store import ImageBlobStore
+    
+    store = ImageBlobStore(os.path.join(tempfile.mkdtemp(), "images"))
+    buffer = io.BytesIO()
+    Image.new('RGB', (1200, 900), color='teal').save(buffer, 'JPEG')
+    image_data = buffer.getvalue()
+    
+    reference = store.put(image_data)
+    assert reference == store.put(image_data)  # Stored once, same reference
+    assert reference["content_type"] == "image/jpeg" and reference["has_thumbnail"]
+    assert b"".join(store.iter_chunks(reference["image_id"], chunk_size=1024)) == image_data
+    
+    thumbnail = Image.open(io.BytesIO(store.read(reference["image_id"], thumbnail=True)))
+    assert max(thumbnail.size) <= 256
+    
+    try:
+        store.path("../../etc/passwd")
+        assert False, "path traversal accepted"
+    except ValueError:
+        pass
+    
+    print(f"✅ Stored {reference['size']} bytes as {reference['image_id'][:8]} with a {thumbnail.size} thumbnail")
+
+def test_geocoding_cache():
+    """Test quantized, coalesced and persistent reverse-geocoding cache"""
+    print("\n🗺️ Testing geocoding cache...")
+    
+    import threading
+    import time
+    from geocoding_cache import GeocodingCache
+    
+    calls = []
+    def slow_resolver(lat, lon):
+        calls.append((lat, lon))
+        time.sleep(0.05)
+        return f"Beach near {lat:.3f}, {lon:.3f}"
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "geocoding.sqlite3")
+    cache = GeocodingCache(db_path=db_path, precision=3)
+    
+    # Concurrent lookups inside one cell trigger a single geocoder call
+    threads = [threading.Thread(target=cache.lookup, args=(37.77491 + i * 1e-5, -122.41941, slow_resolver))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    
+    # A fresh cache on the same file answers from disk
+    reopened = GeocodingCache(db_path=db_path, precision=3)
+    assert reopened.lookup(37.7749, -122.4194, slow_resolver).startswith("Beach")
+    assert len(calls) == 1
+    
+    # Expired entries are refreshed, and served stale if the geocoder fails
+    expired = GeocodingCache(db_path=db_path, precision=3, ttl_seconds=0)
+    def failing_resolver(lat, lon):
+        raise TimeoutError("geocoder down")
+    assert expired.lookup(37.7749, -122.4194, failing_resolver).startswith("Beach")
+    
+    stats = cache.get_stats()
+    print(f"✅ Geocoding cache hit rate: {stats['hit_rate']:.0%} ({stats['lookups']} lookups)")
+
+def test_offline_geocoder():
+    """Test nearest-place lookups from the local gazetteer"""
+    print("\n🧭 Testing offline geocoder...")
+    
+    from citizen_reporting import CitizenReportingService
+    from offline_geocoder import OfflineGeocoder
+    
+    index_dir = os.path.join(tempfile.mkdtemp(), "gazetteer_index")
+    geocoder = OfflineGeocoder.from_csv("data/gazetteer.csv", index_dir=index_dir)
+    assert len(geocoder) > 0
+    
+    name, distance_km = geocoder.nearest(37.7790, -122.4180)
+    assert name == "San Francisco" and distance_km < 1.0
+    assert geocoder.nearest(19.0800, 72.8800)[0] == "Mumbai"
+    assert geocoder.nearest(0.0, -140.0) is None  # open Pacific
+    
+    # Another gazetteer, even an older file, replaces the index built from the first
+    other_csv = os.path.join(os.path.dirname(index_dir), "other.csv")
+    with open(other_csv, "w") as f:
+        f.write("name,latitude,longitude\nTokyo,35.6762,139.6503\n")
+    os.utime(other_csv, (0, 0))
+    other = OfflineGeocoder.from_csv(other_csv, index_dir=index_dir)
+    assert len(other) == 1 and other.nearest(35.68, 139.65)[0] == "Tokyo"
+    
+    # Rebuilds go to a new version: the geocoder opened first still reads its own
+    # arrays, and only the current and the previous version are kept
+    assert geocoder.nearest(19.0800, 72.8800)[0] == "Mumbai"
+    OfflineGeocoder.from_csv("data/gazetteer.csv", index_dir=index_dir)
+    versions = [name for name in os.listdir(index_dir) if os.path.isdir(os.path.join(index_dir, name))]
+    assert len(versions) == 2 and not [name for name in os.listdir(index_dir) if name.endswith(".npy")]
+    
+    service = CitizenReportingService(gazetteer_path="data/gazetteer.csv", refine_geocoding=False,
+                                      **temp_service_paths())
+    # Nothing cached from Nominatim, so the gazetteer answers without a network call
+    location_name = service.get_location_info(34.0100, -118.4950)
+    assert location_name == "Near Santa Monica"
+    
+    print(f"✅ Offline geocoder resolved: {name} ({distance_km:.2f} km)")
+
 def test_image_processing():
     """Test the complete image processing pipeline"""
     print("\n📸 Testing image processing pipeline...")
@@ -197,6 +583,168 @@ def test_image_processing():
         traceback.print_exc()
         return False
 
+def test_async_upload():
+    """Test that uploads are acknowledged before the background stages run"""
+    print("\n📨 Testing asynchronous upload pipeline...")
+    
+    from citizen_reporting import CitizenReportingService
+    
+    class RecordingAlertService:
+        def send_alert(self, **kwargs):
+            return {"email": {"sent": True, "channel_name": "Email"}}
+        
+        def get_outbox_stats(self):
+            return {}
+    
+    citizen_service = CitizenReportingService(refine_geocoding=False, upload_workers=2,
+                                              multi_channel_service=RecordingAlertService(),
+                                              **temp_service_paths())
+    test_image_path = create_test_image()
+    
+    try:
+        accepted = citizen_service.submit_image_upload(
+            create_mock_file_object(test_image_path), 37.7749, -122.4194, "Async test"
+        )
+        assert accepted["status_code"] == 202 and accepted["report_id"]
+        
+        citizen_service.upload_pipeline.join()
+        status = citizen_service.get_report_status(accepted["report_id"])
+        assert status["status"] == "completed", status
+        assert set(status["stage_timings_ms"]) == {"queue_wait", "analysis", "geocode", "alert"}
+        alert = citizen_service.get_active_alerts()[-1]
+        assert status["result"]["alert_id"] == alert["id"]
+        assert "image_data" not in alert["metadata"]
+        assert alert["metadata"]["image"]["image_id"] == status["result"]["image_id"]
+        # Delivery results are saved with the alert
+        assert alert["metadata"]["multi_channel_results"]["email"]["sent"]
+        
+        stats = citizen_service.get_pipeline_stats()
+        assert stats["queue_depth"] == 0 and stats["completed"] == 1
+        assert citizen_service.get_report_status("missing") is None
+        
+        print(f"✅ Report {accepted['report_id'][:8]} processed: {status['stage_timings_ms']}")
+    finally:
+        citizen_service.upload_pipeline.shutdown()
+        os.unlink(test_image_path)
+
+def test_alert_store():
+    """Test monotonic ids, clearing and filtered cursor pagination in the alert store"""
+    print("\n🗄️ Testing alert store...")
+    
+    from alert_store import AlertStore
+    from citizen_reporting import Alert, LocationData
+    
+    store = AlertStore(os.path.join(tempfile.mkdtemp(), "alerts.sqlite3"))
+    
+    def make_alert(hazard_type, alert_level, latitude, longitude, timestamp="2025-08-30T12:00:00"):
+        return Alert(id=0, timestamp=timestamp, hazard_type=hazard_type, confidence=0.9,
+                     alert_level=alert_level, location=LocationData(latitude, longitude, "Test"),
+                     description="", metadata={"image_data": b"\xff"})
+    
+    ids = store.add_many([make_alert("oil_spill", "RED", 37.77, -122.42),
+                          make_alert("algal_bloom", "YELLOW", 37.80, -122.27),
+                          make_alert("oil_spill", "ORANGE", 19.07, 72.88)])
+    assert ids == [1, 2, 3]
+    assert store.clear(2) and not store.clear(2)
+    
+    # Ids are never reused after a deletion
+    assert store.add(make_alert("oil_spill", "RED", 37.78, -122.41)) == 4
+    assert store.count_active() == 3
+    
+    assert [a["id"] for a in store.query(hazard_type="oil_spill", alert_level="RED")] == [1, 4]
+    assert [a["id"] for a in store.query(bbox=(37.0, -123.0, 38.0, -122.0))] == [1, 4]
+    assert [a["id"] for a in store.query(limit=2, cursor=1)] == [3, 4]
+    assert [a["id"] for a in store.query(status=None, newest_first=True, limit=2)] == [4, 3]
+    assert "image_data" not in store.get(1)["metadata"]
+    
+    # Time ranges follow the timestamps even when they are out of id order (clock set back)
+    assert store.add(make_alert("oil_spill", "RED", 37.78, -122.41, timestamp="2025-08-30T11:30:00")) == 5
+    assert [a["id"] for a in store.query(since="2025-08-30T11:00:00", until="2025-08-30T11:59:00")] == [5]
+    assert [a["id"] for a in store.query(since="2025-08-30T11:00:00")] == [1, 3, 4, 5]
+    store.clear(5)
+    
+    # Everything survives reopening the database
+    reopened = AlertStore(store.db_path)
+    assert [a["id"] for a in reopened.query()] == [1, 3, 4]
+    
+    print("✅ Alert store ids, filters and pagination working")
+
+def test_incident_clustering():
+    """Test that nearby reports fold into one incident and only escalations re-alert"""
+    print("\n🧩 Testing incident clustering...")
+    
+    from citizen_reporting import CitizenReportingService
+    
+    citizen_service = CitizenReportingService(refine_geocoding=False, **temp_service_paths())
+    
+    def file_report(latitude, longitude, confidence):
+        report = {"hazard_type": "oil_spill", "confidence": confidence, "metadata": {}, "image_data": b"",
+                  "latitude": latitude, "longitude": longitude, "location_name": "Test Bay",
+                  "description": "", "phone_number": ""}
+        citizen_service._alert_stage(report)
+        return citizen_service._report_summary(report)["incident"]
+    
+    first = file_report(37.8000, -122.4500, 0.5)
+    duplicate = file_report(37.8010, -122.4490, 0.55)
+    escalated = file_report(37.7995, -122.4510, 0.9)
+    elsewhere = file_report(37.7000, -122.5000, 0.5)
+    
+    assert first["alerted"] and not duplicate["alerted"] and escalated["alerted"] and elsewhere["alerted"]
+    assert first["incident_id"] == duplicate["incident_id"] == escalated["incident_id"] != elsewhere["incident_id"]
+    assert escalated["report_count"] == 3
+    
+    alerts = citizen_service.get_active_alerts()
+    assert len(alerts) == 2 and alerts[0]["alert_level"] == "RED" and alerts[0]["metadata"]["report_count"] == 3
+    
+    print(f"✅ 4 reports filed as {len(alerts)} incidents: {citizen_service.get_incident_stats()}")
+
+def test_system_status():
+    """Test that system status follows clears and expiry, overall and per region"""
+    print("\n🚦 Testing incremental system status...")
+    
+    import time
+    from citizen_reporting import CitizenReportingService
+    from status_tracker import AlertLevelTracker
+    
+    citizen_service = CitizenReportingService(status_regions={"sf_bay": (37.4, -122.6, 38.0, -122.0)},
+                                              refine_geocoding=False, **temp_service_paths())
+    
+    def file_report(hazard_type, latitude, longitude, confidence):
+        report = {"hazard_type": hazard_type, "confidence": confidence, "metadata": {}, "image_data": b"",
+                  "latitude": latitude, "longitude": longitude, "location_name": "Test",
+                  "description": "", "phone_number": ""}
+        citizen_service._alert_stage(report)
+        return report['alert'].id
+    
+    red_id = file_report("oil_spill", 37.80, -122.45, 0.9)
+    file_report("algal_bloom", 19.07, 72.88, 0.5)
+    
+    status = citizen_service.get_system_status()
+    assert status["status"] == "RED" and status["active_alerts_count"] == 2
+    assert status["regions"]["sf_bay"]["status"] == "RED"
+    
+    # Clearing the only RED alert lowers the status without a rescan
+    assert citizen_service.clear_alert(red_id)
+    status = citizen_service.get_system_status()
+    assert status["status"] == "YELLOW" and status["regions"]["sf_bay"]["status"] == "GREEN"
+    
+    citizen_service.reset_system_status()
+    assert citizen_service.get_system_status()["status"] == "GREEN"
+    assert citizen_service.get_active_alerts() == []
+    
+    # Expiry pops alerts off the deadline heap; refreshed alerts live on
+    tracker = AlertLevelTracker(ttl_seconds=60)
+    now = time.time()
+    tracker.add(1, "RED", 0.0, 0.0, now=now)
+    tracker.add(2, "ORANGE", 0.0, 0.0, now=now)
+    tracker.update(1, "RED", now=now + 50)
+    assert tracker.pop_expired(now=now + 61) == [2]
+    assert tracker.status()["status"] == "RED"
+    assert tracker.pop_expired(now=now + 111) == [1]
+    assert tracker.status()["status"] == "GREEN"
+    
+    print("✅ System status tracks clears, resets and expiry")
+
 def test_alert_retrieval():
     """Test alert retrieval functionality"""
     print("\n📋 Testing alert retrieval...")
@@ -224,6 +772,8 @@ def test_multi_channel_alerts():
     """Test multi-channel alert functionality"""
     print("\n📡 Testing multi-channel alerts...")
     
+    from multi_channel_alerts import DISPATCH_KEY
+    
     try:
         success, multi_channel_service, citizen_service = test_service_initialization()
         if not success:
@@ -251,8 +801,12 @@ def test_multi_channel_alerts():
         if alert_results:
             print("✅ Multi-channel alert sent successfully!")
             for channel_id, result in alert_results.items():
+                if channel_id == DISPATCH_KEY:
+                    continue
                 if result.get('sent'):
                     print(f"  ✅ {channel_id}: Alert sent successfully")
+                elif result.get('queued'):
+                    print(f"  📥 {channel_id}: Alert queued for delivery")
                 else:
                     print(f"  ⚠️ {channel_id}: {result.get('reason', 'Failed')}")
         else:
@@ -264,6 +818,554 @@ def test_multi_channel_alerts():
         print(f"❌ Multi-channel alert test failed: {e}")
         return False
 
+def test_concurrent_alert_dispatch():
+    """Test that channels are sent concurrently with per-channel deadlines"""
+    print("\n⚡ Testing concurrent channel fan-out...")
+    
+    import time
+    from multi_channel_alerts import AlertChannel, DISPATCH_KEY, MultiChannelAlertService
+    
+    class SlowChannel:
+        def __init__(self, seconds):
+            self.seconds = seconds
+            self.calls = 0
+        
+        def send_alert(self, alert_message):
+            self.calls += 1
+            time.sleep(self.seconds)
+            return True
+    
+    service = MultiChannelAlertService(config_file=None, use_outbox=False)
+    service.channels = {
+        name: AlertChannel(name=name, enabled=True, priority_levels=["RED"], config={}, deadline_seconds=deadline)
+        for name, deadline in [("email", None), ("sms", None), ("ivr", None), ("webhook", 0.3)]
+    }
+    service.channel_implementations = {"email": SlowChannel(0.2), "sms": SlowChannel(0.2),
+                                       "ivr": SlowChannel(0.2), "webhook": SlowChannel(1.0)}
+    
+    results = service.send_alert("RED", "oil_spill", "Test Bay", "Test", 0.9)
+    dispatch = results.pop(DISPATCH_KEY)
+    
+    assert all(results[name]["sent"] for name in ["email", "sms", "ivr"])
+    assert results["webhook"]["timed_out"] and not results["webhook"]["sent"]
+    assert dispatch["channels"] == 4 and dispatch["sent"] == 3 and dispatch["timed_out"] == 1
+    # Bounded by the webhook deadline, not the 1.6 s sum of the channels
+    assert 300 <= dispatch["latency_ms"] < 600
+    
+    # The abandoned webhook send keeps running: the channel takes no new sends meanwhile
+    again = service.send_alert("RED", "oil_spill", "Test Bay", "Test", 0.9)
+    assert again["webhook"]["in_progress"] and not again["webhook"]["sent"]
+    time.sleep(0.8)
+    
+    # A retry of an alert whose late send went through is not sent twice
+    webhook = service.channel_implementations["webhook"]
+    message = service.create_alert_message("RED", "oil_spill", "Test Bay", "Test", 0.9)
+    assert service._dispatch(message, ["webhook"])["webhook"]["timed_out"]
+    assert service._dispatch(message, ["webhook"])["webhook"]["in_progress"]
+    time.sleep(0.8)
+    retried = service._dispatch(message, ["webhook"])["webhook"]
+    assert retried["sent"] and retried["completed_late"] and webhook.calls == 2
+    service.shutdown(wait=False)
+    print(f"✅ Dispatched in {dispatch['latency_ms']:.0f} ms: "
+          f"{ {name: round(result['latency_ms']) for name, result in results.items()} }")
+
+def test_smtp_connection_pool():
+    """Test SMTP session reuse, NOOP liveness checks and transparent reconnect"""
+    print("\n📧 Testing SMTP connection pool...")
+    
+    import time
+    from email.message import EmailMessage
+    from fake_servers import LocalSMTPServer
+    from smtp_pool import SMTPConnectionPool
+    
+    message = EmailMessage()
+    message['From'], message['To'], message['Subject'] = "alerts@example.com", "ops@example.com", "Test"
+    message.set_content("Test alert")
+    
+    with LocalSMTPServer() as server:
+        pool = SMTPConnectionPool("127.0.0.1", server.port, "alerts", "secret", use_tls=False, liveness_interval=0.05)
+        for _ in range(3):
+            pool.send_message(message)
+        assert server.stats["connections"] == 1 and server.stats["logins"] == 1
+        
+        # Idle past the liveness interval: probed with NOOP, then reused
+        time.sleep(0.1)
+        pool.send_message(message)
+        assert server.stats["noops"] == 1 and server.stats["connections"] == 1
+        
+        # Server drops the session: the send reconnects transparently
+        server.drop_connections()
+        pool.liveness_interval = 60
+        pool.send_message(message)
+        stats = pool.get_stats()
+        assert stats["reconnects"] == 1 and server.stats["connections"] == 2
+        assert server.stats["messages"] == stats["messages_sent"] == 5
+        
+        # Sessions idle past the idle timeout are closed rather than reused
+        pool.idle_timeout = 0
+        pool.send_message(message)
+        assert server.stats["connections"] == 3
+        pool.close()
+    
+    print(f"✅ SMTP pool: {pool.get_stats()}")
+
+def test_sms_ivr_delivery():
+    """Test concurrent per-recipient SMS and IVR delivery against a fake Twilio endpoint"""
+    print("\n📱 Testing SMS/IVR per-recipient delivery...")
+    
+    import time
+    from fake_servers import LocalTwilioServer
+    from multi_channel_alerts import AlertMessage, IVRAlertChannel, SMSAlertChannel
+    from recipient_delivery import RateLimiter
+    
+    recipients = [f"+1555000{i:04d}" for i in range(20)]
+    failing = {recipients[3], recipients[11]}
+    message = AlertMessage(subject="RED ALERT", body="", metadata={"hazard_type": "oil_spill"})
+    
+    with LocalTwilioServer(latency=0.02, fail_numbers=failing) as server:
+        config = {"account_sid": server.account_sid, "auth_token": server.auth_token, "from_number": "+15550001111",
+                  "recipients": recipients, "api_base_url": server.base_url, "max_concurrency": 4,
+                  "webhook_url": "http://127.0.0.1/ivr"}
+        
+        sms = SMSAlertChannel(config)
+        report = sms.deliver(message)
+        # Failures are reported per recipient and do not stop the rest
+        assert report["delivered"] == 18 and report["failed"] == 2
+        assert {o["recipient"] for o in report["recipients"] if not o["delivered"]} == failing
+        assert 1 < server.max_in_flight <= 4
+        
+        client = sms._get_client()
+        assert not sms.send_alert(message) and sms._get_client() is client
+        assert len(server.requests["Messages.json"]) == 36
+        
+        ivr = IVRAlertChannel(dict(config, recipients=recipients[4:9]))
+        assert ivr.deliver(message)["delivered"] == 5
+        assert "<Say" in server.requests["Calls.json"][0]["Twiml"]
+        sms.close()
+        ivr.close()
+    
+    limiter = RateLimiter(50, burst=1)
+    start = time.perf_counter()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.perf_counter() - start >= 0.09
+    
+    print(f"✅ Delivered {report['delivered']}/{len(recipients)} SMS with peak concurrency {server.max_in_flight}")
+
+def test_webhook_delivery():
+    """Test webhook retries, idempotency keys and parallel endpoints"""
+    print("\n🔗 Testing webhook delivery...")
+    
+    from fake_servers import LocalWebhookServer
+    from multi_channel_alerts import AlertMessage, WebhookAlertChannel
+    
+    message = AlertMessage(subject="RED ALERT", body="Oil spill", metadata={"alert_level": "RED", "alert_id": "a1"})
+    
+    with LocalWebhookServer(latency=0.1, fail_first=2) as server:
+        channel = WebhookAlertChannel({
+            "urls": [f"{server.base_url}/ops", f"{server.base_url}/gis", f"{server.base_url}/coastguard"],
+            "headers": {"Authorization": "Bearer test"},
+            "max_retries": 3,
+            "backoff_seconds": 0.01
+        })
+        report = channel.deliver(message)
+        
+        # Two 503s per endpoint, then success; endpoints are delivered in parallel
+        assert report["delivered"] == 3 and report["failed"] == 0
+        assert all(attempts == 3 for attempts in server.attempts.values())
+        assert report["elapsed_ms"] < 3 * 3 * 100
+        
+        keys = {delivery["headers"]["Idempotency-Key"] for delivery in server.deliveries}
+        assert keys == {report["idempotency_key"]}
+        assert all(delivery["headers"]["Authorization"] == "Bearer test" for delivery in server.deliveries)
+        
+        # A redelivery of the same alert (e.g. by the outbox) carries the same key
+        assert channel.deliver(message)["idempotency_key"] == report["idempotency_key"]
+        
+        # Retries exhausted: reported as a failed endpoint
+        server.attempts.clear()
+        server.fail_first = 10
+        assert not channel.send_alert(message)
+        channel.close()
+    
+    print(f"✅ Webhooks delivered to {report['delivered']} endpoints in {report['elapsed_ms']:.0f} ms")
+
+def test_alert_outbox():
+    """Test durable alert queuing, retries of failed channels, dead-lettering and crash recovery"""
+    print("\n📬 Testing alert outbox...")
+    
+    import threading
+    import time
+    from alert_outbox import AlertOutbox, DeliveryFailed
+    from multi_channel_alerts import AlertChannel, DISPATCH_KEY, MultiChannelAlertService
+    
+    class FlakyChannel:
+        def __init__(self, failures):
+            self.failures = failures
+            self.calls = 0
+        
+        def send_alert(self, alert_message):
+            self.calls += 1
+            return self.calls > self.failures
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "outbox.sqlite3")
+        service = MultiChannelAlertService(config_file=None, outbox_path=db_path, outbox_max_attempts=3)
+        service.outbox.backoff_seconds = 0.01
+        service.outbox.poll_seconds = 0.01
+        service.channels = {name: AlertChannel(name, True, ["RED"], {}) for name in ["email", "sms", "webhook"]}
+        service.channel_implementations = {"email": FlakyChannel(0), "sms": FlakyChannel(1),
+                                           "webhook": FlakyChannel(10)}
+        
+        results = service.send_alert("RED", "oil_spill", "Test Bay", "Test", 0.9, b"thumbnail")
+        dispatch = results.pop(DISPATCH_KEY)
+        assert dispatch["queued"] and all(result["queued"] for result in results.values())
+        assert dispatch["latency_ms"] < 50
+        
+        assert service.outbox.drain(timeout=5)
+        delivery = service.get_delivery(dispatch["outbox_id"])
+        # Only failed channels are retried; the webhook keeps failing and is dead-lettered
+        assert delivery["status"] == "dead" and delivery["attempts"] == 3
+        calls = {name: channel.calls for name, channel in service.channel_implementations.items()}
+        assert calls == {"email": 1, "sms": 2, "webhook": 3}
+        stats = service.get_outbox_stats()
+        assert stats["dead"] == 1 and stats["queue_depth"] == 0
+        service.shutdown()
+        
+        # A message claimed by a process that died is redelivered once its lease runs out
+        delivered = []
+        crashed = AlertOutbox(lambda payload: None, db_path, lease_seconds=0.05)
+        crashed.shutdown()
+        message_id = crashed.enqueue({"alert": "RED"})
+        crashed._claim()
+        assert crashed.get(message_id)["status"] == "in_flight"
+        crashed.close()
+        
+        time.sleep(0.1)
+        restarted = AlertOutbox(delivered.append, db_path, poll_seconds=0.01)
+        assert restarted.drain(timeout=5)
+        assert delivered == [{"alert": "RED"}] and restarted.get(message_id)["status"] == "delivered"
+        assert restarted.get_stats()["oldest_message_age_seconds"] == 0.0
+        restarted.close()
+        
+        # A delivery outliving its lease keeps renewing it, so no other worker takes the message over
+        def slow_delivery(payload):
+            time.sleep(0.3)
+        slow = AlertOutbox(slow_delivery, db_path, lease_seconds=0.1)
+        slow.shutdown()
+        message_id = slow.enqueue({"alert": "ORANGE"})
+        worker = threading.Thread(target=slow.process_one)
+        worker.start()
+        time.sleep(0.2)
+        assert slow._claim() is None
+        worker.join()
+        assert slow.get(message_id)["status"] == "delivered" and slow.get(message_id)["attempts"] == 1
+        slow.close()
+        
+        # Deferrals use no attempts, but stop once the message is max_deferral_seconds old
+        def breaker_open(payload):
+            raise DeliveryFailed("circuit open", attempted=False)
+        deferring = AlertOutbox(breaker_open, db_path, backoff_seconds=0.01, max_deferral_seconds=0.1)
+        deferring.shutdown()
+        message_id = deferring.enqueue({"alert": "YELLOW"})
+        assert deferring.process_one() and deferring.get(message_id)["status"] == "pending"
+        time.sleep(0.1)
+        assert deferring.process_one() and deferring.get(message_id)["status"] == "dead"
+        assert deferring.get(message_id)["attempts"] == 0
+        deferring.close()
+    
+    print(f"✅ Alert queued in {dispatch['latency_ms']:.2f} ms; calls per channel {calls}")
+
+def test_alert_coalescing():
+    """Test that bursts below RED go out as one digest per channel window and RED bypasses it"""
+    print("\n📋 Testing alert coalescing...")
+    
+    import time
+    from multi_channel_alerts import AlertChannel, DISPATCH_KEY, MultiChannelAlertService
+    
+    class RecordingChannel:
+        def __init__(self):
+            self.messages = []
+        
+        def send_alert(self, alert_message):
+            self.messages.append(alert_message)
+            return True
+    
+    service = MultiChannelAlertService(config_file=None, use_outbox=False)
+    service.channels = {
+        "email": AlertChannel("Email", True, ["YELLOW", "ORANGE", "RED"], {}, coalesce_window_seconds=0.3),
+        "sms": AlertChannel("SMS", True, ["YELLOW", "ORANGE", "RED"], {}, coalesce_window_seconds=0.3,
+                            coalesce_max_level="YELLOW")
+    }
+    service.channel_implementations = {"email": RecordingChannel(), "sms": RecordingChannel()}
+    email, sms = service.channel_implementations["email"], service.channel_implementations["sms"]
+    
+    # Twelve reports about two incidents
+    for i in range(12):
+        location = "North Beach" if i % 3 else "Harbor"
+        level = "ORANGE" if i == 5 else "YELLOW"
+        results = service.send_alert(level, "oil_spill", location, "Sheen", 0.5 + i / 100)
+        assert results["email"]["coalesced"]
+    assert results[DISPATCH_KEY]["coalesced"] == 2
+    
+    red = service.send_alert("RED", "oil_spill", "Harbor", "Slick", 0.95)
+    assert red["email"]["sent"] and red["sms"]["sent"]
+    assert len(email.messages) == 1 and len(sms.messages) == 2
+    
+    time.sleep(0.5)
+    # One digest per channel; the ORANGE report went to SMS directly
+    assert len(email.messages) == 2 and len(sms.messages) == 3
+    digest = email.messages[-1].metadata
+    assert digest["digest"] and digest["report_count"] == 12 and digest["alert_level"] == "ORANGE"
+    assert {(i["location"], i["reports"]) for i in digest["incidents"]} == {("North Beach", 8), ("Harbor", 4)}
+    assert sms.messages[-1].metadata["report_count"] == 11
+    
+    stats = service.get_coalescing_stats()
+    assert stats["windows"] == 2 and stats["coalesced"] == 23 and not stats["buffered"]
+    service.shutdown()
+    
+    # Persisted windows survive a crash: the next start reopens and flushes them
+    from alert_coalescing import AlertCoalescer
+    db_path = os.path.join(tempfile.mkdtemp(), "alert_outbox.sqlite3")
+    flushed = []
+    crashed = AlertCoalescer(lambda cid, alerts: flushed.append((cid, alerts)), db_path)
+    for i in range(3):
+        crashed.add("email", {"report": i}, window_seconds=0.2)
+    crashed.shutdown(flush=False)
+    time.sleep(0.3)
+    restarted = AlertCoalescer(lambda cid, alerts: flushed.append((cid, alerts)), db_path)
+    assert restarted.restore() == 3
+    time.sleep(0.1)
+    assert flushed == [("email", [{"report": 0}, {"report": 1}, {"report": 2}])]
+    restarted.shutdown(flush=False)
+    assert AlertCoalescer(lambda cid, alerts: None, db_path).restore() == 0
+    
+    # A failed flush keeps its batch for the next window instead of dropping it
+    attempts = []
+    
+    def flaky_flush(cid, alerts):
+        attempts.append(list(alerts))
+        if len(attempts) == 1:
+            raise RuntimeError("outbox unavailable")
+    
+    flaky = AlertCoalescer(flaky_flush, db_path)
+    flaky.add("email", "a", window_seconds=0.1)
+    assert flaky.flush() == 0 and flaky.get_stats()["buffered"] == {"email": 1}
+    flaky.add("email", "b", window_seconds=0.1)
+    assert flaky.flush() == 2 and attempts[-1] == ["a", "b"]
+    flaky.shutdown(flush=False)
+    assert AlertCoalescer(lambda cid, alerts: None, db_path).restore() == 0
+    
+    print(f"✅ {digest['report_count']} reports sent as '{email.messages[-1].subject}'")
+
+def test_circuit_breakers():
+    """Test breaker open/half-open/closed transitions and outbox deferral while a channel is down"""
+    print("\n🔌 Testing channel circuit breakers...")
+    
+    import time
+    from multi_channel_alerts import AlertChannel, DISPATCH_KEY, MultiChannelAlertService
+    
+    class DownChannel:
+        def __init__(self, failures, seconds=0.0):
+            self.failures = failures
+            self.seconds = seconds
+            self.calls = 0
+        
+        def send_alert(self, alert_message):
+            self.calls += 1
+            time.sleep(self.seconds)
+            return self.calls > self.failures
+    
+    breaker = {"min_calls": 3, "window_size": 5, "open_seconds": 0.2, "slow_call_seconds": 0.05}
+    service = MultiChannelAlertService(config_file=None, use_outbox=False)
+    service.channels = {"email": AlertChannel("Email", True, ["RED"], {}, circuit_breaker=breaker)}
+    service.channel_implementations = {"email": DownChannel(failures=1, seconds=0.1)}
+    
+    # Slow calls count as failures even when they succeed
+    for _ in range(3):
+        service.send_alert("RED", "oil_spill", "Test Bay", "Test", 0.9)
+    status = service.get_channel_status()["email"]["circuit_breaker"]
+    assert status["state"] == "open" and status["success_rate"] == 0.0 and status["slow_calls"] == 3
+    
+    results = service.send_alert("RED", "oil_spill", "Test Bay", "Test", 0.9)
+    assert results["email"]["circuit_open"] and results[DISPATCH_KEY]["latency_ms"] < 20
+    assert service.channel_implementations["email"].calls == 3
+    
+    # Half-open trial succeeds quickly and closes the breaker
+    time.sleep(0.25)
+    service.channel_implementations["email"].seconds = 0.0
+    assert service.send_alert("RED", "oil_spill", "Test Bay", "Test", 0.9)["email"]["sent"]
+    assert service.breakers["email"].state == "closed"
+    service.shutdown()
+    
+    # Queued alerts wait out an open breaker without using up delivery attempts
+    with tempfile.TemporaryDirectory() as tmp:
+        service = MultiChannelAlertService(config_file=None, outbox_path=os.path.join(tmp, "outbox.sqlite3"),
+                                           outbox_max_attempts=3)
+        service.outbox.backoff_seconds = 0.01
+        service.outbox.poll_seconds = 0.01
+        service.channels = {"sms": AlertChannel("SMS", True, ["RED"], {},
+                                                circuit_breaker={"min_calls": 1, "open_seconds": 0.1})}
+        service.channel_implementations = {"sms": DownChannel(failures=2)}
+        
+        outbox_id = service.send_alert("RED", "oil_spill", "Test Bay", "Test", 0.9)[DISPATCH_KEY]["outbox_id"]
+        assert service.outbox.drain(timeout=5)
+        delivery = service.get_delivery(outbox_id)
+        assert delivery["status"] == "delivered" and delivery["attempts"] == 3
+        assert service.channel_implementations["sms"].calls == 3
+        assert service.breakers["sms"].get_stats()["rejected"] >= 1
+        service.shutdown()
+    
+    print(f"✅ Open breaker skipped email in {results[DISPATCH_KEY]['latency_ms']:.2f} ms")
+
+def test_priority_scheduler():
+    """Test that RED preempts queued lower levels and the rest share workers by weight"""
+    print("\n🚦 Testing priority delivery scheduler...")
+    
+    import time
+    from alert_outbox import AlertOutbox
+    from delivery_scheduler import PriorityScheduler
+    
+    scheduler = PriorityScheduler({"ORANGE": 4, "YELLOW": 2, "GREEN": 1})
+    picks = [scheduler.choose(["GREEN", "YELLOW", "ORANGE"]) for _ in range(70)]
+    assert (picks.count("ORANGE"), picks.count("YELLOW"), picks.count("GREEN")) == (40, 20, 10)
+    assert scheduler.choose(["YELLOW", "RED"]) == "RED"
+    assert scheduler.choose(["YELLOW"], strict_only=True) is None
+    
+    delivered = []
+    
+    def deliver(payload):
+        time.sleep(0.01)
+        delivered.append(payload["level"])
+    
+    outbox = AlertOutbox(deliver, ":memory:", workers=1, poll_seconds=0.01,
+                         scheduler=PriorityScheduler(), reserved_workers=1)
+    for i in range(30):
+        outbox.enqueue({"level": "YELLOW" if i % 3 else "ORANGE"}, priority="YELLOW" if i % 3 else "ORANGE")
+    outbox.enqueue({"level": "RED"}, priority="RED")
+    assert outbox.drain(timeout=5)
+    
+    # The reserved worker takes RED at once, even while the shared worker is busy
+    assert delivered.index("RED") <= 1
+    # ORANGE (weight 4) drains ahead of the larger YELLOW backlog (weight 2)
+    assert delivered[:15].count("ORANGE") >= 8
+    delays = outbox.get_stats()["queue_delay_ms"]
+    assert delays["RED"]["p50_ms"] < delays["ORANGE"]["p50_ms"] < delays["YELLOW"]["p50_ms"]
+    outbox.close()
+    
+    print(f"✅ Queueing delay p50: " + ", ".join(f"{level} {d['p50_ms']:.0f} ms" for level, d in delays.items()))
+
+def test_subscriber_registry():
+    """Test radius queries over the subscriber grid and geo-targeted SMS delivery"""
+    print("\n📍 Testing geo-targeted subscriber registry...")
+    
+    import math
+    import time
+    from fake_servers import LocalTwilioServer
+    from multi_channel_alerts import AlertChannel, MultiChannelAlertService, SMSAlertChannel
+    from subscriber_registry import SubscriberRegistry
+    
+    rng = np.random.default_rng(7)
+    center = (36.95, -122.02)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "subscribers.sqlite3")
+        registry = SubscriberRegistry(db_path)
+        points = {}
+        rows = []
+        for i in range(2000):
+            lat, lon = center[0] + rng.uniform(-0.5, 0.5), center[1] + rng.uniform(-0.5, 0.5)
+            contacts = {"sms": f"+1555{i:07d}"} if i % 4 else {"email": f"user{i}@example.com"}
+            rows.append((f"s{i}", lat, lon, contacts, ["oil_spill"] if i % 10 == 1 else None))
+            points[f"s{i}"] = (lat, lon, contacts)
+        registry.add_many(rows)
+        
+        # Same answer as a brute-force scan
+        start = time.perf_counter()
+        found = {sid for sid, _, _ in registry.nearby(*center, 10.0, channel="sms")}
+        query_ms = (time.perf_counter() - start) * 1000
+        cos_lat = math.cos(math.radians(center[0]))
+        expected = {sid for sid, (lat, lon, contacts) in points.items() if "sms" in contacts
+                    and 111.32 * math.hypot(lat - center[0], (lon - center[1]) * cos_lat) <= 10.0}
+        assert found == expected and len(found) > 20
+        
+        # Subscribers limited to oil spills are skipped for other hazards
+        algal = set(registry.recipients(*center, 10.0, "sms", hazard_type="algal_bloom"))
+        assert len(algal) == len(expected) - sum(1 for sid in expected if int(sid[1:]) % 10 == 1)
+        
+        registry.remove("s1")
+        registry.close()
+        reopened = SubscriberRegistry(db_path)
+        assert len(reopened) == 1999
+        
+        with LocalTwilioServer() as server:
+            config = {"account_sid": server.account_sid, "auth_token": server.auth_token,
+                      "from_number": "+15550001111", "recipients": ["+15559999999"], "api_base_url": server.base_url}
+            service = MultiChannelAlertService(config_file=None, use_outbox=False, subscriber_registry=reopened,
+                                               hazard_radius_km={"oil_spill": 10.0})
+            service.channels = {"sms": AlertChannel("SMS", True, ["RED"], config)}
+            service.channel_implementations = {"sms": SMSAlertChannel(config)}
+            
+            results = service.send_alert("RED", "oil_spill", "Santa Cruz", "Slick", 0.9, latitude=center[0],
+                                         longitude=center[1])
+            sent_to = {form["To"] for form in server.requests["Messages.json"]}
+            assert results["sms"]["sent"] and sent_to == {points[sid][2]["sms"] for sid in expected - {"s1"}}
+            
+            # Without a location the configured list is used
+            service.send_alert("RED", "oil_spill", "Santa Cruz", "Slick", 0.9)
+            assert server.requests["Messages.json"][-1]["To"] == "+15559999999"
+            service.shutdown()
+        reopened.close()
+    
+    print(f"✅ {len(found)} of 2000 subscribers within 10 km, found in {query_ms:.2f} ms")
+
+def test_streamed_broadcast():
+    """Test file and query recipient sources and resuming a checkpointed SMS broadcast"""
+    print("\n📦 Testing streamed, checkpointed broadcasts...")
+    
+    import sqlite3
+    from fake_servers import LocalTwilioServer
+    from multi_channel_alerts import AlertMessage, SMSAlertChannel
+    from recipient_sources import file_recipients, sqlite_recipients
+    
+    numbers = [f"+1555{i:07d}" for i in range(600)]
+    with tempfile.TemporaryDirectory() as tmp:
+        list_path = os.path.join(tmp, "recipients.csv")
+        with open(list_path, "w") as f:
+            f.write("name,phone\n" + "".join(f"r{i},{number}\n" for i, number in enumerate(numbers)))
+        db_path = os.path.join(tmp, "recipients.sqlite3")
+        with sqlite3.connect(db_path) as db:
+            db.execute("CREATE TABLE contacts (phone TEXT)")
+            db.executemany("INSERT INTO contacts VALUES (?)", [(number,) for number in reversed(numbers)])
+        db.close()
+        
+        assert list(file_recipients(list_path, column="phone")) == numbers
+        assert list(sqlite_recipients(db_path, "SELECT phone FROM contacts ORDER BY phone", batch_size=7)) == numbers
+        
+        # The provider starts failing on the third chunk: the broadcast stops there
+        message = AlertMessage(subject="RED ALERT", body="", metadata={"alert_id": "a1"})
+        with LocalTwilioServer(fail_numbers=set(numbers[200:300])) as server:
+            config = {"account_sid": server.account_sid, "auth_token": server.auth_token,
+                      "from_number": "+15550001111", "api_base_url": server.base_url,
+                      "recipients": {"file": list_path, "column": "phone"}, "chunk_size": 100,
+                      "checkpoint_path": os.path.join(tmp, "checkpoints.sqlite3")}
+            sms = SMSAlertChannel(config)
+            report = sms.deliver(message)
+            assert not report["completed"] and report["delivered"] == 200 and report["chunks"] == 2
+            sms.close()
+            
+            # A retry after a restart resumes after the last checkpointed chunk
+            server.fail_numbers.clear()
+            sms = SMSAlertChannel(config)
+            report = sms.deliver(message)
+            assert report["completed"] and report["resumed_from"] == 200 and report["delivered"] == 600
+            assert sms.send_alert(message)
+            sent = [form["To"] for form in server.requests["Messages.json"]]
+            # Nobody reached before the interruption was messaged again
+            assert sorted(sent) == numbers
+            sms.close()
+    
+    print(f"✅ Broadcast to {len(numbers)} streamed recipients resumed after {report['resumed_from']}")
+
 def main():
     """Main test function"""
     print("🚨 Coastal Hazard Detection System - Integration Tests")
@@ -273,9 +1375,33 @@ def main():
         ("Import Test", test_imports),
         ("Model Loading Test", test_model_loading),
         ("Service Initialization Test", test_service_initialization),
+        ("Feature Extraction Test", test_feature_extraction),
+        ("Cross-Validation Test", test_cross_validation),
+        ("Batch Analysis Test", test_batch_analysis),
+        ("Verdict Cache Test", test_verdict_cache),
+        ("Tiled Analysis Test", test_tiled_analysis),
+        ("SAR Scene Scanner Test", test_sar_scene_scanner),
+        ("Pre-filter Cascade Test", test_prefilter_cascade),
+        ("Image Blob Store Test", test_image_blob_store),
+        ("Geocoding Cache Test", test_geocoding_cache),
+        ("Offline Geocoder Test", test_offline_geocoder),
         ("Image Processing Test", test_image_processing),
+        ("Async Upload Test", test_async_upload),
+        ("Alert Store Test", test_alert_store),
+        ("Incident Clustering Test", test_incident_clustering),
+        ("System Status Test", test_system_status),
         ("Alert Retrieval Test", test_alert_retrieval),
-        ("Multi-Channel Alert Test", test_multi_channel_alerts)
+        ("Multi-Channel Alert Test", test_multi_channel_alerts),
+        ("Concurrent Alert Dispatch Test", test_concurrent_alert_dispatch),
+        ("SMTP Connection Pool Test", test_smtp_connection_pool),
+        ("SMS/IVR Delivery Test", test_sms_ivr_delivery),
+        ("Webhook Delivery Test", test_webhook_delivery),
+        ("Alert Outbox Test", test_alert_outbox),
+        ("Alert Coalescing Test", test_alert_coalescing),
+        ("Circuit Breaker Test", test_circuit_breakers),
+        ("Priority Scheduler Test", test_priority_scheduler),
+        ("Subscriber Registry Test", test_subscriber_registry),
+        ("Streamed Broadcast Test", test_streamed_broadcast)
     ]
     
     passed = 0
@@ -284,7 +1410,8 @@ def main():
     for test_name, test_func in tests:
         print(f"\n{'='*20} {test_name} {'='*20}")
         try:
-            if test_func():
+            # Older tests report failure by returning False; the rest assert and return nothing
+            if test_func() is not False:
                 passed += 1
                 print(f"✅ {test_name} PASSED")
             else:
@@ -28,6 +28,8 @@ from tide_forecast_simple import (
     WeatherSimulator
 )
 
+from geocoding_cache import get_shared_geocoding_cache
+
 # Import coastal hazard detection components
 try:
     from citizen_reporting import CitizenReportingService
@@ -109,11 +111,15 @@ class TideMonitoringService:
     
     def _get_location_name(self) -> str:
         """Get human-readable location name"""
-        try:
+        def reverse_geocode(latitude: float, longitude: float) -> Optional[str]:
             from geopy.geocoders import Nominatim
             geolocator = Nominatim(user_agent="tide_monitoring_service")
-            location = geolocator.reverse(f"{self.latitude}, {self.longitude}")
-            return location.address if location else f"Lat: {self.latitude}, Lon: {self.longitude}"
+            location = geolocator.reverse(f"{latitude}, {longitude}")
+            return location.address if location else None
+        
+        try:
+            location_name = get_shared_geocoding_cache().lookup(self.latitude, self.longitude, reverse_geocode)
+            return location_name or f"Lat: {self.latitude}, Lon: {self.longitude}"
         except Exception:
             return f"Lat: {self.latitude}, Lon: {self.longitude}"
     
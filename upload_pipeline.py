@@ -0,0 +1,247 @@
+"""
+Background processing pipeline for citizen report uploads
+
+Uploads are accepted with a report ID as soon as the request is validated and
+queued; a pool of worker threads then runs each report through a fixed list
+of named stages (analysis, geocoding, alert delivery). Every stage is timed,
+and report status, per-stage latency and queue depth can be polled while the
+work is in progress.
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np #type: ignore
+
+
+# A stage reads and updates the report's working context in place
+Stage = Callable[[Dict[str, Any]], None]
+
+
+@dataclass
+class ReportJob:
+    """Data class for a report moving through the pipeline"""
+    report_id: str
+    submitted_at: str
+    status: str = "queued"
+    stage: Optional[str] = None
+    stage_timings: Dict[str, float] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    context: Dict[str, Any] = field(default_factory=dict, repr=False)
+    enqueued: float = field(default_factory=time.perf_counter, repr=False)
+
+
+class UploadPipeline:
+    """Bounded queue plus worker pool that runs reports through timed stages"""
+
+    def __init__(self,
+                 stages: List[Tuple[str, Stage]],
+                 finalize: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 workers: int = 4,
+                 max_queue: int = 1000,
+                 max_tracked_reports: int = 10000,
+                 timing_window: int = 1000):
+        """
+        Initialize the pipeline
+
+        Args:
+            stages: Ordered (name, stage) pairs run for every report
+            finalize: Builds the public result from a finished report's context
+            workers: Number of worker threads
+            max_queue: Reports allowed to wait before submissions are refused
+            max_tracked_reports: Finished reports kept for status polling
+            timing_window: Recent samples kept per stage for latency percentiles
+        """
+        self.stages = stages
+        self.finalize = finalize
+        self.workers = workers
+        self.max_tracked_reports = max_tracked_reports
+        self.logger = logging.getLogger(__name__)
+
+        self._queue: "queue.Queue[Optional[ReportJob]]" = queue.Queue(maxsize=max_queue)
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+        self._timings = {name: [] for name, _ in stages}
+        self._timings["queue_wait"] = []
+        self._timing_window = timing_window
+
+    def _start(self) -> None:
+        """Start the worker threads on first use (caller holds lock)"""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"upload-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, context: Dict[str, Any]) -> Optional[str]:
+        """
+        Queue a report for background processing
+
+        Args:
+            context: Initial report context handed to the first stage
+
+        Returns:
+            Report ID, or None if the queue is full
+        """
+        job = ReportJob(report_id=uuid.uuid4().hex, submitted_at=datetime.now().isoformat(),
+                        context=context)
+
+        with self._lock:
+            self._start()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self._counters["rejected"] += 1
+                return None
+            self._track(job)
+            self._counters["submitted"] += 1
+
+        return job.report_id
+
+    def _track(self, job: ReportJob) -> None:
+        """Remember a job for status polling, forgetting the oldest finished ones (caller holds lock)"""
+        self._jobs[job.report_id] = job
+        while len(self._jobs) > self.max_tracked_reports:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status not in ("completed", "failed"):
+                break
+            del self._jobs[oldest_id]
+
+    def _record(self, name: str, seconds: float) -> None:
+        """Add a latency sample to a stage's rolling window (caller holds lock)"""
+        samples = self._timings[name]
+        samples.append(seconds)
+        if len(samples) > self._timing_window:
+            del samples[0]
+
+    def _worker(self) -> None:
+        """Pull reports off the queue and run them through every stage"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: ReportJob) -> None:
+        """Run one report through the stages, recording timings and outcome"""
+        with self._lock:
+            self._in_flight += 1
+            job.stage_timings["queue_wait"] = time.perf_counter() - job.enqueued
+            self._record("queue_wait", job.stage_timings["queue_wait"])
+
+        try:
+            for name, stage in self.stages:
+                job.status, job.stage = "processing", name
+                start = time.perf_counter()
+                stage(job.context)
+                elapsed = time.perf_counter() - start
+
+                job.stage_timings[name] = elapsed
+                with self._lock:
+                    self._record(name, elapsed)
+
+            job.result = self.finalize(job.context)
+            job.status, job.stage = "completed", None
+
+        except Exception as e:
+            self.logger.error(f"Report {job.report_id} failed in stage {job.stage}: {str(e)}")
+            job.error = f"Processing failed: {str(e)}"
+            job.status = "failed"
+
+        finally:
+            # Uploaded bytes are not needed once the report is finished
+            job.context = {}
+            with self._lock:
+                self._in_flight -= 1
+                self._counters[job.status] += 1
+
+    def get_status(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the status of a submitted report
+
+        Args:
+            report_id: ID returned by submit
+
+        Returns:
+            Status dictionary, or None if the report is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(report_id)
+            if job is None:
+                return None
+
+            status = {
+                "report_id": job.report_id,
+                "status": job.status,
+                "stage": job.stage,
+                "submitted_at": job.submitted_at,
+                "stage_timings_ms": {name: seconds * 1000 for name, seconds in job.stage_timings.items()},
+            }
+            if job.result is not None:
+                status["result"] = job.result
+            if job.error is not None:
+                status["error"] = job.error
+            return status
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get queue depth, throughput counters and per-stage latency
+
+        Returns:
+            Dictionary with queue depth, in-flight count, counters and stage percentiles in ms
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["queue_depth"] = self._queue.qsize()
+            stats["in_flight"] = self._in_flight
+            stats["workers"] = len(self._threads)
+            samples = {name: list(values) for name, values in self._timings.items()}
+
+        stats["stage_latency_ms"] = {}
+        for name, values in samples.items():
+            if not values:
+                continue
+            values_ms = np.array(values) * 1000
+            stats["stage_latency_ms"][name] = {
+                "count": len(values_ms),
+                "mean": float(values_ms.mean()),
+                "p50": float(np.percentile(values_ms, 50)),
+                "p95": float(np.percentile(values_ms, 95)),
+            }
+        return stats
+
+    def join(self) -> None:
+        """Block until every queued report has been processed"""
+        self._queue.join()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker threads after the queued reports are processed
+
+        Args:
+            wait: Block until the workers have exited
+        """
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
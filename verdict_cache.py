@@ -0,0 +1,148 @@
+"""
+Cache of hazard verdicts keyed by image content
+
+Every analyzed image is remembered by an exact content digest and a 64-bit
+perceptual hash. Exact re-uploads hit the digest map without decoding; near
+duplicates (re-encoded, resized or lightly edited copies) are found through a
+multi-index Hamming search: the hash is split into max_distance + 1 bands, so
+by the pigeonhole principle any hash within max_distance bits shares at least
+one band exactly with the query, and only those candidates are compared.
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+Verdict = Tuple[str, float, Dict[str, Any]]
+
+HASH_BITS = 64
+
+
+class VerdictCache:
+    """Bounded LRU of detection verdicts with exact and near-duplicate lookup"""
+
+    def __init__(self, max_entries: int = 10000, max_distance: int = 4):
+        """
+        Initialize the verdict cache
+
+        Args:
+            max_entries: Images remembered before the least recently used is evicted
+            max_distance: Largest Hamming distance treated as the same image
+        """
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+
+        # Split the hash into max_distance + 1 contiguous bands
+        n_bands = max_distance + 1
+        edges = [round(i * HASH_BITS / n_bands) for i in range(n_bands + 1)]
+        self._bands = [(edges[i], (1 << (edges[i + 1] - edges[i])) - 1) for i in range(n_bands)]
+
+        self._entries: "OrderedDict[str, Tuple[int, Verdict]]" = OrderedDict()
+        self._band_index: List[Dict[int, Set[str]]] = [{} for _ in self._bands]
+        self._lock = threading.Lock()
+        self._stats = {"exact_hits": 0, "near_hits": 0, "misses": 0, "evictions": 0}
+
+    def _band_keys(self, phash: int) -> List[int]:
+        return [(phash >> shift) & mask for shift, mask in self._bands]
+
+    @staticmethod
+    def _copy(verdict: Verdict, cache_hit: str, distance: int) -> Verdict:
+        """Copy a cached verdict so callers can modify its metadata freely"""
+        hazard_type, confidence, metadata = verdict
+        metadata = copy.deepcopy(metadata)
+        metadata["cache_hit"] = cache_hit
+        metadata["hamming_distance"] = distance
+        return hazard_type, confidence, metadata
+
+    def get_exact(self, digest: str) -> Optional[Verdict]:
+        """
+        Look up a verdict by exact content digest
+
+        Args:
+            digest: Content digest of the image bytes
+
+        Returns:
+            Cached verdict, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            self._entries.move_to_end(digest)
+            self._stats["exact_hits"] += 1
+            return self._copy(entry[1], "exact", 0)
+
+    def get_similar(self, phash: int) -> Optional[Verdict]:
+        """
+        Look up the verdict of the closest perceptually similar image
+
+        Args:
+            phash: 64-bit perceptual hash of the image
+
+        Returns:
+            Cached verdict of the nearest image within max_distance, or None on a miss
+        """
+        with self._lock:
+            candidates: Set[str] = set()
+            for band, key in zip(self._band_index, self._band_keys(phash)):
+                candidates.update(band.get(key, ()))
+
+            best_digest, best_distance = None, self.max_distance + 1
+            for digest in candidates:
+                distance = bin(self._entries[digest][0] ^ phash).count("1")
+                if distance < best_distance:
+                    best_digest, best_distance = digest, distance
+
+            if best_digest is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(best_digest)
+            self._stats["near_hits"] += 1
+            return self._copy(self._entries[best_digest][1], "near_duplicate", best_distance)
+
+    def put(self, digest: str, phash: int, verdict: Verdict) -> None:
+        """
+        Remember the verdict for an image
+
+        Args:
+            digest: Content digest of the image bytes
+            phash: 64-bit perceptual hash of the image
+            verdict: (hazard_type, confidence, metadata) from the models
+        """
+        verdict = (verdict[0], verdict[1], copy.deepcopy(verdict[2]))
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                return
+
+            self._entries[digest] = (phash, verdict)
+            for band, key in zip(self._band_index, self._band_keys(phash)):
+                band.setdefault(key, set()).add(digest)
+
+            while len(self._entries) > self.max_entries:
+                old_digest, (old_hash, _) = self._entries.popitem(last=False)
+                for band, key in zip(self._band_index, self._band_keys(old_hash)):
+                    members = band[key]
+                    members.discard(old_digest)
+                    if not members:
+                        del band[key]
+                self._stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache hit-rate metrics
+
+        Returns:
+            Counters plus hit rate and current size
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+
+        hits = stats["exact_hits"] + stats["near_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats